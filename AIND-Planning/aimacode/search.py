@@ -197,19 +197,24 @@ def breadth_first_search(problem):
     return None
 
 
-def best_first_graph_search(problem, f):
+def best_first_graph_search(problem, f, queue=PriorityQueue):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+    The frontier holds one node per state: a cheaper path to a state on the
+    frontier replaces the queued node, so no stale duplicate is expanded.
+    The frontier is made by calling queue(min, f) with the memoized f; pass
+    a function that makes and keeps a PriorityQueue(min, f, trace=True) to
+    read its heap sizes after the search."""
     f = memoize(f, 'f')
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = PriorityQueue(min, f)
+    frontier = queue(min, f)
     frontier.append(node)
     explored = set()
     while frontier:
@@ -221,16 +226,16 @@ def best_first_graph_search(problem, f):
             if child.state not in explored and child not in frontier:
                 frontier.append(child)
             elif child in frontier:
-                incumbent = frontier[child]
-                if f(child) < f(incumbent):
-                    # del frontier[incumbent]
+                # appending replaces the queued node of the same state
+                if f(child) < f(frontier[child]):
                     frontier.append(child)
     return None
 
 
-def uniform_cost_search(problem):
+def uniform_cost_search(problem, queue=PriorityQueue):
     "[Figure 3.14]"
-    return best_first_graph_search(problem, lambda node: node.path_cost)
+    return best_first_graph_search(problem, lambda node: node.path_cost,
+                                   queue)
 
 
 def depth_limited_search(problem, limit=50):
@@ -268,12 +273,13 @@ greedy_best_first_graph_search = best_first_graph_search
 # Greedy best-first search is accomplished by specifying f(n) = h(n).
 
 
-def astar_search(problem, h=None):
+def astar_search(problem, h=None, queue=PriorityQueue):
     """A* search is best-first graph search with f(n) = g(n)+h(n).
     You need to specify the h function when you call astar_search, or
     else in your Problem subclass."""
     h = memoize(h or problem.h, 'h')
-    return best_first_graph_search(problem, lambda n: n.path_cost + h(n))
+    return best_first_graph_search(problem, lambda n: n.path_cost + h(n),
+                                   queue)
 
 # ______________________________________________________________________________
 # Other search algorithms
@@ -531,8 +531,7 @@ class Queue:
         q.pop()         -- return the top item from the queue
         len(q)          -- number of items in q (also q.__len())
         item in q       -- does q contain item?
-    Note that isinstance(Stack(), Queue) is false, because we implement stacks
-    as lists.  If Python ever gets interfaces, Queue will be an interface."""
+    If Python ever gets interfaces, Queue will be an interface."""
 
     def __init__(self):
         raise NotImplementedError
@@ -543,37 +542,53 @@ class Queue:
 
 
 def Stack():
-    """Return an empty list, suitable as a Last-In-First-Out Queue."""
-    return []
+    """Return an empty Last-In-First-Out Queue."""
+    return LIFOQueue()
 
 
 class FIFOQueue(Queue):
 
-    """A First-In-First-Out Queue."""
+    """A First-In-First-Out Queue.
+
+    MODIFIED FROM AIMA VERSION
+        - Use collections.deque
+        - Use an additional counter to track membership, so that `item in q`
+          takes constant time instead of scanning the queue
+    """
 
     def __init__(self):
-        self.A = []
-        self.start = 0
+        self.A = collections.deque()
+        self._A = collections.Counter()
 
     def append(self, item):
         self.A.append(item)
+        self._A[item] += 1
 
     def __len__(self):
-        return len(self.A) - self.start
-
-    def extend(self, items):
-        self.A.extend(items)
+        return len(self.A)
 
     def pop(self):
-        e = self.A[self.start]
-        self.start += 1
-        if self.start > 5 and self.start > len(self.A) / 2:
-            self.A = self.A[self.start:]
-            self.start = 0
-        return e
+        return self._remove(self.A.popleft())
+
+    def _remove(self, item):
+        count = self._A[item] - 1
+        if count:
+            self._A[item] = count
+        else:
+            del self._A[item]
+        return item
 
     def __contains__(self, item):
-        return item in self.A[self.start:]
+        return item in self._A
+
+
+class LIFOQueue(FIFOQueue):
+
+    """A Last-In-First-Out Queue with the constant time membership test of
+    FIFOQueue."""
+
+    def pop(self):
+        return self._remove(self.A.pop())
 
 
 class PriorityQueue(Queue):
@@ -583,32 +598,59 @@ class PriorityQueue(Queue):
     MODIFIED FROM AIMA VERSION
         - Use heapq
         - Use an additional dict to track membership
-        - remove __delitem__ (AIMA version contains error)
+        - Items that compare equal share one entry: appending an item equal
+          to a queued one replaces it, whatever their f values (to keep the
+          better one, compare with `q[item]` first, as best_first_graph_search
+          does for a node reached by a cheaper path), `q[item]` returns the
+          queued item and `del q[item]` removes it. Replaced and removed
+          entries are left in the heap and skipped by pop (lazy deletion);
+          the heap is rebuilt when they outnumber the queued items.
+        - Count the skipped entries in `stale`, and with trace=True record
+          the heap size after every pop in `sizes`
     """
 
-    def __init__(self, order=None, f=lambda x: x):
+    def __init__(self, order=None, f=lambda x: x, trace=False):
         self.A = []
-        self._A = defaultdict(lambda: 0)
+        self._A = {}
         self.f = f
+        self.trace = trace
+        self.sizes = []
+        self.stale = 0
 
     def append(self, item):
-        heapq.heappush(self.A, (self.f(item), item))
-        self._A[item] += 1
+        entry = (self.f(item), item)
+        self._A[item] = entry
+        heapq.heappush(self.A, entry)
+        self._compact()
 
     def __len__(self):
-        return len(self.A)
+        return len(self._A)
 
     def pop(self):
-        _, item = heapq.heappop(self.A)
-        self._A[item] -= 1
-        return item
+        while True:
+            entry = heapq.heappop(self.A)
+            if self._A.get(entry[1]) is entry:
+                del self._A[entry[1]]
+                if self.trace:
+                    self.sizes.append(len(self.A))
+                return entry[1]
+            self.stale += 1
 
     def __contains__(self, item):
-        return self._A[item] > 0
+        return item in self._A
 
     def __getitem__(self, key):
-        if self._A[key] > 0:
-            return key
+        return self._A[key][1]
+
+    def __delitem__(self, key):
+        del self._A[key]
+        self._compact()
+
+    def _compact(self):
+        if len(self.A) > 2 * len(self._A) + 32:
+            self.A = [entry for entry in self.A
+                      if self._A.get(entry[1]) is entry]
+            heapq.heapify(self.A)
 
 # ______________________________________________________________________________
 # Useful Shorthands
@@ -0,0 +1,106 @@
+"""Time graph searches on the three air cargo problems.
+
+For every search and problem the script prints the node expansions, goal
+tests and new nodes counted by `InstrumentedProblem`, the length of the plan
+found and the run time. The searches test every generated child against the
+frontier, so their run time shows the cost of the frontier's membership
+test as the frontier grows. For the best-first searches it also prints the
+largest heap of the `PriorityQueue` frontier and the number of replaced
+entries skipped by `pop`; `--trace` prints the heap size over the search.
+
+    python search_benchmark.py
+    python search_benchmark.py -p 1 2 -s 1 4 --trace 500
+"""
+import argparse
+
+from timeit import default_timer as timer
+
+from aimacode.search import (InstrumentedProblem, breadth_first_search,
+                             depth_first_graph_search, uniform_cost_search,
+                             greedy_best_first_graph_search, astar_search)
+from aimacode.utils import PriorityQueue
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3
+
+PROBLEMS = [["Air Cargo Problem 1", air_cargo_p1],
+            ["Air Cargo Problem 2", air_cargo_p2],
+            ["Air Cargo Problem 3", air_cargo_p3]]
+SEARCHES = [["breadth_first_search", breadth_first_search, "", False],
+            ["depth_first_graph_search", depth_first_graph_search, "", False],
+            ["uniform_cost_search", uniform_cost_search, "", True],
+            ["greedy_best_first_graph_search",
+             greedy_best_first_graph_search, "h_1", True],
+            ["astar_search", astar_search, "h_1", True],
+            ["astar_search", astar_search, "h_ignore_preconditions", True]]
+
+
+def run(problem_fn, search_fn, heuristic, best_first):
+    """Run one search.
+
+    Returns
+    -------
+    (InstrumentedProblem, int or None, float, PriorityQueue or None)
+        The instrumented problem, the plan length, the run time and the
+        frontier of a best-first search.
+    """
+    problem = InstrumentedProblem(problem_fn())
+    args = [getattr(problem.problem, heuristic)] if heuristic else []
+    frontiers = []
+
+    def traced_queue(order, f):
+        frontiers.append(PriorityQueue(order, f, trace=True))
+        return frontiers[-1]
+
+    kwargs = {"queue": traced_queue} if best_first else {}
+    start = timer()
+    node = search_fn(problem, *args, **kwargs)
+    elapsed = timer() - start
+    length = len(node.solution()) if node is not None else None
+    return problem, length, elapsed, frontiers[0] if frontiers else None
+
+
+def main(p_choices, s_choices, trace=0):
+    problems = [PROBLEMS[i - 1] for i in p_choices]
+    searches = [SEARCHES[i - 1] for i in s_choices]
+
+    print("{:<22}{:<48}{:>11}{:>11}{:>11}{:>6}{:>10}{:>10}{:>8}".format(
+        "Problem", "Search", "Expansions", "Goal Tests", "New Nodes", "Plan",
+        "Seconds", "Max Heap", "Stale"))
+    print("-" * 137)
+    for pname, problem_fn in problems:
+        for sname, search_fn, heuristic, best_first in searches:
+            problem, length, elapsed, frontier = run(
+                problem_fn, search_fn, heuristic, best_first)
+            if heuristic:
+                sname = "{} with {}".format(sname, heuristic)
+            heap = stale = "-"
+            if frontier is not None:
+                heap = max(frontier.sizes, default=0)
+                stale = frontier.stale
+            print("{:<22}{:<48}{:>11}{:>11}{:>11}{:>6}{:>10.2f}{:>10}{:>8}"
+                  .format(pname, sname, problem.succs, problem.goal_tests,
+                          problem.states, "-" if length is None else length,
+                          elapsed, heap, stale), flush=True)
+            if trace and frontier is not None:
+                print("    heap size every {} pops: {}".format(
+                    trace, " ".join(map(str, frontier.sizes[::trace]))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-p', '--problems', nargs="+", type=int,
+                        choices=range(1, 1 + len(PROBLEMS)),
+                        default=list(range(1, 1 + len(PROBLEMS))),
+                        help="Problems to solve (default: all)")
+    parser.add_argument('-s', '--searches', nargs="+", type=int,
+                        choices=range(1, 1 + len(SEARCHES)),
+                        default=list(range(1, 1 + len(SEARCHES))),
+                        help="Searches to run (default: all): " + ", ".join(
+                            "{}. {}{}".format(i + 1, name,
+                                              " " + h if h else "")
+                            for i, (name, _, h, _) in enumerate(SEARCHES)))
+    parser.add_argument('--trace', type=int, default=0,
+                        help="Print the heap size of best-first searches "
+                             "every TRACE pops")
+    args = parser.parse_args()
+    main(args.problems, args.searches, args.trace)
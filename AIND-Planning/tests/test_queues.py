@@ -0,0 +1,123 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from aimacode.search import Node, Problem, uniform_cost_search
+from aimacode.utils import FIFOQueue, LIFOQueue, PriorityQueue, Stack
+
+
+class TestFIFOQueue(unittest.TestCase):
+
+    def test_order(self):
+        q = FIFOQueue()
+        q.extend([1, 2, 3])
+        self.assertEqual([q.pop() for _ in range(len(q))], [1, 2, 3])
+
+    def test_membership(self):
+        q = FIFOQueue()
+        q.extend(["a", "b", "a"])
+        self.assertIn("b", q)
+        q.pop()
+        self.assertIn("a", q)
+        q.pop()
+        self.assertNotIn("b", q)
+        q.pop()
+        self.assertNotIn("a", q)
+        self.assertEqual(len(q), 0)
+
+
+class TestLIFOQueue(unittest.TestCase):
+
+    def test_order(self):
+        q = Stack()
+        self.assertIsInstance(q, LIFOQueue)
+        q.extend([1, 2, 3])
+        self.assertEqual([q.pop() for _ in range(len(q))], [3, 2, 1])
+
+    def test_membership(self):
+        q = LIFOQueue()
+        q.extend(["a", "b"])
+        q.pop()
+        self.assertIn("a", q)
+        self.assertNotIn("b", q)
+
+
+class TestPriorityQueue(unittest.TestCase):
+
+    def test_order(self):
+        q = PriorityQueue(min, lambda x: -x)
+        q.extend([2, 3, 1])
+        self.assertEqual([q.pop() for _ in range(len(q))], [3, 2, 1])
+
+    def test_replace(self):
+        q = PriorityQueue(min, lambda node: node.path_cost, trace=True)
+        q.extend([Node("a", path_cost=5), Node("b", path_cost=3)])
+        q.append(Node("a", path_cost=1))
+        self.assertEqual(len(q), 2)
+        self.assertEqual(q[Node("a")].path_cost, 1)
+        self.assertEqual(q.pop().path_cost, 1)
+        self.assertEqual(q.pop().state, "b")
+        self.assertEqual(len(q), 0)
+        self.assertEqual(q.stale, 0)
+        self.assertEqual(q.sizes, [2, 1])
+        self.assertRaises(IndexError, q.pop)
+        self.assertEqual(q.stale, 1)
+
+    def test_replace_with_worse(self):
+        # append replaces an equal item even if its f is worse
+        q = PriorityQueue(min, lambda node: node.path_cost)
+        q.append(Node("a", path_cost=1))
+        q.append(Node("a", path_cost=5))
+        self.assertEqual(len(q), 1)
+        self.assertEqual(q[Node("a")].path_cost, 5)
+        self.assertEqual(q.pop().path_cost, 5)
+        self.assertEqual(len(q), 0)
+
+    def test_delete(self):
+        q = PriorityQueue()
+        q.extend([1, 2, 3])
+        del q[1]
+        self.assertNotIn(1, q)
+        self.assertEqual([q.pop() for _ in range(len(q))], [2, 3])
+        # heap sizes are only recorded on request
+        self.assertEqual(q.sizes, [])
+
+    def test_compact(self):
+        q = PriorityQueue()
+        for i in range(100):
+            q.append(i)
+            del q[i]
+        self.assertEqual(len(q), 0)
+        self.assertLessEqual(len(q.A), 32)
+
+    def test_search_queue(self):
+        class Line(Problem):
+            """Walk from 0 to 3; a step from 0 to 2 costs more than two
+            steps of 1"""
+
+            def actions(self, state):
+                return [1, 2] if state < 3 else []
+
+            def result(self, state, action):
+                return min(state + action, 3)
+
+            def path_cost(self, c, state1, action, state2):
+                return c + (3 if action == 2 else 1)
+
+        frontiers = []
+
+        def traced_queue(order, f):
+            frontiers.append(PriorityQueue(order, f, trace=True))
+            return frontiers[-1]
+
+        node = uniform_cost_search(Line(0, 3), queue=traced_queue)
+        self.assertEqual(node.path_cost, 3)
+        # the search orders the queue it is given by its own f
+        frontier, = frontiers
+        self.assertEqual(frontier.f(node), 3)
+        self.assertGreater(len(frontier.sizes), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
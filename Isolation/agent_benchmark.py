@@ -0,0 +1,164 @@
+"""Benchmark the Isolation agents under a fixed node budget.
+
+Wall-clock time limits make tournament results depend on the speed and load
+of the machine. Here every turn is limited to a fixed number of search nodes
+with `isolation.NodeClock` instead, so the games (and the win rates) are
+reproducible and only the nodes/sec figure depends on the hardware.
+
+Each agent from `sample_players` and `game_agent` plays "fair" matches (both
+seats from the same random opening) against a reference opponent. The script
+reports the nodes searched per second, the average depth reached per move
+and the win rate of every agent. `MCTSPlayer` checks the clock once per
+playout, so its nodes are playouts.
+"""
+import argparse
+import random
+
+from collections import namedtuple
+from timeit import default_timer as timer
+
+from isolation import Board
+from sample_players import (RandomPlayer, GreedyPlayer, open_move_score,
+                            improved_score, center_score)
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, MCTSPlayer,
+                        custom_score, custom_score_2, custom_score_3)
+from score_cache import CachedScore
+
+NODE_LIMIT = 1000  # number of search nodes per turn
+NUM_MATCHES = 5  # number of matches against the reference opponent
+
+Agent = namedtuple("Agent", ["player", "name"])
+
+
+def make_agents():
+    return [
+        Agent(RandomPlayer(), "Random"),
+        Agent(GreedyPlayer(score_fn=open_move_score), "Greedy_Open"),
+        Agent(GreedyPlayer(score_fn=center_score), "Greedy_Center"),
+        Agent(GreedyPlayer(score_fn=improved_score), "Greedy_Improved"),
+        Agent(MinimaxPlayer(score_fn=open_move_score), "MM_Open"),
+        Agent(MinimaxPlayer(score_fn=center_score), "MM_Center"),
+        Agent(MinimaxPlayer(score_fn=improved_score), "MM_Improved"),
+        Agent(AlphaBetaPlayer(score_fn=open_move_score), "AB_Open"),
+        Agent(AlphaBetaPlayer(score_fn=center_score), "AB_Center"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3"),
+        Agent(AlphaBetaPlayer(score_fn=CachedScore(custom_score)),
+              "AB_Custom_Cached"),
+        Agent(MCTSPlayer(), "MCTS"),
+    ]
+
+
+def depth_reached(player):
+    """Return the search depth the player completed for its last move. """
+    if isinstance(player, AlphaBetaPlayer):
+        if not player.iteration_stats:
+            return 0
+        return player.iteration_stats[-1]["depth"]
+    if isinstance(player, MinimaxPlayer):
+        # a timed out search still returns a legal move
+        return player.depth
+    if isinstance(player, GreedyPlayer):
+        return 1
+    return 0
+
+
+class AgentStats:
+    """Totals collected for one agent over all of its moves and games. """
+
+    def __init__(self):
+        self.nodes = 0
+        self.seconds = 0.
+        self.depth = 0
+        self.moves = 0
+        self.wins = 0
+        self.games = 0
+
+
+def measure_moves(player, totals):
+    """Wrap the get_move() method of `player` so that every call adds its
+    nodes, time and depth to `totals`. Delete `player.get_move` to remove the
+    wrapper.
+    """
+    get_move = player.get_move
+
+    def measured_get_move(game, time_left):
+        start = timer()
+        move = get_move(game, time_left)
+        totals.seconds += timer() - start
+        totals.nodes += time_left.nodes
+        totals.depth += depth_reached(player)
+        totals.moves += 1
+        return move
+
+    player.get_move = measured_get_move
+
+
+def play_game(player_1, player_2, opening, node_limit, stats):
+    """Play a game with `Board.play` in which every turn is limited to
+    `node_limit` nodes, adding the per-move figures of each player to
+    `stats`, and return the winner.
+    """
+    game = Board(player_1, player_2)
+    for move in opening:
+        game.apply_move(move)
+    for player in (player_1, player_2):
+        measure_moves(player, stats[player])
+    try:
+        winner, _, _ = game.play(node_limit=node_limit)
+    finally:
+        for player in (player_1, player_2):
+            del player.get_move
+    return winner
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    agents = make_agents()
+    opponents = {agent.name: agent for agent in make_agents()}
+    if args.opponent not in opponents:
+        raise ValueError("Unknown opponent: {}".format(args.opponent))
+    opponent = opponents[args.opponent]
+
+    print("Node limit per move: {}".format(args.nodes))
+    print("\n{:^17}{:^12}{:^12}{:^10}{:^10}".format(
+        "Agent", "Nodes", "Nodes/sec", "Depth", "Win Rate"))
+    print("-" * 61)
+    for agent in agents:
+        stats = {agent.player: AgentStats(), opponent.player: AgentStats()}
+        for _ in range(args.matches):
+            opening = [(rng.randrange(7), rng.randrange(7))]
+            while len(opening) < 2:
+                move = (rng.randrange(7), rng.randrange(7))
+                if move not in opening:
+                    opening.append(move)
+            seed = rng.getrandbits(32)
+            for players in [(agent.player, opponent.player),
+                            (opponent.player, agent.player)]:
+                random.seed(seed)
+                winner = play_game(players[0], players[1], opening,
+                                   args.nodes, stats)
+                stats[agent.player].games += 1
+                stats[agent.player].wins += winner == agent.player
+
+        totals = stats[agent.player]
+        print("{:^17}{:^12d}{:^12.0f}{:^10.2f}{:^10}".format(
+            agent.name, totals.nodes,
+            totals.nodes / totals.seconds if totals.seconds else 0.,
+            totals.depth / max(totals.moves, 1),
+            "{:.1f}%".format(100. * totals.wins / totals.games)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=NODE_LIMIT,
+                        help="Number of search nodes allowed per move")
+    parser.add_argument('--matches', type=int, default=NUM_MATCHES,
+                        help="Number of matches against the opponent")
+    parser.add_argument('--opponent', default="AB_Improved",
+                        help="Name of the reference opponent")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed for the openings and games")
+    main(parser.parse_args())
@@ -3,12 +3,101 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import copy
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
 import unittest
 
 import isolation
+import batch_scores
+import board_benchmark
+import competition_agent
+import endgame
+import features
+import game_record
 import game_agent
+import move_ordering
+import opening_book
+import parallel_search
+import regression_benchmark
+import sample_players
+import score_cache
+import search_stats
+import selfplay
+import tournament
+import transposition
+
+from concurrent.futures import ProcessPoolExecutor
+
+from isolation.symmetry import (canonical_form, inverse_transform,
+                                transform_move, transforms)
 
 from importlib import reload
+from timeit import default_timer as timer
+
+try:
+    import numpy as np
+    import learned_score
+    import tune
+except ImportError:  # NumPy is not installed
+    np = learned_score = tune = None
+
+
+def tournament_openings(num_games, seed):
+    """Yield move lists for the two random opening moves applied by
+    tournament.play_round"""
+    rng = random.Random(seed)
+    for _ in range(num_games):
+        game = isolation.Board("Player1", "Player2")
+        moves = []
+        for _ in range(2):
+            move = rng.choice(sorted(game.get_legal_moves()))
+            game.apply_move(move)
+            moves.append(move)
+        yield moves
+
+
+class SlowShareAlphaBetaPlayer(parallel_search.ParallelAlphaBetaPlayer):
+    """A parallel player whose worker searching `slow_move` starts late"""
+
+    slow_move = None
+
+    def search_moves(self, game, depth, moves):
+        if depth == 1 and self.slow_move in moves:
+            time.sleep(1.)
+        return super().search_moves(game, depth, moves)
+
+
+class StockBoard(isolation.Board):
+    """A board without the `count_legal_moves` of this project, like the
+    stock `isolation.Board`"""
+
+    def __getattribute__(self, name):
+        if name == "count_legal_moves":
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+
+def assert_same_scores(test, score_fns, seed):
+    """Check that the score functions agree on a `StockBoard` and a board of
+    this project over a random game"""
+    rng = random.Random(seed)
+    board = isolation.Board("Player1", "Player2")
+    stock = StockBoard("Player1", "Player2")
+    test.assertFalse(hasattr(stock, "count_legal_moves"))
+    while board.get_legal_moves():
+        for score_fn in score_fns:
+            for player in ("Player1", "Player2"):
+                test.assertEqual(score_fn(stock, player),
+                                 score_fn(board, player))
+        move = rng.choice(sorted(board.get_legal_moves()))
+        board.apply_move(move)
+        stock.apply_move(move)
 
 
 class IsolationTest(unittest.TestCase):
@@ -21,5 +110,1196 @@ class IsolationTest(unittest.TestCase):
         self.game = isolation.Board(self.player1, self.player2)
 
 
+class BitBoardTest(unittest.TestCase):
+    """Check that the bitmask engine agrees with the reference list board"""
+
+    def test_matches_list_board(self):
+        rng = random.Random(0)
+        for width, height in [(7, 7)] * 20 + [(9, 9), (11, 11), (5, 8)]:
+            board = isolation.Board("Player1", "Player2", width, height)
+            bitboard = isolation.BitBoard("Player1", "Player2", width, height)
+            while True:
+                for player in ("Player1", "Player2"):
+                    self.assertEqual(sorted(board.get_legal_moves(player)),
+                                     sorted(bitboard.get_legal_moves(player)))
+                    self.assertEqual(board.count_legal_moves(player),
+                                     len(board.get_legal_moves(player)))
+                    self.assertEqual(bitboard.count_legal_moves(player),
+                                     len(board.get_legal_moves(player)))
+                    self.assertEqual(board.get_player_location(player),
+                                     bitboard.get_player_location(player))
+                    self.assertEqual(board.utility(player),
+                                     bitboard.utility(player))
+                self.assertEqual(board.to_string(), bitboard.to_string())
+                moves = sorted(board.get_legal_moves())
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                self.assertEqual(board.forecast_move(move).to_string(),
+                                 bitboard.forecast_move(move).to_string())
+                board.apply_move(move)
+                bitboard.apply_move(move)
+
+
+class PushPopTest(unittest.TestCase):
+    """Check that push_move/pop_move restore the board and that in-place
+    search agrees with copying search"""
+
+    def test_pop_restores_board(self):
+        for engine in (isolation.Board, isolation.BitBoard):
+            rng = random.Random(1)
+            game = engine("Player1", "Player2")
+            snapshots = []
+            while game.get_legal_moves():
+                snapshots.append((game.to_string(), game.hash(),
+                                  game.active_player, game.move_count))
+                game.push_move(rng.choice(sorted(game.get_legal_moves())))
+            while snapshots:
+                game.pop_move()
+                self.assertEqual(snapshots.pop(),
+                                 (game.to_string(), game.hash(),
+                                  game.active_player, game.move_count))
+
+    def test_in_place_search_matches_forecast(self):
+        rng = random.Random(2)
+        for _ in range(5):
+            for player_class in (game_agent.MinimaxPlayer,
+                                 game_agent.AlphaBetaPlayer):
+                copying = player_class(search_depth=3)
+                in_place = player_class(search_depth=3, in_place=True)
+                moves = []
+                game = isolation.BitBoard(copying, "Opponent")
+                for _ in range(4):
+                    move = rng.choice(sorted(game.get_legal_moves()))
+                    game.apply_move(move)
+                    moves.append(move)
+                other = isolation.BitBoard(in_place, "Opponent")
+                for move in moves:
+                    other.apply_move(move)
+                before = other.to_string()
+                copying.time_left = in_place.time_left = lambda: float("inf")
+                if player_class is game_agent.MinimaxPlayer:
+                    self.assertEqual(copying.minimax(game, 3),
+                                     in_place.minimax(other, 3))
+                else:
+                    self.assertEqual(copying.alphabeta(game, 3),
+                                     in_place.alphabeta(other, 3))
+                self.assertEqual(before, other.to_string())
+
+
+class TranspositionTableTest(unittest.TestCase):
+    """Check Zobrist hashing and the alpha-beta transposition table"""
+
+    def test_hash_identifies_position(self):
+        game = isolation.Board("Player1", "Player2")
+        bitboard = isolation.BitBoard("Player1", "Player2")
+        hashes = {game.hash()}
+        for move in [(2, 3), (0, 5), (4, 4), (1, 3), (2, 2)]:
+            game.apply_move(move)
+            bitboard.apply_move(move)
+            self.assertEqual(game.hash(), bitboard.hash())
+            hashes.add(game.hash())
+        self.assertEqual(len(hashes), 6)
+        # The same cells with the players swapped is a different position
+        swapped = isolation.Board("Player1", "Player2")
+        for move in [(0, 5), (2, 3), (1, 3), (4, 4), (2, 2)]:
+            swapped.apply_move(move)
+        self.assertNotEqual(game.hash(), swapped.hash())
+        self.assertEqual(game.hash(), game.copy().hash())
+
+    def test_table_replacement(self):
+        table = transposition.TranspositionTable(max_entries=1)
+        table.store(1, 3, transposition.EXACT, 1., (0, 0))
+        table.store(2, 2, transposition.EXACT, 2., (0, 1))
+        self.assertEqual(table.probe(1).value, 1.)
+        self.assertIsNone(table.probe(2))
+        table.new_search()
+        table.store(2, 2, transposition.EXACT, 2., (0, 1))
+        self.assertEqual(table.probe(2).move, (0, 1))
+        self.assertEqual(
+            transposition.TranspositionTable(max_mb=1).size,
+            2**20 // transposition.ENTRY_BYTES)
+
+    def test_fewer_nodes_at_equal_depth(self):
+        depth = 5
+        nodes = {}
+        for use_tt in (False, True):
+            nodes[use_tt] = 0
+            for moves in tournament_openings(8, seed=3):
+                table = transposition.TranspositionTable() if use_tt else None
+                player = game_agent.AlphaBetaPlayer(tt=table)
+                game = isolation.BitBoard(player, "Opponent")
+                for move in moves:
+                    game.apply_move(move)
+                player.time_left = lambda: float("inf")
+                for d in range(1, depth + 1):
+                    player.alphabeta(game, d)
+                nodes[use_tt] += player.nodes
+        self.assertLess(nodes[True], nodes[False])
+
+
+class MoveOrderingTest(unittest.TestCase):
+    """Check that move ordering changes the cost but not the result of the
+    search"""
+
+    def test_ordering_preserves_value(self):
+        for moves in tournament_openings(6, seed=4):
+            values = []
+            for ordering in (None, move_ordering.MoveOrdering()):
+                player = game_agent.AlphaBetaPlayer(ordering=ordering)
+                game = isolation.BitBoard(player, "Opponent")
+                for move in moves:
+                    game.apply_move(move)
+                player.time_left = lambda: float("inf")
+                for depth in range(1, 5):
+                    player.alphabeta(game, depth)
+                    values.append(player.ab_move(game, depth)[1])
+            self.assertEqual(values[:4], values[4:])
+
+    def test_killers_and_pv_first(self):
+        game = isolation.BitBoard("Player1", "Player2")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        moves = game.get_legal_moves()
+        ordering = move_ordering.MoveOrdering()
+        ordering.cutoff(game, moves[-1], 2, 3)
+        self.assertEqual(ordering.order(game, moves, 2)[0], moves[-1])
+        ordering.best_move(game, moves[1])
+        ordering.new_iteration()
+        self.assertEqual(ordering.order(game, moves, 2)[:2],
+                         [moves[1], moves[-1]])
+
+    def test_iteration_stats(self):
+        player = game_agent.AlphaBetaPlayer(
+            ordering=move_ordering.MoveOrdering(), max_depth=4)
+        game = isolation.BitBoard(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((2, 1))
+        player.get_move(game, lambda: float("inf"))
+        self.assertEqual([stats["depth"] for stats in player.iteration_stats],
+                         [1, 2, 3, 4])
+        self.assertEqual(sum(stats["nodes"]
+                             for stats in player.iteration_stats),
+                         player.nodes)
+        self.assertAlmostEqual(
+            game_agent.effective_branching_factor(1 + 2 + 4 + 8, 3), 2.,
+            places=4)
+
+
+class TournamentTest(unittest.TestCase):
+    """Check that parallel tournament rounds reproduce the serial results"""
+
+    def test_parallel_round_matches_serial(self):
+        cpu_agent = tournament.Agent(sample_players.RandomPlayer(), "Random")
+        test_agents = [
+            tournament.Agent(sample_players.GreedyPlayer(), "Greedy"),
+            tournament.Agent(game_agent.MinimaxPlayer(
+                search_depth=1, score_fn=sample_players.improved_score),
+                "MM_Improved")]
+        tallies = []
+        for executor in (None, ProcessPoolExecutor(max_workers=2)):
+            wins = {agent.player: 0 for agent in [cpu_agent] + test_agents}
+            counts = tournament.play_round(cpu_agent, test_agents, wins, 3,
+                                           seed=5, executor=executor)
+            tallies.append((sorted(wins.values()), counts))
+            if executor is not None:
+                executor.shutdown()
+        self.assertEqual(tallies[0], tallies[1])
+        self.assertEqual(sum(tallies[0][0]), 12)
+
+
+class NodeLimitTest(unittest.TestCase):
+    """Check that node-limited games are reproducible"""
+
+    def test_node_limited_play_is_deterministic(self):
+        histories = []
+        for _ in range(2):
+            random.seed(6)
+            player_1 = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score)
+            player_2 = game_agent.MinimaxPlayer(
+                score_fn=sample_players.open_move_score)
+            game = isolation.Board(player_1, player_2)
+            winner, history, termination = game.play(node_limit=300)
+            histories.append((winner is player_1, history, termination))
+        self.assertEqual(histories[0], histories[1])
+
+    def test_clock_counts_nodes(self):
+        player = game_agent.AlphaBetaPlayer()
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        clock = isolation.NodeClock(200)
+        player.get_move(game, clock)
+        self.assertLessEqual(clock.nodes, 200)
+        self.assertGreaterEqual(clock(), 0)
+
+
+class BatchScoreTest(unittest.TestCase):
+    """Check the batch heuristics against the scalar reference versions"""
+
+    PAIRS = [
+        (sample_players.open_move_score, batch_scores.batch_open_move_score),
+        (sample_players.improved_score, batch_scores.batch_improved_score),
+        (sample_players.center_score, batch_scores.batch_center_score),
+        (game_agent.custom_score, batch_scores.batch_improved_score),
+        (game_agent.custom_score_2, batch_scores.batch_custom_score_2),
+        (game_agent.custom_score_3, batch_scores.batch_custom_score_3),
+    ]
+
+    def test_matches_scalar_scores(self):
+        rng = random.Random(7)
+        for _ in range(10):
+            game = isolation.Board("Player1", "Player2")
+            game.apply_move((rng.randrange(7), rng.randrange(7)))
+            while game.get_legal_moves():
+                moves = game.get_legal_moves()
+                children = [game.forecast_move(move) for move in moves]
+                for player in ("Player1", "Player2"):
+                    for scalar, batch in self.PAIRS:
+                        self.assertEqual(
+                            batch(game, player, moves),
+                            [scalar(child, player) for child in children])
+                    self.assertEqual(
+                        batch_scores.score_boards(children, player),
+                        [sample_players.improved_score(child, player)
+                         for child in children])
+                game.apply_move(rng.choice(moves))
+
+    def test_batch_search_matches_scalar(self):
+        for moves in tournament_openings(4, seed=8):
+            results = []
+            for batch in (None, batch_scores.batch_improved_score):
+                player = game_agent.AlphaBetaPlayer(
+                    score_fn=sample_players.improved_score,
+                    batch_score_fn=batch, max_depth=5)
+                game = isolation.BitBoard(player, "Opponent")
+                for move in moves:
+                    game.apply_move(move)
+                results.append((player.get_move(game, lambda: float("inf")),
+                                player.nodes))
+            self.assertEqual(results[0], results[1])
+
+
+class NeighborTableTest(unittest.TestCase):
+    """Check the precomputed knight-move neighbor tables"""
+
+    def test_neighbor_tables(self):
+        for width, height in [(7, 7), (9, 9), (11, 11), (5, 8)]:
+            neighbors = isolation.isolation.knight_neighbors(width, height)
+            board = isolation.Board("Player1", "Player2", width, height)
+            for idx, cells in enumerate(neighbors):
+                r, c = idx % height, idx // height
+                expected = [(r + dr, c + dc)
+                            for dr, dc in isolation.isolation.DIRECTIONS
+                            if board.move_is_legal((r + dr, c + dc))]
+                self.assertEqual([(i % height, i // height) for i in cells],
+                                 expected)
+            self.assertIs(neighbors,
+                          isolation.isolation.knight_neighbors(width, height))
+
+    def test_scores_without_count_legal_moves(self):
+        assert_same_scores(self, [game_agent.custom_score,
+                                  game_agent.custom_score_2,
+                                  game_agent.custom_score_3], 0)
+
+
+class OpeningBookTest(unittest.TestCase):
+    """Check building, reading and playing from an opening book"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        opening_book.build_book(self.path, max_ply=2, depth=2, width=5,
+                                height=5)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_lookup(self):
+        book = opening_book.OpeningBook(self.path)
+        # the empty board and the 6 first moves distinct up to symmetry
+        self.assertEqual(len(book), 1 + 6)
+        for moves in opening_book.book_positions(2, 5, 5):
+            game = isolation.Board("Player1", "Player2", 5, 5)
+            for move in moves:
+                game.apply_move(move)
+            key, idx = opening_book.search_position(moves, 2, 5, 5)
+            _, t = canonical_form(game)
+            self.assertEqual(book.lookup(game), transform_move(
+                (idx % 5, idx // 5), inverse_transform(t, 5, 5), 5, 5))
+        for move in isolation.Board("Player1", "Player2", 5, 5).get_legal_moves():
+            game = isolation.Board("Player1", "Player2", 5, 5)
+            game.apply_move(move)
+            self.assertIn(book.lookup(game), game.get_legal_moves())
+        game.apply_move(book.lookup(game))
+        self.assertIsNone(book.lookup(game))
+        book.close()
+
+    def test_custom_player_uses_book(self):
+        player = competition_agent.CustomPlayer(data=self.path)
+        game = isolation.Board("Opponent", player, 5, 5)
+        game.apply_move((2, 2))
+
+        def time_left():
+            raise AssertionError("book moves should not be searched")
+        self.assertEqual(player.get_move(game, time_left),
+                         player.book.lookup(game))
+        player.book.close()
+
+    def test_score_without_count_legal_moves(self):
+        assert_same_scores(self, [competition_agent.custom_score], 0)
+
+
+class SymmetryTest(unittest.TestCase):
+    """Check that symmetric positions share a canonical key and that moves map
+    between the frames"""
+
+    def random_moves(self, width, height, num_moves, seed):
+        rng = random.Random(seed)
+        game = isolation.BitBoard("Player1", "Player2", width, height)
+        moves = []
+        for _ in range(num_moves):
+            move = rng.choice(game.get_legal_moves())
+            game.apply_move(move)
+            moves.append(move)
+        return moves
+
+    def test_canonical_form(self):
+        for width, height, num_transforms in [(7, 7, 8), (5, 8, 4)]:
+            self.assertEqual(len(transforms(width, height)), num_transforms)
+            for seed in range(5):
+                moves = self.random_moves(width, height, 3 + seed, seed)
+                images = []
+                for t in range(num_transforms):
+                    game = isolation.Board("Player1", "Player2", width, height)
+                    for move in moves:
+                        game.apply_move(transform_move(move, t, width, height))
+                    images.append(game)
+                key, t = canonical_form(images[0])
+                self.assertEqual(
+                    {canonical_form(game)[0] for game in images}, {key})
+                self.assertLessEqual(key, images[0].hash())
+                self.assertEqual(key, images[t].hash())
+
+                # legal moves correspond under every transform
+                for u, game in enumerate(images):
+                    self.assertEqual(
+                        sorted(transform_move(move, u, width, height)
+                               for move in images[0].get_legal_moves()),
+                        sorted(game.get_legal_moves()))
+                    v = inverse_transform(u, width, height)
+                    for move in game.get_legal_moves():
+                        self.assertEqual(transform_move(transform_move(
+                            move, v, width, height), u, width, height), move)
+
+
+class MCTSTest(unittest.TestCase):
+    """Check the Monte Carlo tree search player"""
+
+    def test_legal_moves(self):
+        random.seed(0)
+        player = game_agent.MCTSPlayer(max_playouts=200)
+        game = isolation.Board(player, "Opponent", 5, 5)
+        move = player.get_move(game, lambda: float("inf"))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player.playouts, 200)
+        game.apply_move(move)
+        game.apply_move(game.get_legal_moves()[0])
+        self.assertIn(player.get_move(game, lambda: float("inf")),
+                      game.get_legal_moves())
+
+    def test_node_limit(self):
+        player = game_agent.MCTSPlayer(timeout=0)
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        clock = isolation.NodeClock(100)
+        self.assertIn(player.get_move(game, clock), game.get_legal_moves())
+        self.assertEqual(player.playouts, 100)
+
+    def test_tree_reuse(self):
+        random.seed(0)
+        player = game_agent.MCTSPlayer(max_playouts=500)
+        game = isolation.Board(player, "Opponent", 5, 5)
+        game.apply_move(player.get_move(game, lambda: float("inf")))
+        _, child, _ = player._tree
+        reply = max(child.children, key=lambda node: node.visits)
+        visits = reply.visits
+        game.apply_move((reply.move % 5, reply.move // 5))
+        player.max_playouts = 1
+        player.get_move(game, lambda: float("inf"))
+        self.assertEqual(player._tree[0].visits, visits + 1)
+
+        # without reuse the search starts from a new root
+        player.reuse_tree = False
+        player.get_move(game, lambda: float("inf"))
+        self.assertEqual(player._tree[0].visits, 1)
+
+    def test_finds_winning_move(self):
+        def active_player_wins(game):
+            return any(not active_player_wins(game.forecast_move(move))
+                       for move in game.get_legal_moves())
+
+        rng = random.Random(0)
+        random.seed(0)
+        player = game_agent.MCTSPlayer(max_playouts=300)
+        found = 0
+        while found < 5:
+            game = isolation.Board(player, "Opponent", 5, 5)
+            while game.get_legal_moves():
+                moves = game.get_legal_moves()
+                winning = [move for move in moves
+                           if not game.forecast_move(move).get_legal_moves()]
+                if game.active_player == player and winning and \
+                        len(winning) < len(moves):
+                    found += 1
+                    move = player.get_move(game, lambda: float("inf"))
+                    self.assertFalse(
+                        active_player_wins(game.forecast_move(move)))
+                    break
+                game.apply_move(rng.choice(moves))
+
+
+class ParallelSearchTest(unittest.TestCase):
+    """Check that root splitting finds the values of the sequential search"""
+
+    def test_split_values(self):
+        for seed in range(3):
+            moves = next(tournament_openings(1, seed))
+            player = parallel_search.ParallelAlphaBetaPlayer(
+                workers=3, max_depth=4, score_fn=sample_players.improved_score)
+            game = isolation.BitBoard(player, "Opponent")
+            for move in moves:
+                game.apply_move(move)
+            legal_moves = game.get_legal_moves()
+            full, _ = parallel_search.search_root_moves(
+                game.copy(), legal_moves, float("inf"))
+            shares = [parallel_search.search_root_moves(
+                game.copy(), legal_moves[i::3], float("inf"))[0]
+                for i in range(3)]
+            self.assertEqual(len(full), 4)
+            for depth in range(4):
+                self.assertEqual(full[depth][1], max(
+                    share[depth][1] for share in shares))
+
+    def test_get_move(self):
+        player = parallel_search.ParallelAlphaBetaPlayer(
+            workers=2, max_depth=3)
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        try:
+            move = player.get_move(game, lambda: float("inf"))
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(player.depth, 3)
+            self.assertGreater(player.nodes, 0)
+            self.assertIsNone(copy.deepcopy(player)._executor)
+        finally:
+            player.close()
+
+    def test_late_worker(self):
+        player = parallel_search.ParallelAlphaBetaPlayer(
+            score_fn=sample_players.improved_score)
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        # a task that starts after its deadline returns at once
+        depths, counts = parallel_search.search_root_moves(
+            game.copy(), game.get_legal_moves(), timer() - 1.)
+        self.assertEqual(depths, [])
+        self.assertEqual(counts["nodes"], 0)
+        # without time to search, the move is not arbitrary
+        scores = {move: sample_players.improved_score(
+            game.forecast_move(move), player)
+            for move in game.get_legal_moves()}
+        move = player.get_move(game, lambda: 15.)
+        self.assertEqual(scores[move], max(scores.values()))
+        player.close()
+
+    def test_worker_table(self):
+        player = parallel_search.ParallelAlphaBetaPlayer(
+            workers=2, max_depth=3, tt=transposition.TranspositionTable(64))
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        position = parallel_search.detach_opponent(game, "Worker")
+        self.assertEqual(position.active_player, "Worker")
+        self.assertEqual(position.inactive_player, "Opponent")
+        try:
+            self.assertIn(player.get_move(game, lambda: float("inf")),
+                          game.get_legal_moves())
+            # the workers fill their own tables, not the player's
+            self.assertEqual(player.tt.stores, 0)
+        finally:
+            player.close()
+
+    def test_late_worker_moves_compared(self):
+        player = parallel_search.ParallelAlphaBetaPlayer(
+            score_fn=sample_players.improved_score)
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        scores = {move: sample_players.improved_score(
+            game.forecast_move(move), player)
+            for move in game.get_legal_moves()}
+        late, searched = max(scores, key=scores.get), min(scores,
+                                                          key=scores.get)
+        # a late move that scores better than the searched value wins
+        self.assertEqual(player.best_root_move(
+            game, [(searched, scores[late] - 1)], [late, searched]), late)
+        self.assertEqual(player.best_root_move(
+            game, [(searched, scores[late] + 1)], [late]), searched)
+
+    def test_slow_worker_and_stats(self):
+        stats = search_stats.SearchStats()
+        player = SlowShareAlphaBetaPlayer(
+            workers=2, max_depth=2, score_fn=sample_players.improved_score,
+            stats=stats)
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        legal_moves = game.get_legal_moves()
+        player.slow_move = min(legal_moves)
+        start = timer()
+        try:
+            move = player.get_move(
+                game, lambda: 500. - 1000. * (timer() - start))
+        finally:
+            player.close()
+        self.assertIn(move, legal_moves)
+        self.assertEqual(player.depth, 2)
+        # the late worker's moves keep the move from reaching max_depth
+        self.assertEqual([record["stop"] for record in stats.moves],
+                         ["timeout"])
+        self.assertEqual(stats.moves[0]["depth"], 2)
+        self.assertEqual(stats.moves[0]["nodes"], player.nodes)
+        self.assertGreater(player.nodes, 0)
+
+    def test_no_ponder(self):
+        with self.assertRaises(ValueError):
+            parallel_search.ParallelAlphaBetaPlayer(ponder=True)
+
+
+class EndgameTest(unittest.TestCase):
+    """Check separated endgames against an exhaustive search"""
+
+    def active_player_wins(self, game):
+        return any(not self.active_player_wins(game.forecast_move(move))
+                   for move in game.get_legal_moves())
+
+    def separated_positions(self, num_positions, max_open):
+        """Return move lists reaching separated 5x5 positions. """
+        rng = random.Random(0)
+        solver = endgame.EndgameSolver()
+        positions = []
+        while len(positions) < num_positions:
+            game = isolation.Board("Player1", "Player2", 5, 5)
+            moves = []
+            while game.get_legal_moves():
+                if solver.solve(game) is not None:
+                    if len(game.get_blank_spaces()) <= max_open:
+                        positions.append(moves)
+                    break
+                moves.append(rng.choice(game.get_legal_moves()))
+                game.apply_move(moves[-1])
+        return positions
+
+    def test_solve(self):
+        solver = endgame.EndgameSolver()
+        game = isolation.Board("Player1", "Player2")
+        self.assertIsNone(solver.solve(game))
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        self.assertIsNone(solver.solve(game))
+
+        for moves in self.separated_positions(30, 12):
+            game = isolation.Board("Player1", "Player2", 5, 5)
+            for move in moves:
+                game.apply_move(move)
+            move, value = solver.solve(game)
+            self.assertEqual(value > 0, self.active_player_wins(game))
+            if value > 0:
+                self.assertFalse(
+                    self.active_player_wins(game.forecast_move(move)))
+
+    def test_player_uses_solver(self):
+        moves = self.separated_positions(1, 25)[0]
+        player = game_agent.AlphaBetaPlayer(endgame=endgame.EndgameSolver())
+        if len(moves) % 2:
+            game = isolation.Board("Opponent", player, 5, 5)
+        else:
+            game = isolation.Board(player, "Opponent", 5, 5)
+        for move in moves:
+            game.apply_move(move)
+        self.assertIn(player.get_move(game, lambda: float("inf")),
+                      game.get_legal_moves())
+        self.assertEqual(player.endgame.solved, 1)
+        self.assertEqual(player.nodes, 0)
+        self.assertEqual(player.time_stats["stop"], "solved")
+
+    def test_solver_timeout(self):
+        moves = self.separated_positions(1, 25)[0]
+        game = isolation.Board("Player1", "Player2", 5, 5)
+        for move in moves:
+            game.apply_move(move)
+        solver = endgame.EndgameSolver()
+        self.assertIsNone(solver.solve(game, isolation.NodeClock(3)))
+        # the finished part of the work is kept for the next call
+        self.assertIsNotNone(solver.solve(game, lambda: float("inf")))
+
+        # the player searches the position if the solver runs out of time
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score,
+            endgame=endgame.EndgameSolver(), timeout=0)
+        game = isolation.Board(player, "Opponent", 5, 5)
+        if len(moves) % 2:
+            game = isolation.Board("Opponent", player, 5, 5)
+        for move in moves:
+            game.apply_move(move)
+        self.assertIn(player.get_move(game, isolation.NodeClock(8)),
+                      game.get_legal_moves())
+        self.assertEqual(player.endgame.solved, 0)
+        self.assertGreater(player.nodes, 0)
+
+
+class PonderTest(unittest.TestCase):
+    """Check searching on the opponent's time"""
+
+    def test_ponder_fills_table(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, max_depth=3,
+            tt=transposition.TranspositionTable(), ponder=True)
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        move = player.get_move(game, lambda: float("inf"))
+        counters = (player.nodes, player.leaf_evals, player.cutoffs,
+                    player.root_value, player._pv_move)
+        self.assertIsNotNone(player._ponder_thread)
+        self.assertIsNone(copy.deepcopy(player)._ponder_thread)
+        player._ponder_thread.join()
+        self.assertGreater(player.ponder_nodes, 0)
+        # pondering does not change the statistics of the last move
+        self.assertEqual((player.nodes, player.leaf_evals, player.cutoffs,
+                          player.root_value, player._pv_move), counters)
+
+        game.apply_move(move)
+        reply = player._ponder_reply
+        game.apply_move(reply)
+        player.opponent_moved(reply)
+        self.assertEqual(player.ponder_hits, 1)
+        self.assertIsNone(player._ponder_thread)
+        entry = player.tt.probe(game.hash() ^ player._seat_key)
+        self.assertEqual(entry.depth, 3)
+
+    def test_play(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score,
+            tt=transposition.TranspositionTable(), ponder=True,
+            ponder_time=50.)
+        opponent = sample_players.GreedyPlayer()
+        game = isolation.Board(player, opponent, 5, 5)
+        winner, _, termination = game.play(time_limit=50)
+        self.assertNotEqual(termination, "timeout")
+        self.assertIsNone(player._ponder_thread)
+
+    def test_stop_on_forfeit(self):
+        class Forfeit:
+            def get_move(self, game, time_left):
+                return (-1, -1)
+
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score,
+            tt=transposition.TranspositionTable(), ponder=True,
+            ponder_time=60000.)
+        game = isolation.Board(player, Forfeit())
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        winner, _, termination = game.play(time_limit=50)
+        self.assertIs(winner, player)
+        self.assertEqual(termination, "forfeit")
+        self.assertIsNone(player._ponder_thread)
+
+    def test_ponder_after_timeout(self):
+        # the first iteration times out, so alphabeta never runs before the
+        # reply is predicted from the transposition table
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score,
+            tt=transposition.TranspositionTable(), ponder=True,
+            ponder_time=50.)
+        game = isolation.Board("Opponent", player)
+        game.apply_move((3, 3))
+        move = player.get_move(game, lambda: 0.)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player._seat_key, game_agent.SEAT_KEY)
+        self.assertIsNotNone(player._ponder_thread)
+        player.stop_pondering()
+        self.assertGreater(player.ponder_nodes, 0)
+
+
+class WindowSearchTest(unittest.TestCase):
+    """Check that null-window and aspiration searches find the values of the
+    full-window search"""
+
+    def test_root_values(self):
+        configs = [{}, {"pvs": True}, {"aspiration": 0.5},
+                   {"pvs": True, "aspiration": 1., "aspiration_widen": 2.}]
+        for moves in tournament_openings(5, 0):
+            for depth in range(1, 6):
+                values = []
+                for config in configs:
+                    player = game_agent.AlphaBetaPlayer(
+                        score_fn=sample_players.improved_score,
+                        max_depth=depth,
+                        ordering=move_ordering.MoveOrdering(), **config)
+                    game = isolation.BitBoard(player, "Opponent")
+                    for move in moves:
+                        game.apply_move(move)
+                    player.get_move(game, lambda: float("inf"))
+                    values.append(player.root_value)
+                self.assertEqual(len(set(values)), 1)
+
+    def test_next_float(self):
+        inf = float("inf")
+        self.assertEqual(game_agent.next_float(1.), 1. + 2. ** -52)
+        self.assertEqual(game_agent.next_float(1., False), 1. - 2. ** -53)
+        self.assertEqual(game_agent.next_float(-1.), -1. + 2. ** -53)
+        self.assertEqual(game_agent.next_float(0.), 5e-324)
+        self.assertEqual(game_agent.next_float(0., False), -5e-324)
+        self.assertEqual(game_agent.next_float(-inf), -sys.float_info.max)
+        self.assertEqual(game_agent.next_float(inf), inf)
+        self.assertEqual(game_agent.next_float(inf, False),
+                         sys.float_info.max)
+
+
+class TimeControlTest(unittest.TestCase):
+    """Check the iterative deepening controller under tight time limits"""
+
+    def make_game(self, player, seed=0):
+        game = isolation.BitBoard(player, "Opponent")
+        for move in next(tournament_openings(1, seed)):
+            game.apply_move(move)
+        return game
+
+    def test_minimax_timeout_returns_legal_move(self):
+        player = game_agent.MinimaxPlayer()
+        game = self.make_game(player)
+        self.assertIn(player.get_move(game, lambda: 0.),
+                      game.get_legal_moves())
+        player = game_agent.MinimaxPlayer(search_depth=3, timeout=0)
+        game = self.make_game(player)
+        self.assertIn(player.get_move(game, isolation.NodeClock(40)),
+                      game.get_legal_moves())
+        self.assertEqual(player.depth, 0)
+        player.get_move(game, lambda: float("inf"))
+        self.assertEqual(player.depth, 3)
+
+    def test_partial_iteration(self):
+        partial = 0
+        for node_limit in range(20, 400, 7):
+            player = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score, timeout=0,
+                ordering=move_ordering.MoveOrdering())
+            game = self.make_game(player)
+            move = player.get_move(game, isolation.NodeClock(node_limit))
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(player.time_stats["stop"], "timeout")
+            partial += player.time_stats["partial"]
+        self.assertGreater(partial, 0)
+
+    def test_stop_early(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, timeout=0,
+            stop_early=True)
+        game = self.make_game(player)
+        player.get_move(game, isolation.NodeClock(3000))
+        self.assertEqual(player.time_stats["stop"], "predicted")
+        self.assertLess(player.time_stats["used"], 3000)
+        # with a node clock, every pass takes a little more than its nodes
+        for stats in player.iteration_stats:
+            self.assertGreater(stats["time"], stats["nodes"])
+
+    def test_solved(self):
+        player = game_agent.AlphaBetaPlayer(max_depth=30)
+        game = isolation.Board(player, "Opponent", 3, 3)
+        for move in [(0, 0), (2, 2), (1, 2)]:
+            game.apply_move(move)
+        game.apply_move((0, 1))
+        player.get_move(game, lambda: float("inf"))
+        self.assertEqual(player.time_stats["stop"], "solved")
+        self.assertLess(len(player.iteration_stats), 30)
+
+
+class GameRecordTest(unittest.TestCase):
+    """Check that recorded tournament games replay to the recorded result"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_record_round(self):
+        cpu_agent = tournament.Agent(sample_players.RandomPlayer(), "Random")
+        test_agents = [tournament.Agent(sample_players.GreedyPlayer(),
+                                        "Greedy")]
+        for _ in range(2):
+            # the second writer appends to the file of the first
+            with game_record.GameRecordWriter(self.path) as writer:
+                wins = {agent.player: 0 for agent in [cpu_agent] + test_agents}
+                tournament.play_round(cpu_agent, test_agents, wins, 2,
+                                      seed=3, record=writer)
+
+        games = list(game_record.read_games(self.path))
+        self.assertEqual(len(games), 8)
+        self.assertEqual(games[:4], games[4:])
+        for record in games:
+            self.assertIn(record.agents, [("Random", "Greedy"),
+                                          ("Greedy", "Random")])
+            game = isolation.Board("Player1", "Player2")
+            for move in record.moves:
+                self.assertIn(move, game.get_legal_moves())
+                game.apply_move(move)
+            self.assertEqual(record.termination, "illegal move")
+            self.assertEqual(record.winner, 1 - len(record.moves) % 2)
+            self.assertFalse(game.get_legal_moves())
+
+        # a record cut short by a concurrent writer is skipped
+        with open(self.path, "ab") as f:
+            f.write(game_record.encode_game([(0, 0), (1, 2)], 0, "timeout", 1,
+                                            ("A", "B"), 7)[:-1])
+        self.assertEqual(len(list(game_record.read_games(self.path))), 8)
+        with self.assertRaises(ValueError):
+            game_record.GameRecordWriter(self.path, 5, 5)
+
+
+class LinearScoreTest(unittest.TestCase):
+    """Check the features and the linear heuristic used for tuning"""
+
+    def test_features(self):
+        rng = random.Random(0)
+        improved = features.LinearScore([1., -1., 0., 0., 0.])
+        for _ in range(20):
+            game = isolation.Board("Player1", "Player2")
+            self.assertEqual(features.position_features(game, "Player1"),
+                             [49., 49., 0., 49., 49.])
+            for _ in range(rng.randrange(2, 30)):
+                if not game.get_legal_moves():
+                    break
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            for player in ("Player1", "Player2"):
+                values = features.position_features(game, player)
+                self.assertEqual(values[0], game.count_legal_moves(player))
+                self.assertEqual(values[1], game.count_legal_moves(
+                    game.get_opponent(player)))
+                self.assertEqual(values[4], len(game.get_blank_spaces()))
+                self.assertEqual(improved(game, player),
+                                 sample_players.improved_score(game, player))
+
+    def test_save_load(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            score = features.LinearScore([1., -2., .5, .25, 0.])
+            score.save(path)
+            self.assertEqual(features.LinearScore.load(path).weights,
+                             score.weights)
+        finally:
+            os.remove(path)
+        with self.assertRaises(ValueError):
+            features.LinearScore([1., 2.])
+
+    @unittest.skipIf(tune is None, "requires NumPy")
+    def test_intercept_not_penalized(self):
+        # shifting a feature only changes the intercept, so the weights do
+        # not change unless the intercept is penalized
+        rng = np.random.RandomState(0)
+        values = rng.normal(size=(200, 2))
+        won = values @ [1., -.5] + rng.normal(size=200) > 0
+        shifted = values + [40., -25.]
+        for fit in (tune.fit_least_squares, tune.fit_logistic):
+            weights = fit(values, won, l2=.1)
+            self.assertTrue(np.allclose(fit(shifted, won, l2=.1),
+                                             weights))
+            self.assertTrue(np.all(np.abs(weights) <
+                                   np.abs(fit(values, won, l2=0.))))
+
+
+class SearchStatsTest(unittest.TestCase):
+    """Check the per-move search records and their tournament summary"""
+
+    def test_alphabeta_records(self):
+        stats = search_stats.SearchStats()
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, max_depth=4,
+            tt=transposition.TranspositionTable(), stats=stats)
+        game = isolation.Board(player, "Opponent")
+        for move in next(tournament_openings(1, 2)):
+            game.apply_move(move)
+        for _ in range(3):
+            move = player.get_move(game, lambda: float("inf"))
+            game.apply_move(move)
+            game.apply_move(game.get_legal_moves()[0])
+
+        self.assertEqual(len(stats.moves), 3)
+        for record in stats.moves:
+            self.assertEqual(record["depth"], 4)
+            self.assertEqual(record["stop"], "max_depth")
+            self.assertEqual(sum(i["nodes"] for i in record["iterations"]),
+                             record["nodes"])
+            self.assertLess(record["leaf_evals"], record["nodes"])
+            self.assertGreater(record["cutoffs"], 0)
+            self.assertLessEqual(record["tt_hits"], record["tt_probes"])
+        self.assertEqual([record["ply"] for record in stats.moves],
+                         [2, 4, 6])
+
+        summary = search_stats.summarize(stats.moves)
+        self.assertEqual(summary["moves"], 3)
+        self.assertEqual(summary["max_depth"], 4)
+        self.assertGreater(summary["tt_hit_rate"], 0)
+
+    def test_minimax_records(self):
+        stats = search_stats.SearchStats()
+        player = game_agent.MinimaxPlayer(search_depth=2, stats=stats)
+        game = isolation.Board(player, "Opponent")
+        for move in next(tournament_openings(1, 2)):
+            game.apply_move(move)
+        player.get_move(game, lambda: float("inf"))
+        player.get_move(game, lambda: 0.)
+        complete, timed_out = stats.moves
+        self.assertEqual(complete["depth"], 2)
+        self.assertEqual(complete["nodes"], 1 + sum(
+            1 + len(game.forecast_move(move).get_legal_moves())
+            for move in game.get_legal_moves()))
+        self.assertEqual(timed_out["depth"], 0)
+        self.assertEqual(timed_out["stop"], "timeout")
+
+    def test_tournament_records(self):
+        cpu_agent = tournament.Agent(sample_players.RandomPlayer(), "Random")
+        test_agents = [tournament.Agent(game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, max_depth=2,
+            stats=search_stats.SearchStats()), "AB_Improved")]
+        wins = {agent.player: 0 for agent in [cpu_agent] + test_agents}
+        records = []
+        tournament.play_round(cpu_agent, test_agents, wins, 1, seed=4,
+                              stats=records)
+        self.assertTrue(records)
+        self.assertEqual({record["agent"] for record in records},
+                         {"AB_Improved"})
+        # the agents of the round are copied, so their collectors stay empty
+        self.assertEqual(test_agents[0].player.stats.moves, [])
+
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            with open(path, "w") as f:
+                search_stats.write_jsonl(f, records, run=1)
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+        finally:
+            os.remove(path)
+        self.assertEqual(len(lines), len(records))
+        self.assertEqual(lines[0]["run"], 1)
+        self.assertEqual(lines[0]["nodes"], records[0]["nodes"])
+
+
+class CachedScoreTest(unittest.TestCase):
+    """Check that cached heuristic values match the wrapped heuristic"""
+
+    def test_values(self):
+        rng = random.Random(1)
+        cached = score_cache.CachedScore(sample_players.improved_score)
+        for _ in range(30):
+            game = isolation.Board("Player1", "Player2")
+            for _ in range(rng.randrange(2, 30)):
+                if not game.get_legal_moves():
+                    break
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            for _ in range(2):
+                for player in ("Player1", "Player2"):
+                    self.assertEqual(cached(game, player),
+                                     sample_players.improved_score(game,
+                                                                   player))
+        self.assertEqual(cached.hits, cached.misses)
+        self.assertEqual(cached.hit_rate(), .5)
+
+    def test_lru_eviction(self):
+        calls = []
+
+        def score(game, player):
+            calls.append(game.hash())
+            return float(len(calls))
+
+        cached = score_cache.CachedScore(score, max_entries=2)
+        games = [isolation.Board("Player1", "Player2")]
+        for move in [(0, 0), (3, 3)]:
+            games.append(games[-1].forecast_move(move))
+        cached(games[0], "Player1")
+        cached(games[1], "Player1")
+        cached(games[0], "Player1")  # games[1] is now least recently used
+        cached(games[2], "Player1")
+        self.assertEqual(len(cached), 2)
+        self.assertEqual(cached(games[0], "Player1"), 1.)
+        self.assertEqual(cached(games[1], "Player1"), 4.)
+        self.assertEqual(len(calls), 4)
+
+    def test_search_values(self):
+        for seed in range(3):
+            values = []
+            for score_fn in (game_agent.custom_score,
+                             score_cache.CachedScore(
+                                 game_agent.custom_score)):
+                player = game_agent.AlphaBetaPlayer(score_fn=score_fn)
+                player.time_left = lambda: float("inf")
+                game = isolation.Board(player, "Opponent")
+                for move in next(tournament_openings(1, seed)):
+                    game.apply_move(move)
+                for depth in range(1, 5):
+                    player.alphabeta(game, depth)
+                    values.append(player.root_value)
+            self.assertEqual(values[:4], values[4:])
+
+
+class RegressionBenchmarkTest(unittest.TestCase):
+    """Check the known perft counts and search values of the regression
+    benchmark positions"""
+
+    def test_positions(self):
+        for _, engine in board_benchmark.ENGINES:
+            for position in regression_benchmark.POSITIONS:
+                game = board_benchmark.build_game(engine, position.moves)
+                self.assertEqual(regression_benchmark.perft_in_place(
+                    game, position.perft_depth), position.perft_count)
+                self.assertEqual(regression_benchmark.perft(game, 4),
+                                 regression_benchmark.perft_in_place(game, 4))
+                _, move, value = regression_benchmark.bench_search(
+                    engine, position, 0)
+                self.assertEqual(value, position.search_value)
+                self.assertIn(move, game.get_legal_moves())
+
+
+class SelfPlayTest(unittest.TestCase):
+    """Check that headless self-play writes legal, labeled positions"""
+
+    def setUp(self):
+        self.paths = []
+        for _ in range(2):
+            handle, path = tempfile.mkstemp()
+            os.close(handle)
+            os.remove(path)
+            self.paths.append(path)
+
+    def tearDown(self):
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_positions(self):
+        agents = ["Greedy_Improved", "Random"]
+        for _ in range(2):
+            positions, wins, forfeits = selfplay.generate(
+                self.paths[0], agents, 5, 1, 50, 2, seed=1, chunk_rows=40)
+            self.assertEqual(forfeits, 0)
+        chunks = list(selfplay.read_chunks(self.paths[0]))
+        self.assertGreater(len(chunks), 2)
+        rows = [dict(zip(chunk, row)) for chunk in chunks
+                for row in zip(*chunk.values())]
+        self.assertEqual(rows[-1]["game"], 9)
+        self.assertEqual(len(rows), 2 * positions)
+        with selfplay.PositionWriter(self.paths[0]) as writer:
+            self.assertEqual(writer.games, 10)
+
+        games = 0
+        for row in rows:
+            if row["ply"] == 0:
+                game = isolation.Board("Player1", "Player2")
+            self.assertEqual(row["player_1"], -1 if row["ply"] < 1 else
+                             game._board_state[-1])
+            blocked = sum(1 << i for i, cell in
+                          enumerate(game._board_state[:-3]) if cell)
+            self.assertEqual(row["blocked"], blocked)
+            if row["move"] == selfplay.NO_MOVE:
+                self.assertFalse(game.get_legal_moves())
+                self.assertEqual(row["winner"], 1 - row["ply"] % 2)
+                games += 1
+            else:
+                move = (row["move"] % 7, row["move"] // 7)
+                self.assertIn(move, game.get_legal_moves())
+                game.apply_move(move)
+        self.assertEqual(games, 10)
+
+    def test_parallel_matches_serial(self):
+        for path, workers in zip(self.paths, (1, 2)):
+            selfplay.generate(path, ["AB_Improved"], 4, workers, 100, 2,
+                              seed=3)
+        data = []
+        for path in self.paths:
+            with open(path, "rb") as f:
+                data.append(f.read())
+        self.assertEqual(data[0], data[1])
+
+
+@unittest.skipIf(learned_score is None, "requires NumPy")
+class LearnedScoreModelTest(unittest.TestCase):
+    """Check that batched and single evaluations of the learned heuristic
+    agree"""
+
+    def random_games(self, num_games, seed):
+        rng = random.Random(seed)
+        for _ in range(num_games):
+            game = isolation.Board("Player1", "Player2")
+            for _ in range(rng.randrange(0, 35)):
+                if not game.get_legal_moves():
+                    break
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            yield game
+
+    def test_batch_matches_scalar(self):
+        for hidden in ([], [16]):
+            model = learned_score.LearnedScore.random(hidden, seed=1)
+            for game in self.random_games(40, 2):
+                moves = game.get_legal_moves()
+                for player in ("Player1", "Player2"):
+                    scores = [model(game.forecast_move(move), player)
+                              for move in moves]
+                    for batch, single in zip(model.batch(game, player, moves),
+                                             scores):
+                        if math.isinf(single):
+                            self.assertEqual(batch, single)
+                        else:
+                            self.assertAlmostEqual(batch, single, places=4)
+
+    def test_terminal_scores(self):
+        model = learned_score.LearnedScore.random(seed=1)
+        for game in self.random_games(40, 3):
+            for player in ("Player1", "Player2"):
+                expected = game.utility(player)
+                if expected:
+                    self.assertEqual(model(game, player), expected)
+
+    def test_save_load_search(self):
+        handle, path = tempfile.mkstemp(suffix=".npz")
+        os.close(handle)
+        try:
+            model = learned_score.LearnedScore.random(seed=4)
+            model.save(path)
+            loaded = learned_score.LearnedScore.load(path)
+        finally:
+            os.remove(path)
+        game = next(self.random_games(1, 5))
+        self.assertEqual(loaded(game, "Player1"), model(game, "Player1"))
+
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=loaded, batch_score_fn=loaded.batch, max_depth=3)
+        game = isolation.Board(player, "Opponent")
+        for move in next(tournament_openings(1, 6)):
+            game.apply_move(move)
+        self.assertIn(player.get_move(game, lambda: float("inf")),
+                      game.get_legal_moves())
+
+
 if __name__ == '__main__':
     unittest.main()
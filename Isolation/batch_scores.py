@@ -0,0 +1,168 @@
+"""This file contains batch versions of the mobility heuristics in
+`sample_players.py` and `game_agent.py`.
+
+The scalar heuristics score one position at a time and call
+`get_legal_moves()` two or more times for it, so scoring every child of a
+node means copying the board for each child and generating the moves of both
+players again. The functions here score all children of a node in one call
+instead: the open cells of the parent are collected once, and the mobility of
+both players in each child is counted from a precomputed table of knight
+neighbors, adjusted for the single cell the move blocks.
+
+The batch functions return exactly the values of the scalar heuristics, which
+are kept as the reference implementations. They can be passed to
+`AlphaBetaPlayer` as `batch_score_fn` to score the frontier of the search in
+one call per node.
+"""
+from isolation.isolation import cell_coordinates, knight_neighbors
+
+_NEIGHBORS = {}
+
+
+def neighbor_cells(width, height):
+    """Return a dict mapping every (row, column) cell of a board of the given
+    size to the tuple of cells a knight can move to from it, built from
+    `isolation.isolation.knight_neighbors` and cached per board size.
+    """
+    neighbors = _NEIGHBORS.get((width, height))
+    if neighbors is None:
+        coords = cell_coordinates(width, height)
+        neighbors = _NEIGHBORS[(width, height)] = {
+            coords[idx]: tuple(coords[i] for i in cells)
+            for idx, cells in enumerate(knight_neighbors(width, height))}
+    return neighbors
+
+
+def child_mobility(game, moves):
+    """Count the legal moves of both players in every child of a node.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The parent position.
+
+    moves : list<(int, int)>
+        Legal moves of the active player in `game`.
+
+    Returns
+    -------
+    (list<int>, list<int>)
+        For each move, the number of legal moves of the player that made the
+        move and of its opponent (the active player of the child).
+    """
+    neighbors = neighbor_cells(game.width, game.height)
+    blank = set(game.get_blank_spaces())
+    opp_loc = game.get_player_location(game.inactive_player)
+    if opp_loc is None:
+        opp_cells = blank
+    else:
+        opp_cells = {cell for cell in neighbors[opp_loc] if cell in blank}
+    opp_base = len(opp_cells)
+    mover_counts = [sum(cell in blank for cell in neighbors[move])
+                    for move in moves]
+    opp_counts = [opp_base - (move in opp_cells) for move in moves]
+    return mover_counts, opp_counts
+
+
+def batch_mobility_score(game, player, moves, own_weight=1., opp_weight=1.):
+    """Score every child of `game` from the point of view of `player` as
+    `own_weight * own_moves - opp_weight * opp_moves`, with +/-inf for won and
+    lost positions.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The parent position.
+
+    player : object
+        One of the objects registered by the game object as a valid player.
+
+    moves : list<(int, int)>
+        Legal moves of the active player in `game`.
+
+    Returns
+    -------
+    list<float>
+        The heuristic value of the child reached by each move.
+    """
+    mover_counts, opp_counts = child_mobility(game, moves)
+    is_mover = player == game.active_player
+    scores = []
+    for mover_moves, opp_moves in zip(mover_counts, opp_counts):
+        if not opp_moves:
+            # the active player of the child is out of moves
+            scores.append(float("inf") if is_mover else float("-inf"))
+        elif is_mover:
+            scores.append(own_weight * mover_moves - opp_weight * opp_moves)
+        else:
+            scores.append(own_weight * opp_moves - opp_weight * mover_moves)
+    return scores
+
+
+def batch_open_move_score(game, player, moves):
+    """Batch version of `sample_players.open_move_score`. """
+    return batch_mobility_score(game, player, moves, 1., 0.)
+
+
+def batch_improved_score(game, player, moves):
+    """Batch version of `sample_players.improved_score` and
+    `game_agent.custom_score`.
+    """
+    return batch_mobility_score(game, player, moves, 1., 1.)
+
+
+def batch_custom_score_2(game, player, moves):
+    """Batch version of `game_agent.custom_score_2`. """
+    return batch_mobility_score(game, player, moves, 1., 2.)
+
+
+def batch_custom_score_3(game, player, moves):
+    """Batch version of `game_agent.custom_score_3`. """
+    return batch_mobility_score(game, player, moves, 1., 3.)
+
+
+def batch_center_score(game, player, moves):
+    """Batch version of `sample_players.center_score`. """
+    _, opp_counts = child_mobility(game, moves)
+    w, h = game.width / 2., game.height / 2.
+    is_mover = player == game.active_player
+    if not is_mover:
+        y, x = game.get_player_location(player)
+    scores = []
+    for move, opp_moves in zip(moves, opp_counts):
+        if not opp_moves:
+            scores.append(float("inf") if is_mover else float("-inf"))
+            continue
+        if is_mover:
+            y, x = move
+        scores.append(float((h - y)**2 + (w - x)**2))
+    return scores
+
+
+def score_boards(games, player, own_weight=1., opp_weight=1.):
+    """Score a list of positions from the point of view of `player` as
+    `own_weight * own_moves - opp_weight * opp_moves`, with +/-inf for won and
+    lost positions.
+    """
+    scores = []
+    for game in games:
+        neighbors = neighbor_cells(game.width, game.height)
+        blank = set(game.get_blank_spaces())
+        counts = []
+        for p in (game.active_player, game.inactive_player):
+            loc = game.get_player_location(p)
+            if loc is None:
+                counts.append(len(blank))
+            else:
+                counts.append(sum(cell in blank for cell in neighbors[loc]))
+        active_moves, inactive_moves = counts
+        if not active_moves:
+            scores.append(float("-inf") if player == game.active_player
+                          else float("inf"))
+        elif player == game.active_player:
+            scores.append(own_weight * active_moves -
+                          opp_weight * inactive_moves)
+        else:
+            scores.append(own_weight * inactive_moves -
+                          opp_weight * active_moves)
+    return scores
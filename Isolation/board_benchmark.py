@@ -0,0 +1,124 @@
+"""Compare the move generation speed of the list-based `isolation.Board` with
+the bitmask-based `isolation.BitBoard`.
+
+Both engines are given the same set of random opening positions.  For each
+position the script walks the full game tree to a fixed depth using
+`get_legal_moves` and `forecast_move`, then runs a fixed-depth alpha-beta
+search with `AlphaBetaPlayer`, and reports the number of nodes visited per
+second by each engine.
+"""
+import argparse
+import random
+
+from timeit import default_timer as timer
+
+from isolation import Board, BitBoard
+from sample_players import improved_score
+from game_agent import AlphaBetaPlayer
+
+ENGINES = [("Board", Board), ("BitBoard", BitBoard)]
+
+
+class NodeCounter:
+    """A `time_left` replacement that never expires and counts how many times
+    the search asked for the time, which the agents do once per node.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return float("inf")
+
+
+def make_positions(num_positions, num_plies, seed):
+    """Return a list of random move sequences of `num_plies` moves each that
+    can be replayed on any board engine.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = Board("Player1", "Player2")
+        moves = []
+        for _ in range(num_plies):
+            legal_moves = sorted(game.get_legal_moves())
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            game.apply_move(move)
+            moves.append(move)
+        if len(moves) == num_plies and game.get_legal_moves():
+            positions.append(moves)
+    return positions
+
+
+def build_game(engine, moves, player_1="Player1", player_2="Player2"):
+    game = engine(player_1, player_2)
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+def walk(game, depth):
+    """Count the nodes in the game tree below `game` to the given depth. """
+    if depth == 0:
+        return 1
+    nodes = 1
+    for move in game.get_legal_moves():
+        nodes += walk(game.forecast_move(move), depth - 1)
+    return nodes
+
+
+def bench_walk(engine, positions, depth):
+    nodes = 0
+    start = timer()
+    for moves in positions:
+        nodes += walk(build_game(engine, moves), depth)
+    return nodes, timer() - start
+
+
+def bench_search(engine, positions, depth):
+    nodes = 0
+    start = timer()
+    for moves in positions:
+        player = AlphaBetaPlayer(search_depth=depth, score_fn=improved_score)
+        game = build_game(engine, moves, player, "Opponent")
+        if game.active_player != player:
+            game = build_game(engine, moves, "Opponent", player)
+        player.time_left = NodeCounter()
+        player.alphabeta(game, depth)
+        nodes += player.time_left.calls
+    return nodes, timer() - start
+
+
+def main(args):
+    positions = make_positions(args.positions, args.plies, args.seed)
+
+    print("{:^12}{:^12}{:^14}{:^14}".format("Benchmark", "Engine", "Nodes",
+                                           "Nodes/sec"))
+    print("-" * 52)
+    for name, bench, depth in [("walk", bench_walk, args.walk_depth),
+                               ("alphabeta", bench_search, args.search_depth)]:
+        baseline = None
+        for engine_name, engine in ENGINES:
+            nodes, elapsed = bench(engine, positions, depth)
+            rate = nodes / elapsed
+            baseline = baseline or rate
+            print("{:^12}{:^12}{:^14d}{:^14.0f}({:.2f}x)".format(
+                name, engine_name, nodes, rate, rate / baseline))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--positions', type=int, default=20,
+                        help="Number of random opening positions to search")
+    parser.add_argument('--plies', type=int, default=6,
+                        help="Number of random moves played in each position")
+    parser.add_argument('--walk-depth', type=int, default=4,
+                        help="Depth of the exhaustive tree walk")
+    parser.add_argument('--search-depth', type=int, default=5,
+                        help="Depth of the fixed-depth alpha-beta search")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed used to generate the positions")
+    main(parser.parse_args())
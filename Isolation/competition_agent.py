@@ -6,6 +6,12 @@ champions) in a tournament.
 """
 import random
 
+from endgame import EndgameSolver
+from game_agent import AlphaBetaPlayer, count_moves
+from move_ordering import MoveOrdering
+from opening_book import OpeningBook
+from transposition import TranspositionTable
+
 
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
@@ -33,10 +39,18 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    raise NotImplementedError
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
 
+    my_moves = count_moves(game, player)
+    opp_moves = count_moves(game, game.get_opponent(player))
+    return float(my_moves - 2 * opp_moves)
 
-class CustomPlayer:
+
+class CustomPlayer(AlphaBetaPlayer):
     """Game-playing agent to use in the optional player vs player Isolation
     competition.
 
@@ -49,10 +63,16 @@ class CustomPlayer:
         COMPETITION.  IT IS NOT REQUIRED FOR THE ISOLATION PROJECT REVIEW.
     **************************************************************************
 
+    The agent plays the first plies of the game from an opening book (see
+    `opening_book.py`) and searches every later position with iterative
+    deepening alpha-beta using a transposition table and move ordering. Once
+    the players are separated, the endgame is solved exactly.
+
     Parameters
     ----------
-    data : string
-        The name of the search method to use in get_move().
+    data : string (optional)
+        The path of an opening book file built by `opening_book.py`. If None,
+        every move is searched.
 
     timeout : float (optional)
         Time remaining (in milliseconds) when search is aborted.  Note that
@@ -62,9 +82,10 @@ class CustomPlayer:
     """
 
     def __init__(self, data=None, timeout=1.):
-        self.score = custom_score
-        self.time_left = None
-        self.TIMER_THRESHOLD = timeout
+        super().__init__(score_fn=custom_score, timeout=timeout,
+                         tt=TranspositionTable(), ordering=MoveOrdering(),
+                         endgame=EndgameSolver())
+        self.book = OpeningBook(data) if data is not None else None
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -93,5 +114,8 @@ class CustomPlayer:
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        # OPTIONAL: Finish this function!
-        raise NotImplementedError
+        if self.book is not None:
+            move = self.book.lookup(game)
+            if move is not None and move in game.get_legal_moves():
+                return move
+        return super().get_move(game, time_left)
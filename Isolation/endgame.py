@@ -0,0 +1,162 @@
+"""This file contains an exact solver for separated Isolation endgames.
+
+Once no open cell can be reached by both players, the players can no longer
+block each other and the game is decided by which of them has the longer
+knight path through its own region of the board: the player to move wins if
+and only if its longest path is strictly longer than its opponent's.
+
+Regions are found by flood fill over the knight-move graph from each
+player's cell, using the masks of `isolation.bitboard.knight_masks`. Longest
+paths are found by depth-first search over (cell, open cells) states with
+memoization, which is exact but exponential in the size of the region, so
+only regions up to `max_cells` open cells are solved, and the search gives
+up when the clock passed to `EndgameSolver.solve` runs out.
+"""
+from isolation.bitboard import knight_masks, popcount
+
+
+def open_mask(game):
+    """Return the bitmask of the open cells of `game`. """
+    mask = 0
+    for r, c in game.get_blank_spaces():
+        mask |= 1 << (r + c * game.height)
+    return mask
+
+
+def region_mask(masks, cell, open_cells):
+    """Return the bitmask of the open cells reachable by a knight on `cell`
+    through open cells.
+    """
+    region = 0
+    frontier = masks[cell] & open_cells
+    while frontier:
+        region |= frontier
+        reached = 0
+        while frontier:
+            bit = frontier & -frontier
+            reached |= masks[bit.bit_length() - 1]
+            frontier ^= bit
+        frontier = reached & open_cells & ~region
+    return region
+
+
+class OutOfTime(Exception):
+    """Raised by `EndgameSolver.longest_path` when the clock runs out. """
+
+
+class EndgameSolver:
+    """Detect positions in which the players are in separate regions of the
+    board and play them perfectly.
+
+    Longest path results are memoized across calls, so the positions of one
+    endgame reuse the work done for the earlier ones.
+
+    Parameters
+    ----------
+    max_cells : int (optional)
+        The largest region (in open cells) that is solved exactly.
+
+    max_entries : int (optional)
+        The memo is cleared when it grows past this many entries.
+
+    Attributes
+    ----------
+    solved : int
+        The number of positions solved by `solve`.
+    """
+
+    def __init__(self, max_cells=20, max_entries=1 << 20):
+        self.max_cells = max_cells
+        self.max_entries = max_entries
+        self._memo = {}
+        self.solved = 0
+        self._time_left = None
+        self._threshold = 0.
+
+    def clear(self):
+        """Empty the memo and reset the statistics. """
+        self._memo = {}
+        self.solved = 0
+
+    def longest_path(self, masks, cell, open_cells):
+        """Return the number of moves in the longest knight path from `cell`
+        through `open_cells`, and the first cell of such a path (or None).
+
+        Raises `OutOfTime` if the clock given to `solve` runs out. Only
+        finished results are memoized, so a later call resumes the work.
+        """
+        key = (cell, open_cells)
+        result = self._memo.get(key)
+        if result is not None:
+            return result
+        if (self._time_left is not None and
+                self._time_left() < self._threshold):
+            raise OutOfTime()
+        best = (0, None)
+        limit = popcount(open_cells)
+        moves = masks[cell] & open_cells
+        while moves:
+            bit = moves & -moves
+            moves ^= bit
+            target = bit.bit_length() - 1
+            length = 1 + self.longest_path(masks, target,
+                                           open_cells ^ bit)[0]
+            if length > best[0]:
+                best = (length, target)
+                if length == limit:
+                    # every open cell is on the path
+                    break
+        if len(self._memo) >= self.max_entries:
+            self._memo = {}
+        self._memo[key] = best
+        return best
+
+    def solve(self, game, time_left=None, threshold=0.):
+        """Solve `game` if the players are in separate regions small enough
+        to search.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The position to solve.
+
+        time_left : callable (optional)
+            The clock of the move, read once for every longest path state
+            that is not memoized (like the `time_left` of a search).
+
+        threshold : float (optional)
+            The search gives up when `time_left()` falls below this value.
+
+        Returns
+        -------
+        ((int, int), float) or None
+            The best move of the active player and the value of the position
+            for the active player (+inf or -inf), or None if the position is
+            not a separated endgame, a region is larger than `max_cells` or
+            the clock ran out. The move is (-1, -1) if the active player has
+            no legal moves.
+        """
+        locs = [game.get_player_location(player)
+                for player in (game.active_player, game.inactive_player)]
+        if None in locs:
+            return None
+        masks = knight_masks(game.width, game.height)
+        cells = [r + c * game.height for r, c in locs]
+        open_cells = open_mask(game)
+        regions = [region_mask(masks, cell, open_cells) for cell in cells]
+        if regions[0] & regions[1] or any(
+                popcount(region) > self.max_cells for region in regions):
+            return None
+
+        self._time_left, self._threshold = time_left, threshold
+        try:
+            own, target = self.longest_path(masks, cells[0], regions[0])
+            opp, _ = self.longest_path(masks, cells[1], regions[1])
+        except OutOfTime:
+            return None
+        finally:
+            self._time_left = None
+        self.solved += 1
+        move = (-1, -1) if target is None else (target % game.height,
+                                                 target // game.height)
+        return move, float("inf") if own > opp else float("-inf")
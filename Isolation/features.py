@@ -0,0 +1,98 @@
+"""Position features and a linear evaluation function for Isolation.
+
+`custom_score`, `custom_score_2` and `custom_score_3` are linear functions of
+the mobility of the two players with hand-picked weights. `LinearScore`
+generalizes them to a weighted sum of the features below, with weights that
+can be fitted to self-play games by `tune.py` and saved as JSON:
+
+    own_moves         legal moves of the player
+    opp_moves         legal moves of the opponent
+    center_distance   squared distance of the player from the center, as in
+                      `sample_players.center_score`
+    own_second_moves  open cells the player can reach in exactly two moves
+    blank_spaces      open cells on the board
+
+A player that has not moved yet can move to any open cell, and is counted
+as being at the center.
+"""
+import json
+
+from batch_scores import neighbor_cells
+
+FEATURES = ["own_moves", "opp_moves", "center_distance", "own_second_moves",
+            "blank_spaces"]
+
+
+def position_features(game, player):
+    """Return the list of `FEATURES` of `game` from the point of view of
+    `player`.
+    """
+    neighbors = neighbor_cells(game.width, game.height)
+    blank = set(game.get_blank_spaces())
+
+    def moves(loc):
+        # a player that has not moved yet can move to any open cell
+        if loc is None:
+            return blank
+        return [cell for cell in neighbors[loc] if cell in blank]
+
+    own_loc = game.get_player_location(player)
+    own_cells = moves(own_loc)
+    second = set()
+    for cell in own_cells:
+        second.update(moves(cell))
+    if own_loc is None:
+        center_distance = 0.
+    else:
+        w, h = game.width / 2., game.height / 2.
+        y, x = own_loc
+        center_distance = (h - y)**2 + (w - x)**2
+    return [float(len(own_cells)),
+            float(len(moves(game.get_player_location(
+                game.get_opponent(player))))),
+            float(center_distance),
+            float(len(second)),
+            float(len(blank))]
+
+
+class LinearScore:
+    """A heuristic equal to the weighted sum of the `FEATURES` of a
+    position, with +/-inf for won and lost positions. Instances can be passed
+    as `score_fn` to any agent, and pickled for parallel tournaments.
+
+    Parameters
+    ----------
+    weights : list<float>
+        One weight per entry of `FEATURES`.
+    """
+
+    def __init__(self, weights):
+        if len(weights) != len(FEATURES):
+            raise ValueError("Expected {} weights, got {}.".format(
+                len(FEATURES), len(weights)))
+        self.weights = [float(weight) for weight in weights]
+
+    def __call__(self, game, player):
+        if game.is_loser(player):
+            return float("-inf")
+
+        if game.is_winner(player):
+            return float("inf")
+
+        return sum(weight * value for weight, value in
+                   zip(self.weights, position_features(game, player)))
+
+    def __repr__(self):
+        return "LinearScore({!r})".format(self.weights)
+
+    def save(self, path):
+        """Write the weights to a JSON file. """
+        with open(path, "w") as f:
+            json.dump(dict(zip(FEATURES, self.weights)), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Read weights written by `save`. """
+        with open(path) as f:
+            weights = json.load(f)
+        return cls([weights[name] for name in FEATURES])
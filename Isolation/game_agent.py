@@ -2,7 +2,20 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+import copy
+import math
 import random
+import struct
+import threading
+
+from timeit import default_timer as timer
+
+from isolation.bitboard import knight_masks
+from transposition import EXACT, LOWER, UPPER
+
+# XORed into position hashes when the searching player moves second, since
+# the same position has a different value for each seat
+SEAT_KEY = 0x9E3779B97F4A7C15
 
 
 class SearchTimeout(Exception):
@@ -10,6 +23,50 @@ class SearchTimeout(Exception):
     pass
 
 
+def effective_branching_factor(nodes, depth):
+    """Return the branching factor b* that a uniform tree of the given depth
+    would need to contain `nodes` nodes, i.e., the solution of
+    nodes = 1 + b* + (b*)^2 + ... + (b*)^depth.
+    """
+    if depth < 1 or nodes <= depth + 1:
+        return 1.
+    lo, hi = 1., nodes ** (1. / depth)
+    while hi - lo > 1e-6:
+        mid = (lo + hi) / 2
+        if sum(mid ** i for i in range(depth + 1)) < nodes:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def count_moves(game, player):
+    """Return the number of legal moves of `player` in `game`, using the
+    `count_legal_moves` method of the boards of this project if the board has
+    one (the stock `isolation.Board` does not).
+    """
+    count_legal_moves = getattr(game, "count_legal_moves", None)
+    if count_legal_moves is None:
+        return len(game.get_legal_moves(player))
+    return count_legal_moves(player)
+
+
+def next_float(x, up=True):
+    """Return the float next to `x` towards +inf (or towards -inf if `up` is
+    False), like `math.nextafter(x, +/-math.inf)`, which needs Python 3.9.
+    """
+    if not up:
+        return -next_float(-x)
+    if x != x or x == float("inf"):
+        return x
+    if x == 0:
+        return 5e-324  # the smallest positive float
+    bits, = struct.unpack("<Q", struct.pack("<d", x))
+    # the bits of a float are ordered like its magnitude
+    bits += 1 if x > 0 else -1
+    return struct.unpack("<d", struct.pack("<Q", bits))[0]
+
+
 def custom_score(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -41,8 +98,8 @@ def custom_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    my_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    my_moves = count_moves(game, player)
+    opp_moves = count_moves(game, game.get_opponent(player))
     return float(my_moves - opp_moves)
 
 
@@ -75,8 +132,8 @@ def custom_score_2(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    my_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    my_moves = count_moves(game, player)
+    opp_moves = count_moves(game, game.get_opponent(player))
     return float(my_moves - 2*opp_moves)
 
 
@@ -109,8 +166,8 @@ def custom_score_3(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    my_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    my_moves = count_moves(game, player)
+    opp_moves = count_moves(game, game.get_opponent(player))
     return float(my_moves - 3*opp_moves)
 
 
@@ -147,24 +204,75 @@ class MinimaxPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using depth-limited minimax
     search. You must finish and test this player to make sure it properly uses
     minimax to return a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        If True, search the game tree by applying and undoing moves on the
+        board with `push_move`/`pop_move` rather than copying the board for
+        every child with `forecast_move`.
+
+    stats : `search_stats.SearchStats` (optional)
+        If given, a record of the search is appended to it after every move.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of nodes searched during the last call to get_move().
+
+    leaf_evals : int
+        The number of positions scored during the last call to get_move().
+
+    depth : int
+        The depth searched during the last call to get_move(): the search
+        depth, or 0 if the search timed out.
     """
 
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, stats=None):
+        super().__init__(search_depth, score_fn, timeout)
+        self.in_place = in_place
+        self.stats = stats
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.depth = 0
+
     def get_move(self, game, time_left):
 
         self.time_left = time_left
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.depth = 0
+        if self.stats is not None:
+            budget = time_left()
 
         # Initialize the best move so that this function returns something
-        # in case the search fails due to timeout
-        self.best_move = (-1, -1)
+        # in case the search fails due to timeout. Any legal move is better
+        # than forfeiting with (-1, -1).
+        legal_moves = game.get_legal_moves()
+        self.best_move = legal_moves[0] if legal_moves else (-1, -1)
 
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            self.best_move = self.minimax(game, self.search_depth)
+            self.depth = self.search_depth
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
 
+        depth = self.depth
+        if self.stats is not None:
+            used = budget - time_left()
+            iterations = [{"depth": depth, "nodes": self.nodes,
+                           "time": used}] if depth else []
+            self.stats.record(ply=game.move_count, move=self.best_move,
+                              nodes=self.nodes, leaf_evals=self.leaf_evals,
+                              cutoffs=0, depth=depth, iterations=iterations,
+                              time=used,
+                              stop="max_depth" if depth else "timeout",
+                              tt_probes=0, tt_hits=0)
+
         # Return the best move from the last completed search iteration
         return self.best_move
 
@@ -172,14 +280,17 @@ class MinimaxPlayer(IsolationPlayer):
         
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        self._root_depth = depth
         return self.min_max_move(game, depth)[0]
     
     # TODO: finish this function!
     def min_max_move(self, game, depth):
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        self.nodes += 1
 
         if depth == 0:
+            self.leaf_evals += 1
             return (game.get_player_location(self), self.score(game, self))
         
         best_value, funct = None, None
@@ -195,11 +306,21 @@ class MinimaxPlayer(IsolationPlayer):
             funct, best_value = min, float("inf")
             
         for move in game.get_legal_moves():
-            next_play = game.forecast_move(move)
-            score = self.min_max_move(next_play, depth - 1)[1]
+            if self.in_place:
+                game.push_move(move)
+                try:
+                    score = self.min_max_move(game, depth - 1)[1]
+                finally:
+                    game.pop_move()
+            else:
+                next_play = game.forecast_move(move)
+                score = self.min_max_move(next_play, depth - 1)[1]
             if funct(best_value, score) == score:
                 best_move = move
                 best_value = score
+                if depth == self._root_depth:
+                    # keep the best root move so far in case of a timeout
+                    self.best_move = move
 
         return (best_move, best_value)
             
@@ -210,62 +331,472 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        If True, search the game tree by applying and undoing moves on the
+        board with `push_move`/`pop_move` rather than copying the board for
+        every child with `forecast_move`.
+
+    tt : `transposition.TranspositionTable` (optional)
+        A table used to store search results keyed by position hash. Entries
+        are reused across iterative deepening passes and between moves.
+
+    ordering : `move_ordering.MoveOrdering` (optional)
+        Sorts the moves of each node before they are searched. If None, moves
+        are searched in the order the board generates them.
+
+    max_depth : int (optional)
+        The deepest iterative deepening pass to run. If None, deepen until
+        the search times out.
+
+    batch_score_fn : callable (optional)
+        A batch version of `score_fn` (see `batch_scores.py`) that scores all
+        children of a node in one call. If given, it is used to score the
+        frontier of the search instead of visiting each leaf.
+
+    endgame : `endgame.EndgameSolver` (optional)
+        If given, positions in which the players are in separate regions of
+        the board are solved exactly at the root instead of searched. The
+        solver may use half of the time of the move; if it runs out, the
+        position is searched as usual.
+
+    ponder : bool (optional)
+        If True, search on the opponent's time: after choosing a move, the
+        player predicts the opponent's reply and searches the resulting
+        position in a background thread, filling the transposition table
+        (`tt` should be given) for the search of its next move. The search
+        runs on a copy of the player that shares its table and move ordering,
+        so it does not change the statistics of the player's own searches.
+        Pondering stops when `Board.play` reports the opponent's move (see
+        `opponent_moved`) or the end of the game (see `game_over`), when
+        get_move() is called, or after `ponder_time`.
+        The thread shares the interpreter with the opponent, so it only adds
+        search time when the opponent runs in another process or waits on
+        I/O; it is off by default.
+
+    ponder_time : float (optional)
+        The longest time (in milliseconds) to ponder a single move.
+
+    pvs : bool (optional)
+        If True, use principal variation search: every move after the first
+        one of a node is searched with a null window that only tells whether
+        it beats the best move so far, and re-searched with the full window
+        if it does.
+
+    aspiration : float (optional)
+        If given, every iterative deepening pass after the first starts with
+        the window (v - aspiration, v + aspiration) around the value v of the
+        previous pass instead of (-inf, inf).
+
+    aspiration_widen : float (optional)
+        The factor the aspiration window grows by on the side that failed
+        each time the value falls outside it.
+
+    stop_early : bool (optional)
+        If True, do not start an iterative deepening pass that is predicted
+        to run out of time. The time of the next pass is predicted as the
+        time of the last one times its growth in nodes over the one before.
+
+    stats : `search_stats.SearchStats` (optional)
+        If given, a record of the search is appended to it after every move.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of nodes searched during the last call to get_move().
+
+    leaf_evals : int
+        The number of positions scored by `score_fn` or `batch_score_fn`
+        during the last call to get_move().
+
+    cutoffs : int
+        The number of alpha-beta cutoffs during the last call to get_move().
+
+    iteration_stats : list<dict>
+        One entry per completed iterative deepening pass of the last call to
+        get_move(), with the search depth, the nodes searched by the pass
+        (see `effective_branching_factor`) and the time it took (in the units
+        of `time_left`).
+
+    time_stats : dict
+        Time management figures of the last call to get_move(): the time
+        `budget` at the start, the time `used`, why deepening stopped
+        (`stop` is "timeout", "predicted", "solved" or "max_depth") and
+        whether the move came from an unfinished pass (`partial`).
+
+    ponder_nodes : int
+        The number of nodes searched while pondering, over all moves.
+
+    ponder_hits : int
+        The number of opponent moves that were predicted while pondering.
+
+    root_value : float
+        The value of the root found by the last completed call to
+        alphabeta().
+
+    pvs_researches : int
+        The number of null-window searches that had to be repeated with the
+        full window during the last call to get_move().
+
+    aspiration_researches : int
+        The number of iterative deepening passes that had to be repeated with
+        a wider window during the last call to get_move().
     """
 
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, tt=None, ordering=None, max_depth=None,
+                 batch_score_fn=None, endgame=None, ponder=False,
+                 ponder_time=1000., pvs=False, aspiration=None,
+                 aspiration_widen=4., stop_early=False, stats=None):
+        super().__init__(search_depth, score_fn, timeout)
+        self.batch_score = batch_score_fn
+        self.endgame = endgame
+        self.in_place = in_place
+        self.tt = tt
+        self.ordering = ordering
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.cutoffs = 0
+        self.iteration_stats = []
+        self.stats = stats
+        self.ponder = ponder
+        self.ponder_time = ponder_time
+        self.ponder_nodes = 0
+        self.ponder_hits = 0
+        self._ponder_thread = None
+        self._ponder_stop = None
+        self._ponder_reply = None
+        self.pvs = pvs
+        self.aspiration = aspiration
+        self.aspiration_widen = aspiration_widen
+        self.root_value = None
+        self.pvs_researches = 0
+        self.aspiration_researches = 0
+        self.stop_early = stop_early
+        self.time_stats = {}
+        self._pv_move = None
+        self._partial_move = None
+        self._seat_key = 0
+
+    def __getstate__(self):
+        # a pondering thread cannot be copied or pickled
+        state = self.__dict__.copy()
+        state["_ponder_thread"] = None
+        state["_ponder_stop"] = None
+        return state
+
     def get_move(self, game, time_left):
+        self.stop_pondering()
        
         self.time_left = time_left
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.cutoffs = 0
+        self.iteration_stats = []
+        self.root_value = None
+        self.pvs_researches = 0
+        self.aspiration_researches = 0
+        tt_counts = None
+        if self.tt is not None:
+            self.tt.new_search()
+            tt_counts = (self.tt.probes, self.tt.hits)
+        if self.ordering is not None:
+            self.ordering.new_search()
+        # The player is active in `game`, so the parity of the move count
+        # tells which seat it holds; pondering reads the key even if the
+        # first iteration times out
+        self._seat_key = SEAT_KEY if game.move_count & 1 else 0
+        budget = time_left()
+        if self.endgame is not None:
+            solution = self.endgame.solve(
+                game, time_left, (budget + self.TIMER_THRESHOLD) / 2)
+            if solution is not None:
+                self.time_stats = {"budget": budget, "stop": "solved",
+                                   "used": budget - time_left(),
+                                   "partial": False}
+                if self.stats is not None:
+                    self._record_stats(game, solution[0], tt_counts)
+                return solution[0]
 
         # TODO: finish this function!
-        best_move = (-1, -1)
+        legal_moves = game.get_legal_moves()
+        best_move = legal_moves[0] if legal_moves else (-1, -1)
+        self.time_stats = {"budget": budget, "stop": "max_depth",
+                           "partial": False}
+        self._pv_move = None
         search_depth = 1
-        while True:
+        while self.max_depth is None or search_depth <= self.max_depth:
+            start = time_left()
+            nodes = self.nodes
+            self._partial_move = None
             try:
-                best_move = self.alphabeta(game, search_depth)
-                search_depth += 1
+                best_move = self.aspiration_search(game, search_depth)
             except SearchTimeout:
+                # The root searches the best move of the last pass first, so
+                # a better move found by the unfinished pass can be trusted
+                if self._partial_move is not None:
+                    best_move = self._partial_move
+                    self.time_stats["partial"] = True
+                self.time_stats["stop"] = "timeout"
+                break
+            nodes = self.nodes - nodes
+            elapsed = start - time_left()
+            self.iteration_stats.append({"depth": search_depth,
+                                         "nodes": nodes, "time": elapsed})
+            self._pv_move = best_move
+            if math.isinf(self.root_value):
+                # the outcome is decided, deeper passes cannot change it
+                self.time_stats["stop"] = "solved"
                 break
+            if self.stop_early and len(self.iteration_stats) > 1:
+                growth = nodes / max(self.iteration_stats[-2]["nodes"], 1)
+                if (elapsed * growth >
+                        time_left() - self.TIMER_THRESHOLD):
+                    self.time_stats["stop"] = "predicted"
+                    break
+            search_depth += 1
+        self.time_stats["used"] = budget - time_left()
+        if self.stats is not None:
+            self._record_stats(game, best_move, tt_counts)
+        if self.ponder and best_move != (-1, -1):
+            self.start_pondering(game, best_move)
         return best_move
 
+    def _record_stats(self, game, move, tt_counts):
+        """Append the record of the last call to get_move() to `stats`,
+        given the transposition table counters at the start of the call.
+        """
+        probes = hits = 0
+        if tt_counts is not None:
+            probes = self.tt.probes - tt_counts[0]
+            hits = self.tt.hits - tt_counts[1]
+        iterations = [dict(stats) for stats in self.iteration_stats]
+        self.stats.record(ply=game.move_count, move=move, nodes=self.nodes,
+                          leaf_evals=self.leaf_evals, cutoffs=self.cutoffs,
+                          depth=iterations[-1]["depth"] if iterations else 0,
+                          iterations=iterations, time=self.time_stats["used"],
+                          stop=self.time_stats["stop"], tt_probes=probes,
+                          tt_hits=hits)
+
+    def opponent_moved(self, move):
+        """Receive the move of the opponent from `Board.play` as soon as it is
+        applied, and stop pondering.
+        """
+        if self._ponder_thread is not None:
+            self.ponder_hits += move == self._ponder_reply
+        self.stop_pondering()
+
+    def game_over(self):
+        """Receive the end of the game from `Board.play`, and stop pondering.
+        """
+        self.stop_pondering()
+
+    def start_pondering(self, game, move):
+        """Start searching the position expected after `move` is played in
+        `game` and the opponent replies, in a background thread.
+        """
+        child = game.forecast_move(move)
+        reply = self.predict_reply(child)
+        if reply is None:
+            return
+        position = child.forecast_move(reply)
+        if not position.get_legal_moves():
+            return
+        self._ponder_reply = reply
+        self._ponder_stop = threading.Event()
+        searcher = copy.copy(self)
+        searcher.stats = None
+        searcher.ponder = False
+        # the searcher plays this player's seat in the pondered position
+        for name in ("_player_1", "_player_2", "_active_player",
+                     "_inactive_player"):
+            if getattr(position, name) is self:
+                setattr(position, name, searcher)
+        self._ponder_thread = threading.Thread(
+            target=self._ponder, args=(searcher, position, self._ponder_stop),
+            daemon=True)
+        self._ponder_thread.start()
+
+    def stop_pondering(self):
+        """Stop the pondering thread, if any, and wait for it to finish. """
+        if self._ponder_thread is None:
+            return
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        self._ponder_stop = None
+
+    def predict_reply(self, game):
+        """Return the most likely move of the opponent, who is active in
+        `game`: the best move stored for the position by the last search, or
+        else the move that minimizes the score of this player.
+        """
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return None
+        if self.tt is not None:
+            entry = self.tt.probe(game.hash() ^ self._seat_key)
+            if entry is not None and entry.move in legal_moves:
+                return entry.move
+        return min(legal_moves,
+                   key=lambda move: self.score(game.forecast_move(move), self))
+
+    def _ponder(self, searcher, game, stop):
+        """Run iterative deepening on `game` with `searcher`, a copy of this
+        player, until `stop` is set or the ponder time runs out, counting the
+        nodes in `ponder_nodes` and leaving the results in the transposition
+        table.
+        """
+        start = timer()
+        searcher.nodes = 0
+        searcher.time_left = lambda: float("-inf") if stop.is_set() else (
+            self.ponder_time - 1000 * (timer() - start))
+        search_depth = 1
+        while self.max_depth is None or search_depth <= self.max_depth:
+            try:
+                searcher.alphabeta(game, search_depth)
+            except SearchTimeout:
+                break
+            search_depth += 1
+        self.ponder_nodes += searcher.nodes
+
+    def aspiration_search(self, game, depth):
+        """Search `game` to `depth` with an aspiration window around the
+        value of the previous pass (see `aspiration`), widening the window
+        until the value falls inside it, and return the best move.
+        """
+        value = self.root_value
+        if (self.aspiration is None or value is None or
+                math.isinf(value)):
+            return self.alphabeta(game, depth)
+
+        low = high = self.aspiration
+        alpha, beta = value - low, value + high
+        while True:
+            move = self.alphabeta(game, depth, alpha, beta)
+            value = self.root_value
+            if value <= alpha and alpha > float("-inf"):
+                low *= self.aspiration_widen
+                alpha = value - low
+            elif value >= beta and beta < float("inf"):
+                high *= self.aspiration_widen
+                beta = value + high
+            else:
+                return move
+            self.aspiration_researches += 1
+
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
        
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
-        return self.ab_move(game, depth)[0] 
+        # the pondering copy searches without going through get_move
+        self._seat_key = SEAT_KEY if game.move_count & 1 else 0
+        self._root_depth = depth
+        if self.ordering is not None:
+            self.ordering.new_iteration()
+        move, self.root_value = self.ab_move(game, depth, alpha, beta)
+        return move
         # TODO: finish this function!
+
+    def search_child(self, game, move, depth, alpha, beta):
+        """Return the value of the child of `game` reached by `move`,
+        searched to `depth` with the window (alpha, beta).
+        """
+        if self.in_place:
+            game.push_move(move)
+            try:
+                return self.ab_move(game, depth, alpha, beta)[1]
+            finally:
+                game.pop_move()
+        return self.ab_move(game.forecast_move(move), depth, alpha, beta)[1]
     
     def ab_move(self,game,depth, alpha=float("-inf"), beta=float("inf")):
         
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        self.nodes += 1
         
         if depth == 0:
+            self.leaf_evals += 1
             return ((-1, -1), self.score(game, self))
         
-        best_value, funct, is_alpha = None, None, True
+        legal_moves = game.get_legal_moves()
+        alpha_orig, beta_orig = alpha, beta
+        hash_move = None
+
+        if self.tt is not None:
+            key = game.hash() ^ self._seat_key
+            entry = self.tt.probe(key)
+            if entry is not None:
+                if entry.depth >= depth and (
+                        entry.flag == EXACT or
+                        entry.flag == LOWER and entry.value >= beta or
+                        entry.flag == UPPER and entry.value <= alpha):
+                    return entry.move, entry.value
+                hash_move = entry.move
+
+        ply = self._root_depth - depth
+        if self.ordering is not None:
+            legal_moves = self.ordering.order(game, legal_moves, ply,
+                                              hash_move)
+        elif hash_move in legal_moves:
+            # Search the best move from the earlier search first
+            legal_moves.remove(hash_move)
+            legal_moves.insert(0, hash_move)
+        if ply == 0 and self._pv_move in legal_moves:
+            # the root always starts with the best move of the last pass
+            legal_moves.remove(self._pv_move)
+            legal_moves.insert(0, self._pv_move)
         
-        if game.get_legal_moves():
-            best_move = game.get_legal_moves()[0]
+        if legal_moves:
+            best_move = legal_moves[0]
         else:
             best_move = (-1, -1)
         
         if(game.active_player == self):
-            funct, best_value, is_alpha = max, float("-inf"), True
+            best_value, is_alpha = float("-inf"), True
         else:
-            funct, best_value, is_alpha = min, float("inf"), False
+            best_value, is_alpha = float("inf"), False
         
-        legal_moves = game.get_legal_moves()
-        
-        for move in legal_moves:
-            next_play = game.forecast_move(move)
-            score = self.ab_move(next_play, depth - 1, alpha, beta)[1]
+        frontier_scores = None
+        if depth == 1 and self.batch_score is not None:
+            frontier_scores = iter(self.batch_score(game, self, legal_moves))
+            self.leaf_evals += len(legal_moves)
+
+        for i, move in enumerate(legal_moves):
+            if frontier_scores is not None:
+                self.nodes += 1
+                score = next(frontier_scores)
+            elif self.pvs and i > 0:
+                # The smallest window above alpha (below beta for the
+                # opponent) only tells whether the move beats the best one
+                if is_alpha:
+                    score = self.search_child(
+                        game, move, depth - 1, alpha, next_float(alpha))
+                else:
+                    score = self.search_child(
+                        game, move, depth - 1, next_float(beta, False), beta)
+                if alpha < score < beta:
+                    self.pvs_researches += 1
+                    score = self.search_child(game, move, depth - 1, alpha,
+                                              beta)
+            else:
+                score = self.search_child(game, move, depth - 1, alpha, beta)
                 
             if is_alpha:
                 if(score > best_value):
                     best_value = score
                     best_move = move 
+                    if ply == 0 and best_value > alpha_orig:
+                        self._partial_move = move
                 if best_value >= beta:
-                    return best_move, best_value
+                    self.cutoffs += 1
+                    if self.ordering is not None:
+                        self.ordering.cutoff(game, move, ply, depth)
+                    break
                 else:
                     alpha = max(best_value, alpha)
             else:
@@ -273,9 +804,213 @@ class AlphaBetaPlayer(IsolationPlayer):
                     best_value = score
                     best_move = move 
                 if best_value <= alpha:
-                    return best_move, best_value
+                    self.cutoffs += 1
+                    if self.ordering is not None:
+                        self.ordering.cutoff(game, move, ply, depth)
+                    break
                 else:
                     beta = min(best_value, beta)
 
+        if best_value <= alpha_orig:
+            flag = UPPER
+        elif best_value >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if self.tt is not None:
+            self.tt.store(key, depth, flag, best_value, best_move)
+        if self.ordering is not None and flag == EXACT:
+            self.ordering.best_move(game, best_move)
+
         return best_move, best_value
-        
+
+
+class MCTSNode:
+    """A node of the `MCTSPlayer` search tree.
+
+    Cells are board indices (row + col * height). `wins` counts the playouts
+    through the node won by the player that made `move`. Nodes do not link
+    back to their parent, so a discarded subtree is freed by reference
+    counting instead of by the cyclic garbage collector.
+    """
+    __slots__ = ("move", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, untried):
+        self.move = move
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+
+
+class MCTSPlayer(IsolationPlayer):
+    """Game-playing agent that chooses a move using Monte Carlo tree search
+    with the UCT selection rule.
+
+    Playouts run on a lightweight state made of the blocked-cell bitmask and
+    the two player cells, with knight moves generated from the masks of
+    `isolation.bitboard.knight_masks`, so no board is copied per simulation.
+    After each move the subtree of the chosen move is kept, and reused on the
+    next call if the opponent's reply was already expanded.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        The UCT exploration constant c; children are selected by maximizing
+        wins / visits + c * sqrt(ln(parent visits) / visits).
+
+    timeout : float (optional)
+        Time remaining (in milliseconds) when search is aborted.
+
+    reuse_tree : bool (optional)
+        If True, keep the search tree between moves.
+
+    max_playouts : int (optional)
+        The number of playouts to run per move. If None, run playouts until
+        the search times out.
+
+    Attributes
+    ----------
+    playouts : int
+        The number of playouts run during the last call to get_move().
+
+    playouts_per_sec : float
+        The playout rate of the last call to get_move().
+    """
+
+    def __init__(self, exploration=math.sqrt(2), timeout=10., reuse_tree=True,
+                 max_playouts=None):
+        super().__init__(timeout=timeout)
+        self.exploration = exploration
+        self.reuse_tree = reuse_tree
+        self.max_playouts = max_playouts
+        self.playouts = 0
+        self.playouts_per_sec = 0.
+        self._tree = None
+
+    def get_move(self, game, time_left):
+        self.time_left = time_left
+        self.playouts = 0
+        self.playouts_per_sec = 0.
+
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            self._tree = None
+            return (-1, -1)
+
+        width, height = game.width, game.height
+        full = (1 << (width * height)) - 1
+        # the extra last mask lets a player that has not moved yet (cell -1)
+        # move to any open cell
+        self._masks = knight_masks(width, height) + (full,)
+        blocked = full
+        for r, c in game.get_blank_spaces():
+            blocked ^= 1 << (r + c * height)
+        locs = []
+        for player in (game.active_player, game.inactive_player):
+            loc = game.get_player_location(player)
+            locs.append(-1 if loc is None else loc[0] + loc[1] * height)
+        state = (width, height, blocked, locs[0], locs[1])
+
+        root = self._reuse(state) if self.reuse_tree else None
+        # the rest of the kept tree is freed here, inside the time budget
+        self._tree = None
+        if root is None:
+            root = MCTSNode(None, self._moves(blocked, locs[0]))
+
+        start = timer()
+        while ((self.max_playouts is None or
+                self.playouts < self.max_playouts) and
+               time_left() >= self.TIMER_THRESHOLD):
+            self._playout(root, blocked, locs)
+            self.playouts += 1
+        elapsed = timer() - start
+        if elapsed > 0:
+            self.playouts_per_sec = self.playouts / elapsed
+
+        if not root.children:
+            self._tree = None
+            return legal_moves[0]
+        # the root is kept alongside the chosen child, so that freeing the
+        # rest of the tree is not charged to the end of this turn
+        best = max(root.children, key=lambda child: child.visits)
+        self._tree = (root, best, (width, height, blocked | (1 << best.move),
+                                   locs[1], best.move))
+        return (best.move % height, best.move // height)
+
+    def _reuse(self, state):
+        """Return the node of the kept tree for the position `state`, or None
+        if the opponent's reply was not expanded.
+        """
+        if self._tree is None:
+            return None
+        _, node, (width, height, blocked, to_move, waiting) = self._tree
+        reply = state[4]
+        if reply < 0 or state != (width, height, blocked | (1 << reply),
+                                  waiting, reply):
+            return None
+        for child in node.children:
+            if child.move == reply:
+                return child
+        return None
+
+    def _moves(self, blocked, loc):
+        """Return the list of open cells a knight on `loc` can move to. """
+        moves = []
+        mask = self._masks[loc] & ~blocked
+        while mask:
+            bit = mask & -mask
+            moves.append(bit.bit_length() - 1)
+            mask ^= bit
+        return moves
+
+    def _select(self, node):
+        """Return the child of `node` with the highest UCT value. """
+        log_visits = math.log(node.visits)
+        c = self.exploration
+        return max(node.children, key=lambda child: (
+            child.wins / child.visits +
+            c * math.sqrt(log_visits / child.visits)))
+
+    def _playout(self, root, blocked, locs):
+        """Run one selection, expansion, simulation and backpropagation pass
+        from `root`, whose player to move is on cell `locs[0]`.
+        """
+        to_move, waiting = locs
+        node = root
+        path = [root]
+        while not node.untried and node.children:
+            node = self._select(node)
+            path.append(node)
+            blocked |= 1 << node.move
+            to_move, waiting = waiting, node.move
+        if node.untried:
+            move = node.untried.pop(random.randrange(len(node.untried)))
+            blocked |= 1 << move
+            to_move, waiting = waiting, move
+            child = MCTSNode(move, self._moves(blocked, to_move))
+            node.children.append(child)
+            path.append(child)
+
+        won = self._rollout(blocked, to_move, waiting)
+        for node in reversed(path):
+            node.visits += 1
+            node.wins += won
+            won = not won
+
+    def _rollout(self, blocked, to_move, waiting):
+        """Play random moves to the end of the game and return True if the
+        player that moved last before the rollout (on `waiting`) wins.
+        """
+        masks = self._masks
+        mover_wins = True
+        while True:
+            mask = masks[to_move] & ~blocked
+            if not mask:
+                return mover_wins
+            for _ in range(random.randrange(bin(mask).count("1"))):
+                mask &= mask - 1
+            bit = mask & -mask
+            blocked |= bit
+            to_move, waiting = waiting, bit.bit_length() - 1
+            mover_wins = not mover_wins
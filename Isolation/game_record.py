@@ -0,0 +1,141 @@
+"""Read and write Isolation games in a compact binary format.
+
+A game record file starts with a file header (magic, format version, board
+width and height) followed by any number of game records appended one after
+another. Each record is a fixed header
+
+    seed (8 bytes), winner (1), termination (1), number of moves (2),
+    lengths of the two agent names (1 each)
+
+followed by the UTF-8 agent names and one byte per move holding the cell
+index of the move (row + column * height), starting with the first move of
+player 1. The winner is 0 for player 1 and 1 for player 2.
+
+Records are only ever appended, so a writer can stream games to the end of
+a file while other processes read the records already written. This module
+only uses the standard library; `replay.py` reads the same files into NumPy
+arrays. The file header is shared with other formats (see `record_file.py`).
+"""
+import mmap
+import os
+import struct
+
+from collections import namedtuple
+
+from record_file import FILE_HEADER, FileFormat, RecordWriter
+
+MAGIC = b"ISGR"
+VERSION = 1
+
+FORMAT = FileFormat(MAGIC, VERSION, "game record file")
+read_header = FORMAT.read_header
+
+# seed, winner, termination, number of moves, name lengths
+RECORD_HEADER = struct.Struct("<QBBHBB")
+
+TERMINATIONS = ["illegal move", "forfeit", "timeout"]
+
+GameRecord = namedtuple("GameRecord", ["agents", "seed", "winner",
+                                       "termination", "moves"])
+
+
+def encode_game(moves, winner, termination, seed, agents, height):
+    """Return the bytes of a game record.
+
+    Parameters
+    ----------
+    moves : list<(int, int)>
+        Every move of the game, starting with the first move of player 1.
+
+    winner : int
+        0 if player 1 won, 1 if player 2 won.
+
+    termination : str
+        How the game ended, one of `TERMINATIONS`.
+
+    seed : int
+        The random seed the game was played with.
+
+    agents : (str, str)
+        The names of player 1 and player 2.
+
+    height : int
+        The number of rows of the board.
+    """
+    names = [name.encode("utf-8")[:255] for name in agents]
+    header = RECORD_HEADER.pack(seed & (2**64 - 1), winner,
+                                TERMINATIONS.index(termination), len(moves),
+                                len(names[0]), len(names[1]))
+    cells = bytes(r + c * height for r, c in moves)
+    return header + names[0] + names[1] + cells
+
+
+class GameRecordWriter(RecordWriter):
+    """Append games to a game record file, creating it if needed.
+
+    Parameters
+    ----------
+    path : str
+        The file to append to. An existing file must have been written for
+        the same board size.
+
+    width, height : int (optional)
+        The board size of the games. Boards of more than 255 cells cannot be
+        recorded.
+    """
+
+    def __init__(self, path, width=7, height=7):
+        if width * height > 255:
+            raise ValueError("Boards of more than 255 cells cannot be "
+                             "recorded.")
+        super().__init__(path, FORMAT, width, height)
+
+    def write(self, moves, winner, termination, seed, agents):
+        """Append one game (see `encode_game`). """
+        self.append(encode_game(moves, winner, termination, seed, agents,
+                                self.height))
+
+
+def iter_records(data):
+    """Yield the offset of the move bytes of every complete record in the
+    buffer `data` of a game record file, with its decoded header fields.
+
+    Yields
+    ------
+    (int, int, int, str, int, (str, str))
+        The offset and number of moves, then the seed, termination, winner
+        and agent names of the game.
+    """
+    offset = FILE_HEADER.size
+    end = len(data)
+    while offset + RECORD_HEADER.size <= end:
+        seed, winner, termination, num_moves, len_1, len_2 = \
+            RECORD_HEADER.unpack_from(data, offset)
+        names = offset + RECORD_HEADER.size
+        moves = names + len_1 + len_2
+        if moves + num_moves > end:
+            # a record that is still being written
+            return
+        agents = (bytes(data[names:names + len_1]).decode("utf-8"),
+                  bytes(data[names + len_1:moves]).decode("utf-8"))
+        yield (moves, num_moves, seed, TERMINATIONS[termination], winner,
+               agents)
+        offset = moves + num_moves
+
+
+def read_games(path):
+    """Yield every game of a game record file as a `GameRecord`.
+
+    The file is read through `mmap`, so files larger than memory can be
+    scanned.
+    """
+    if os.path.getsize(path) == 0:
+        raise ValueError("{} is not a game record file.".format(path))
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            _, _, _, height = read_header(data, path)
+            for offset, num_moves, seed, termination, winner, agents in \
+                    iter_records(data):
+                moves = [(cell % height, cell // height)
+                         for cell in data[offset:offset + num_moves]]
+                yield GameRecord(agents, seed, winner, termination, moves)
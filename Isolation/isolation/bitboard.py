@@ -0,0 +1,299 @@
+"""
+This file contains the `BitBoard` class, an alternate engine for the game
+Isolation that stores the blocked cells of the board as a single integer
+bitmask rather than a list of cells.
+
+Cells are numbered exactly as in `isolation.Board` (index = row + col * height)
+and bit `i` of the mask is set when cell `i` is blocked.  Knight moves are
+generated by intersecting a precomputed attack mask for the player's cell with
+the complement of the blocked mask, then bit-scanning the result.
+
+`BitBoard` is API-compatible with `isolation.Board`, so it can be used in place
+of `Board` anywhere a game is constructed.  Legal moves are returned in cell
+index order instead of being shuffled.
+"""
+from .isolation import (Board, cell_coordinates, knight_neighbors,
+                        zobrist_keys)
+
+_KNIGHT_MASKS = {}
+
+
+def knight_masks(width, height):
+    """Return the knight-attack masks for a board of the given size.
+
+    The masks are computed on first use and cached for every later board of
+    the same size.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    tuple<int>
+        Entry `i` is the bitmask of cells a knight standing on cell `i` can
+        reach (ignoring blocked cells).
+    """
+    masks = _KNIGHT_MASKS.get((width, height))
+    if masks is None:
+        masks = _KNIGHT_MASKS[(width, height)] = tuple(
+            sum(1 << i for i in cells)
+            for cells in knight_neighbors(width, height))
+    return masks
+
+
+def popcount(mask):
+    """Return the number of set bits in `mask`. """
+    return bin(mask).count("1")
+
+
+class BitBoard(Board):
+    """Implement a model for the game Isolation assuming each player moves like
+    a knight in chess, storing the board as an integer bitmask.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        self._masks = knight_masks(width, height)
+        self._coords = cell_coordinates(width, height)
+        self._full = (1 << (width * height)) - 1
+        self._blocked = 0
+        self._p1_loc = Board.NOT_MOVED
+        self._p2_loc = Board.NOT_MOVED
+        self._move_stack = []
+        self._zobrist = zobrist_keys(width, height)
+        self._hash = 0
+
+    def hash(self):
+        return self._hash
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.__dict__.update(self.__dict__)
+        new_board._move_stack = []
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not self._blocked >> (move[0] + move[1] * self.height) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return self._moves_from_mask(self._full & ~self._blocked)
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        idx = self._location_index(player)
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._coords[idx]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            player = self._active_player
+        return self._moves_from_mask(self._move_mask(player))
+
+    def count_legal_moves(self, player=None):
+        """Return the number of legal moves for the specified player without
+        building the list of moves.
+        """
+        if player is None:
+            player = self._active_player
+        return popcount(self._move_mask(player))
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        zobrist = self._zobrist
+        if self._active_player == self._player_2:
+            if self._p2_loc != Board.NOT_MOVED:
+                self._hash ^= zobrist.player_2[self._p2_loc]
+            self._hash ^= zobrist.player_2[idx]
+            self._p2_loc = idx
+        else:
+            if self._p1_loc != Board.NOT_MOVED:
+                self._hash ^= zobrist.player_1[self._p1_loc]
+            self._hash ^= zobrist.player_1[idx]
+            self._p1_loc = idx
+        self._hash ^= zobrist.blocked[idx] ^ zobrist.initiative
+        self._blocked |= 1 << idx
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def push_move(self, move):
+        """Move the active player to a specified location in-place, recording
+        what is needed to undo the move with pop_move(); see
+        `isolation.Board.push_move`.
+        """
+        if self._active_player == self._player_2:
+            self._move_stack.append(self._p2_loc)
+        else:
+            self._move_stack.append(self._p1_loc)
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Undo the most recent move applied with push_move(). """
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        zobrist = self._zobrist
+        last_idx = self._move_stack.pop()
+        if self._active_player == self._player_2:
+            idx, loc_keys, self._p2_loc = self._p2_loc, zobrist.player_2, last_idx
+        else:
+            idx, loc_keys, self._p1_loc = self._p1_loc, zobrist.player_1, last_idx
+        if last_idx != Board.NOT_MOVED:
+            self._hash ^= loc_keys[last_idx]
+        self._hash ^= loc_keys[idx] ^ zobrist.blocked[idx] ^ zobrist.initiative
+        self._blocked ^= 1 << idx
+        self.move_count -= 1
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self._inactive_player and not self._move_mask(self._active_player)
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self._active_player and not self._move_mask(self._active_player)
+
+    def utility(self, player):
+        """Returns the utility of the current game state from the perspective
+        of the specified player; see `isolation.Board.utility`.
+        """
+        if not self._move_mask(self._active_player):
+
+            if player == self._inactive_player:
+                return float("inf")
+
+            if player == self._active_player:
+                return float("-inf")
+
+        return 0.
+
+    def to_string(self, symbols=['1', '2']):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        col_margin = len(str(self.height - 1)) + 1
+        prefix = "{:<" + "{}".format(col_margin) + "}"
+        offset = " " * (col_margin + 3)
+        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        for i in range(self.height):
+            out += prefix.format(i) + ' | '
+            for j in range(self.width):
+                idx = i + j * self.height
+                if not self._blocked >> idx & 1:
+                    out += ' '
+                elif self._p1_loc == idx:
+                    out += symbols[0]
+                elif self._p2_loc == idx:
+                    out += symbols[1]
+                else:
+                    out += '-'
+                out += ' | '
+            out += '\n\r'
+
+        return out
+
+    def _location_index(self, player):
+        """Return the cell index of the player, or None if it has not moved.
+        """
+        if player == self._player_1:
+            return self._p1_loc
+        elif player == self._player_2:
+            return self._p2_loc
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _move_mask(self, player):
+        """Return the bitmask of cells the player can move to. """
+        loc = self._location_index(player)
+        if loc == Board.NOT_MOVED:
+            return self._full & ~self._blocked
+        return self._masks[loc] & ~self._blocked
+
+    def _moves_from_mask(self, mask):
+        """Convert a bitmask of cells into a list of (row, column) pairs by
+        repeatedly scanning for the lowest set bit.
+        """
+        coords = self._coords
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(coords[low.bit_length() - 1])
+            mask ^= low
+        return moves
@@ -9,10 +9,106 @@ be available to project reviewers.
 """
 import random
 import timeit
+from collections import namedtuple
 from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+# The L-shaped (row, column) offsets a knight can move
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+_NEIGHBORS = {}
+_COORDINATES = {}
+
+ZobristKeys = namedtuple("ZobristKeys", ["blocked", "player_1", "player_2",
+                                         "initiative"])
+
+_ZOBRIST_KEYS = {}
+
+
+def zobrist_keys(width, height):
+    """Return the random 64-bit keys used to hash positions on a board of the
+    given size.
+
+    The hash of a position is the XOR of the `blocked` key of every blocked
+    cell, the `player_1` and `player_2` keys of the cells holding each player,
+    and the `initiative` key when player 2 is to move.  Keys are generated
+    from a fixed seed so that hashes agree between processes and runs.
+    """
+    keys = _ZOBRIST_KEYS.get((width, height))
+    if keys is None:
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        keys = _ZOBRIST_KEYS[(width, height)] = ZobristKeys(
+            *[tuple(rng.getrandbits(64) for _ in range(width * height))
+              for _ in range(3)], initiative=rng.getrandbits(64))
+    return keys
+
+
+def knight_neighbors(width, height):
+    """Return the knight-move neighbor table for a board of the given size.
+
+    The table is computed on first use and cached for every later board of
+    the same size.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    tuple<tuple<int>>
+        Entry `i` holds the indices of the cells a knight standing on cell
+        `i` can reach (ignoring blocked cells), where the index of the cell
+        (row, column) is row + column * height.
+    """
+    neighbors = _NEIGHBORS.get((width, height))
+    if neighbors is None:
+        neighbors = _NEIGHBORS[(width, height)] = tuple(
+            tuple(r + dr + (c + dc) * height for dr, dc in DIRECTIONS
+                  if 0 <= r + dr < height and 0 <= c + dc < width)
+            for r, c in cell_coordinates(width, height))
+    return neighbors
+
+
+def cell_coordinates(width, height):
+    """Return the (row, column) pair of every cell index for a board of the
+    given size, cached per board size.
+    """
+    coords = _COORDINATES.get((width, height))
+    if coords is None:
+        coords = _COORDINATES[(width, height)] = tuple(
+            (idx % height, idx // height) for idx in range(width * height))
+    return coords
+
+
+class NodeClock(object):
+    """A replacement for the wall-clock `time_left` function that measures a
+    fixed budget of search nodes instead of milliseconds.
+
+    The search agents call `time_left()` once for every node they visit, so
+    each call spends one node of the budget and returns the number of nodes
+    left. A player that stops when fewer than its TIMER_THRESHOLD nodes are
+    left therefore searches exactly the same tree on any machine.
+
+    Parameters
+    ----------
+    node_limit : int
+        The number of nodes the player may visit during its turn.
+    """
+
+    def __init__(self, node_limit):
+        self.node_limit = node_limit
+        self.nodes = 0
+
+    def __call__(self):
+        self.nodes += 1
+        return self.node_limit - self.nodes
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -52,8 +148,19 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # Previous locations of the players moved with push_move(), most
+        # recent last, so that pop_move() can restore them
+        self._move_stack = []
+
+        # Zobrist hash of the current position, updated by every move
+        self._zobrist = zobrist_keys(width, height)
+        self._hash = 0
+
+        self._neighbors = knight_neighbors(width, height)
+        self._coords = cell_coordinates(width, height)
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        return self._hash
 
     @property
     def active_player(self):
@@ -97,6 +204,7 @@ class Board(object):
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
         new_board._board_state = copy(self._board_state)
+        new_board._hash = self._hash
         return new_board
 
     def forecast_move(self, move):
@@ -156,20 +264,10 @@ class Board(object):
             The coordinate pair (row, column) of the input player, or None
             if the player has not moved.
         """
-        if player == self._player_1:
-            if self._board_state[-1] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-1]
-        elif player == self._player_2:
-            if self._board_state[-2] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-2]
-        else:
-            raise RuntimeError(
-                "Invalid player in get_player_location: {}".format(player))
-        w = idx // self.height
-        h = idx % self.height
-        return (h, w)
+        idx = self._location_index(player)
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._coords[idx]
 
     def get_legal_moves(self, player=None):
         """Return the list of all legal moves for the specified player.
@@ -188,7 +286,19 @@ class Board(object):
         """
         if player is None:
             player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+        return self.__get_moves(self._location_index(player))
+
+    def count_legal_moves(self, player=None):
+        """Return the number of legal moves for the specified player without
+        building the list of moves.
+        """
+        if player is None:
+            player = self.active_player
+        idx = self._location_index(player)
+        state = self._board_state
+        if idx == Board.NOT_MOVED:
+            return state[:-3].count(Board.BLANK)
+        return sum(state[i] == Board.BLANK for i in self._neighbors[idx])
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -201,19 +311,58 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         last_move_idx = int(self.active_player == self._player_2) + 1
+        loc_keys = self._zobrist.player_2 if last_move_idx == 2 else self._zobrist.player_1
+        last_idx = self._board_state[-last_move_idx]
+        if last_idx != Board.NOT_MOVED:
+            self._hash ^= loc_keys[last_idx]
+        self._hash ^= (loc_keys[idx] ^ self._zobrist.blocked[idx] ^
+                       self._zobrist.initiative)
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def push_move(self, move):
+        """Move the active player to a specified location in-place, recording
+        what is needed to undo the move with pop_move().
+
+        Unlike forecast_move() this does not copy the board, so a search can
+        walk the game tree by pairing each push_move() with a pop_move().
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        self._move_stack.append(
+            self._board_state[-1 - int(self._active_player == self._player_2)])
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Undo the most recent move applied with push_move(). """
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        last_move_idx = int(self._active_player == self._player_2) + 1
+        loc_keys = self._zobrist.player_2 if last_move_idx == 2 else self._zobrist.player_1
+        idx = self._board_state[-last_move_idx]
+        last_idx = self._move_stack.pop()
+        if last_idx != Board.NOT_MOVED:
+            self._hash ^= loc_keys[last_idx]
+        self._hash ^= (loc_keys[idx] ^ self._zobrist.blocked[idx] ^
+                       self._zobrist.initiative)
+        self._board_state[idx] = Board.BLANK
+        self._board_state[-last_move_idx] = last_idx
+        self._board_state[-3] ^= 1
+        self.move_count -= 1
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self._has_moves(self._active_player)
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self._has_moves(self._active_player)
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +386,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self._has_moves(self._active_player):
 
             if player == self._inactive_player:
                 return float("inf")
@@ -247,18 +396,38 @@ class Board(object):
 
         return 0.
 
-    def __get_moves(self, loc):
+    def _location_index(self, player):
+        """Return the cell index of the player, or None if it has not moved.
+        """
+        if player == self._player_1:
+            return self._board_state[-1]
+        elif player == self._player_2:
+            return self._board_state[-2]
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _has_moves(self, player):
+        """Test whether the player has any legal move. """
+        idx = self._location_index(player)
+        state = self._board_state
+        if idx == Board.NOT_MOVED:
+            return Board.BLANK in state[:-3]
+        for i in self._neighbors[idx]:
+            if state[i] == Board.BLANK:
+                return True
+        return False
+
+    def __get_moves(self, idx):
         """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        knight in chess) from the cell with the given index.
         """
-        if loc == Board.NOT_MOVED:
+        if idx == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
+        state = self._board_state
+        coords = self._coords
+        valid_moves = [coords[i] for i in self._neighbors[idx]
+                       if state[i] == Board.BLANK]
         random.shuffle(valid_moves)
         return valid_moves
 
@@ -295,16 +464,25 @@ class Board(object):
 
         return out
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, node_limit=None):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
+        After each move is applied, the player that moves next is passed the
+        move through its `opponent_moved(move)` method, if it has one. When
+        the game ends, every player with a `game_over()` method is told.
+
         Parameters
         ----------
         time_limit : numeric (optional)
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        node_limit : int (optional)
+            If given, each turn is limited to this many search nodes instead
+            of `time_limit` milliseconds (see `NodeClock`), which makes the
+            outcome independent of the speed and load of the machine.
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
@@ -321,8 +499,11 @@ class Board(object):
             legal_player_moves = self.get_legal_moves()
             game_copy = self.copy()
 
-            move_start = time_millis()
-            time_left = lambda : time_limit - (time_millis() - move_start)
+            if node_limit is not None:
+                time_left = NodeClock(node_limit)
+            else:
+                move_start = time_millis()
+                time_left = lambda : time_limit - (time_millis() - move_start)
             curr_move = self._active_player.get_move(game_copy, time_left)
             move_end = time_left()
 
@@ -330,13 +511,30 @@ class Board(object):
                 curr_move = Board.NOT_MOVED
 
             if move_end < 0:
-                return self._inactive_player, move_history, "timeout"
+                return self._game_over(move_history, "timeout")
 
             if curr_move not in legal_player_moves:
                 if len(legal_player_moves) > 0:
-                    return self._inactive_player, move_history, "forfeit"
-                return self._inactive_player, move_history, "illegal move"
+                    return self._game_over(move_history, "forfeit")
+                return self._game_over(move_history, "illegal move")
 
             move_history.append(list(curr_move))
 
             self.apply_move(curr_move)
+
+            # tell the player that moves next which move was played, e.g., so
+            # that it can stop searching on its opponent's time
+            opponent_moved = getattr(self._active_player, "opponent_moved",
+                                     None)
+            if opponent_moved is not None:
+                opponent_moved(curr_move)
+
+    def _game_over(self, move_history, termination):
+        """Tell the players that the game played by `play` is over, e.g., so
+        that they stop searching on the opponent's time, and return its result.
+        """
+        for player in (self._player_1, self._player_2):
+            game_over = getattr(player, "game_over", None)
+            if game_over is not None:
+                game_over()
+        return self._inactive_player, move_history, termination
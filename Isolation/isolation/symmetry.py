@@ -0,0 +1,104 @@
+"""
+This file contains functions to map Isolation positions to a canonical
+representative of their symmetry class.
+
+Knight moves are preserved by every reflection and rotation of the board, so
+positions that are mirror images or rotations of each other have the same
+game value and symmetric best moves. A square board has the 8 symmetries of
+the dihedral group; a rectangular board has 4 (identity, the two reflections
+and the half turn). Caches such as opening books can store a single entry per
+class by keying positions with `canonical_form` and storing moves in the
+canonical frame.
+
+A transform is an integer index into `transforms(width, height)`.
+"""
+from .isolation import cell_coordinates, zobrist_keys
+
+_TRANSFORMS = {}
+
+
+def _transform_cell(t, r, c, width, height):
+    """Apply transform `t` to the cell (r, c). """
+    n, m = height - 1, width - 1
+    return [(r, c), (n - r, c), (r, m - c), (n - r, m - c),
+            (c, r), (c, n - r), (m - c, r), (m - c, n - r)][t]
+
+
+def transforms(width, height):
+    """Return the cell permutations of every symmetry of a board of the given
+    size, cached per board size.
+
+    Returns
+    -------
+    tuple<tuple<int>>
+        Entry `t` maps each cell index to the index of the cell it is moved to
+        by transform `t`. Entry 0 is the identity.
+    """
+    perms = _TRANSFORMS.get((width, height))
+    if perms is None:
+        num_transforms = 8 if width == height else 4
+        perms = _TRANSFORMS[(width, height)] = tuple(
+            tuple(r + c * height for r, c in (
+                _transform_cell(t, r, c, width, height)
+                for r, c in cell_coordinates(width, height)))
+            for t in range(num_transforms))
+    return perms
+
+
+def inverse_transform(t, width, height):
+    """Return the transform that undoes transform `t`. """
+    perms = transforms(width, height)
+    inverse = tuple(sorted(range(len(perms[t])), key=perms[t].__getitem__))
+    return perms.index(inverse)
+
+
+def transform_move(move, t, width, height):
+    """Apply transform `t` to a (row, column) move. """
+    idx = transforms(width, height)[t][move[0] + move[1] * height]
+    return (idx % height, idx // height)
+
+
+def canonical_form(game):
+    """Return the canonical hash of the position of `game` and the transform
+    that maps the position to its canonical representative.
+
+    The canonical hash is the smallest Zobrist hash (see `Board.hash`) among
+    all symmetric images of the position, so every position of a symmetry
+    class has the same canonical hash. A move `m` in the game corresponds to
+    `transform_move(m, t, width, height)` in the canonical representative,
+    and a canonical move maps back with the inverse transform.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The position to canonicalize.
+
+    Returns
+    -------
+    (int, int)
+        The canonical hash and the transform index.
+    """
+    width, height = game.width, game.height
+    keys = zobrist_keys(width, height)
+    if game.move_count % 2:
+        player_1, player_2 = game.inactive_player, game.active_player
+    else:
+        player_1, player_2 = game.active_player, game.inactive_player
+    open_cells = set(r + c * height for r, c in game.get_blank_spaces())
+    blocked = [idx for idx in range(width * height) if idx not in open_cells]
+    locs = [game.get_player_location(player_1),
+            game.get_player_location(player_2)]
+    locs = [None if loc is None else loc[0] + loc[1] * height for loc in locs]
+
+    best = None
+    for t, perm in enumerate(transforms(width, height)):
+        key = keys.initiative if game.move_count % 2 else 0
+        for idx in blocked:
+            key ^= keys.blocked[perm[idx]]
+        if locs[0] is not None:
+            key ^= keys.player_1[perm[locs[0]]]
+        if locs[1] is not None:
+            key ^= keys.player_2[perm[locs[1]]]
+        if best is None or key < best[0]:
+            best = (key, t)
+    return best
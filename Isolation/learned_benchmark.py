@@ -0,0 +1,121 @@
+"""Measure the evaluations per second of `learned_score.LearnedScore`.
+
+The model is run on the same set of random positions in batches of 1, 8 and
+64 positions (by default), from feature arrays through the final scores.
+Two more rows are shown for comparison. One calls the model as a `score_fn`
+on one board at a time. The other scores every child of each position with
+`LearnedScore.batch`, as `AlphaBetaPlayer` does with a `batch_score_fn`. The
+hand-written `improved_score` is shown as a reference.
+
+    python learned_benchmark.py --model model.npz
+"""
+import argparse
+import random
+
+from timeit import default_timer as timer
+
+import numpy as np
+
+from isolation import Board
+from learned_score import LearnedScore, game_blocked, game_cell
+from sample_players import improved_score
+
+
+def make_positions(num_positions, seed):
+    """Return random positions in which the player to move has legal moves. """
+    rng = random.Random(seed)
+    games = []
+    while len(games) < num_positions:
+        game = Board("Player1", "Player2")
+        for _ in range(rng.randrange(2, 30)):
+            if not game.get_legal_moves():
+                break
+            game.apply_move(rng.choice(game.get_legal_moves()))
+        if game.get_legal_moves():
+            games.append(game)
+    return games
+
+
+def position_arrays(games):
+    """Return the arrays `LearnedScore.score_positions` takes for the
+    positions, from the point of view of the player to move.
+    """
+    return (np.stack([game_blocked(game) for game in games]),
+            np.array([game_cell(game, game.active_player) for game in games]),
+            np.array([game_cell(game, game.inactive_player)
+                      for game in games]),
+            np.ones(len(games)))
+
+
+def rate(fn, evaluations, min_time=.5):
+    """Return the evaluations per second of `fn`, repeated for at least
+    `min_time` seconds.
+    """
+    runs = 0
+    start = timer()
+    while True:
+        fn()
+        runs += 1
+        elapsed = timer() - start
+        if elapsed >= min_time:
+            return runs * evaluations / elapsed
+
+
+def main(args):
+    if args.model is None:
+        model = LearnedScore.random([args.hidden] if args.hidden else [])
+    else:
+        model = LearnedScore.load(args.model)
+    games = make_positions(args.positions, args.seed)
+    arrays = position_arrays(games)
+    sizes = [size for size in args.batch if size <= len(games)]
+
+    def batches(size):
+        return [tuple(array[i:i + size] for array in arrays)
+                for i in range(0, len(games) - size + 1, size)]
+
+    print("{:<22}{:>14}{:>10}".format("Evaluation", "Evals/sec", "Speedup"))
+    print("-" * 46)
+    results = []
+    for size in sizes:
+        chunks = batches(size)
+        results.append(("batch of {}".format(size), rate(
+            lambda: [model.score_positions(*chunk) for chunk in chunks],
+            size * len(chunks), args.time)))
+
+    def score_boards(score_fn):
+        for game in games:
+            score_fn(game, game.active_player)
+
+    results.append(("score_fn", rate(lambda: score_boards(model),
+                                     len(games), args.time)))
+    children = sum(len(game.get_legal_moves()) for game in games)
+    results.append(("batch_score_fn", rate(
+        lambda: [model.batch(game, game.active_player,
+                             game.get_legal_moves()) for game in games],
+        children, args.time)))
+    results.append(("improved_score", rate(
+        lambda: score_boards(improved_score), len(games), args.time)))
+
+    baseline = results[0][1]
+    for name, evals in results:
+        print("{:<22}{:>14.0f}{:>9.2f}x".format(name, evals,
+                                                evals / baseline))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default=None,
+                        help="Model file written by learned_score.py "
+                             "(default: random weights)")
+    parser.add_argument('--hidden', type=int, default=32,
+                        help="Hidden units of the random model")
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 8, 64],
+                        help="Batch sizes to measure")
+    parser.add_argument('--positions', type=int, default=512,
+                        help="Number of random positions to score")
+    parser.add_argument('--time', type=float, default=.5,
+                        help="Seconds to run each measurement")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed used to generate the positions")
+    main(parser.parse_args())
@@ -0,0 +1,320 @@
+"""A learned evaluation function for Isolation with batched NumPy inference.
+
+`LearnedScore` is a small multilayer perceptron (a linear model when it has
+no hidden layer) over the following features of a position, seen from the
+player being scored:
+
+    blocked    one input per cell, 1 if the cell is blocked
+    own        one-hot cell of the player (all 0 before its first move)
+    opp        one-hot cell of the opponent (all 0 before its first move)
+    to_move    1 if the player is to move
+    own_moves  legal moves of the player / 8
+    opp_moves  legal moves of the opponent / 8
+
+Its output is the logit of the probability that the player wins, so it
+ranks positions like a heuristic and plugs in as a `score_fn`. Won and lost
+positions score +/-inf, like the hand-written heuristics. Inference is pure
+NumPy on a matrix of positions. The cost of a call is mostly interpreter and
+NumPy overhead, so `LearnedScore.batch` scores all children of a node in one
+call. Pass it as `batch_score_fn` so `AlphaBetaPlayer` batches the leaves of
+its search:
+
+    model = LearnedScore.load("model.npz")
+    AlphaBetaPlayer(score_fn=model, batch_score_fn=model.batch)
+
+Models are trained on the positions of a self-play position file (see
+`selfplay.py`), labeled with the outcome of their game:
+
+    python selfplay.py --games 5000 --output selfplay.pos
+    python learned_score.py selfplay.pos --hidden 32 --output model.npz
+
+`learned_benchmark.py` measures the evaluations per second.
+"""
+import argparse
+
+import numpy as np
+
+from isolation.isolation import knight_neighbors
+from selfplay import FILE_HEADER, NO_MOVE, read_chunks, read_header
+
+_TABLES = {}
+
+
+def board_tables(width, height):
+    """Return the knight-move adjacency matrix and identity matrix of a board
+    size, each with an extra last row so that the location -1 (a player
+    that has not moved yet) indexes "every cell" and "no cell".
+    """
+    tables = _TABLES.get((width, height))
+    if tables is None:
+        cells = width * height
+        adjacent = np.zeros((cells + 1, cells), dtype=bool)
+        for cell, neighbors in enumerate(knight_neighbors(width, height)):
+            adjacent[cell, list(neighbors)] = True
+        adjacent[cells] = True
+        identity = np.vstack([np.eye(cells, dtype=np.float32),
+                              np.zeros((1, cells), dtype=np.float32)])
+        tables = _TABLES[(width, height)] = (adjacent, identity)
+    return tables
+
+
+def position_features(blocked, own, opp, to_move, width=7, height=7):
+    """Return the features of a batch of positions.
+
+    Parameters
+    ----------
+    blocked : bool array (positions, cells)
+        The blocked cells of each position, by cell index (row + col *
+        height).
+
+    own, opp : int array (positions,)
+        The cells of the scored player and its opponent, or -1 before their
+        first move.
+
+    to_move : array (positions,)
+        1 if the scored player is to move, else 0.
+
+    Returns
+    -------
+    (float32 array (positions, features), int array, int array)
+        The features and the number of legal moves of the player and of its
+        opponent.
+    """
+    adjacent, identity = board_tables(width, height)
+    open_cells = ~blocked
+    own_moves = (adjacent[own] & open_cells).sum(axis=1)
+    opp_moves = (adjacent[opp] & open_cells).sum(axis=1)
+    features = np.hstack([
+        blocked.astype(np.float32), identity[own], identity[opp],
+        np.stack([to_move, own_moves / 8., opp_moves / 8.],
+                 axis=1).astype(np.float32)])
+    return features, own_moves, opp_moves
+
+
+def game_blocked(game):
+    """Return the blocked cells of `game` as a bool array by cell index. """
+    blocked = np.ones(game.width * game.height, dtype=bool)
+    for r, c in game.get_blank_spaces():
+        blocked[r + c * game.height] = False
+    return blocked
+
+
+def game_cell(game, player):
+    """Return the cell index of `player`, or -1 before its first move. """
+    loc = game.get_player_location(player)
+    return -1 if loc is None else loc[0] + loc[1] * game.height
+
+
+class LearnedScore:
+    """A heuristic computed by a multilayer perceptron with ReLU hidden
+    layers over `position_features`. Instances can be passed as `score_fn`
+    to any agent, and their `batch` method as `batch_score_fn` to
+    `AlphaBetaPlayer`.
+
+    Parameters
+    ----------
+    layers : list<(array, array)>
+        The weight matrix and bias of every layer; the last layer has one
+        output. A single layer is a linear model.
+
+    width, height : int (optional)
+        The board size the model was trained for.
+    """
+
+    def __init__(self, layers, width=7, height=7):
+        self.layers = [(np.asarray(w, dtype=np.float32),
+                        np.asarray(b, dtype=np.float32)) for w, b in layers]
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def random(cls, hidden=(32,), width=7, height=7, seed=0):
+        """Return a model with random weights, e.g. as a starting point for
+        training.
+        """
+        rng = np.random.default_rng(seed)
+        sizes = [3 * width * height + 3] + list(hidden) + [1]
+        layers = [(rng.normal(0., np.sqrt(2. / fan_in), (fan_in, fan_out)),
+                   np.zeros(fan_out))
+                  for fan_in, fan_out in zip(sizes[:-1], sizes[1:])]
+        return cls(layers, width, height)
+
+    def predict(self, features):
+        """Return the win logit of every row of a feature matrix. """
+        x = features
+        for w, b in self.layers[:-1]:
+            x = np.maximum(x @ w + b, 0.)
+        w, b = self.layers[-1]
+        return (x @ w + b)[:, 0]
+
+    def score_positions(self, blocked, own, opp, to_move):
+        """Score a batch of positions given as arrays (see
+        `position_features`), with +/-inf for won and lost positions.
+        """
+        features, own_moves, opp_moves = position_features(
+            blocked, own, opp, to_move, self.width, self.height)
+        scores = self.predict(features).astype(float)
+        to_move = np.asarray(to_move, dtype=bool)
+        scores[to_move & (own_moves == 0)] = float("-inf")
+        scores[~to_move & (opp_moves == 0)] = float("inf")
+        return scores
+
+    def __call__(self, game, player):
+        if game.is_loser(player):
+            return float("-inf")
+
+        if game.is_winner(player):
+            return float("inf")
+
+        return float(self.score_positions(
+            game_blocked(game)[None], np.array([game_cell(game, player)]),
+            np.array([game_cell(game, game.get_opponent(player))]),
+            np.array([player == game.active_player]))[0])
+
+    def batch(self, game, player, moves):
+        """Score the child of `game` reached by each of `moves` from the
+        point of view of `player` in one call (see `batch_scores.py`).
+        """
+        if not moves:
+            return []
+        cells = np.array([r + c * game.height for r, c in moves])
+        blocked = np.repeat(game_blocked(game)[None], len(cells), axis=0)
+        blocked[np.arange(len(cells)), cells] = True
+        other = np.full(len(cells), game_cell(game, game.inactive_player))
+        if player == game.active_player:
+            # the player made the move, and the opponent is to move
+            own, opp, to_move = cells, other, np.zeros(len(cells))
+        else:
+            own, opp, to_move = other, cells, np.ones(len(cells))
+        return self.score_positions(blocked, own, opp, to_move).tolist()
+
+    def save(self, path):
+        """Write the model to a NumPy .npz file. """
+        arrays = {"shape": np.array([self.width, self.height])}
+        for i, (w, b) in enumerate(self.layers):
+            arrays["w{}".format(i)] = w
+            arrays["b{}".format(i)] = b
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read a model written by `save`. """
+        with np.load(path) as data:
+            layers = [(data["w{}".format(i)], data["b{}".format(i)])
+                      for i in range(sum(key.startswith("w")
+                                         for key in data.files))]
+            width, height = data["shape"].tolist()
+        return cls(layers, width, height)
+
+
+def training_data(path):
+    """Return the features of every non-final position of a self-play
+    position file from the point of view of both players, and whether that
+    player won the game.
+    """
+    with open(path, "rb") as f:
+        _, _, width, height = read_header(f.read(FILE_HEADER.size), path)
+    cells = width * height
+    bits = np.arange(cells, dtype=np.uint64)
+    features, won = [], []
+    for chunk in read_chunks(path):
+        columns = {name: np.frombuffer(column, dtype=column.typecode)
+                   for name, column in chunk.items()}
+        keep = columns["move"] != NO_MOVE
+        blocked = ((columns["blocked"][keep, None] >> bits) & 1).astype(bool)
+        locations = np.stack([columns["player_1"][keep],
+                              columns["player_2"][keep]],
+                             axis=1).astype(np.int64)
+        mover = columns["ply"][keep] % 2
+        winner = columns["winner"][keep]
+        rows = np.arange(len(mover))
+        for seat, to_move in ((mover, 1), (1 - mover, 0)):
+            batch, _, _ = position_features(
+                blocked, locations[rows, seat], locations[rows, 1 - seat],
+                np.full(len(rows), to_move), width, height)
+            features.append(batch)
+            won.append(winner == seat)
+    return (np.concatenate(features), np.concatenate(won).astype(np.float32),
+            width, height)
+
+
+def train(features, won, hidden=(32,), width=7, height=7, epochs=20,
+          batch_size=256, learning_rate=1e-3, l2=1e-4, seed=0):
+    """Fit a `LearnedScore` to predict `won` from `features` by minimizing
+    the logistic loss with minibatch Adam.
+    """
+    model = LearnedScore.random(hidden, width, height, seed)
+    params = [p for layer in model.layers for p in layer]
+    moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+    rng = np.random.default_rng(seed)
+    beta_1, beta_2, step = .9, .999, 0
+    for epoch in range(epochs):
+        order = rng.permutation(len(features))
+        loss = 0.
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            x, y = features[idx], won[idx]
+
+            # forward pass, keeping the input of every layer
+            inputs = [x]
+            for w, b in model.layers[:-1]:
+                inputs.append(np.maximum(inputs[-1] @ w + b, 0.))
+            w, b = model.layers[-1]
+            logits = (inputs[-1] @ w + b)[:, 0]
+            p = 1. / (1. + np.exp(-logits))
+            loss += -np.sum(y * np.log(p + 1e-7) +
+                            (1 - y) * np.log(1 - p + 1e-7))
+
+            # backward pass
+            grad = ((p - y) / len(idx))[:, None].astype(np.float32)
+            grads = []
+            for i in reversed(range(len(model.layers))):
+                w, b = model.layers[i]
+                grads.append((inputs[i].T @ grad + l2 * w, grad.sum(axis=0)))
+                if i:
+                    grad = (grad @ w.T) * (inputs[i] > 0)
+            grads = [g for layer in reversed(grads) for g in layer]
+
+            step += 1
+            for param, g, (m, v) in zip(params, grads, moments):
+                m *= beta_1
+                m += (1 - beta_1) * g
+                v *= beta_2
+                v += (1 - beta_2) * g * g
+                m_hat = m / (1 - beta_1**step)
+                v_hat = v / (1 - beta_2**step)
+                param -= learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+        print("epoch {:>3}: loss {:.4f}".format(epoch + 1,
+                                                loss / len(features)))
+    return model
+
+
+def main(args):
+    features, won, width, height = training_data(args.path)
+    print("Training on {} positions from {}".format(len(won), args.path))
+    hidden = [args.hidden] if args.hidden else []
+    model = train(features, won, hidden, width, height, args.epochs,
+                  args.batch, args.lr, seed=args.seed)
+    accuracy = np.mean((model.predict(features) > 0) == (won > .5))
+    print("Training accuracy: {:.1%}".format(accuracy))
+    model.save(args.output)
+    print("Wrote {}".format(args.output))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path', help="Self-play position file to train on")
+    parser.add_argument('--hidden', type=int, default=32,
+                        help="Units in the hidden layer (0 for a linear "
+                             "model)")
+    parser.add_argument('--epochs', type=int, default=20,
+                        help="Passes over the training positions")
+    parser.add_argument('--batch', type=int, default=256,
+                        help="Positions per gradient step")
+    parser.add_argument('--lr', type=float, default=1e-3,
+                        help="Adam learning rate")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed for the initial weights")
+    parser.add_argument('--output', default="model.npz",
+                        help="File the trained model is written to")
+    main(parser.parse_args())
@@ -0,0 +1,141 @@
+"""This file contains move ordering for iterative deepening alpha-beta search.
+
+Alpha-beta prunes the most when the best move in each position is searched
+first. `MoveOrdering` sorts the legal moves of a node using, in priority
+order:
+
+    1. the principal-variation move found in the same position by the
+       previous iterative deepening pass
+    2. the best move stored in the transposition table (if any)
+    3. killer moves -- moves that caused a cutoff at the same ply
+    4. the history heuristic -- how often (weighted by depth) a move caused a
+       cutoff anywhere in the search
+    5. static mobility -- the number of open cells reachable from the move
+
+Any object with the same methods can be passed to `AlphaBetaPlayer` to plug
+in a different ordering.
+"""
+from collections import defaultdict
+
+from batch_scores import neighbor_cells
+
+PV_RANK = 3
+HASH_RANK = 2
+KILLER_RANK = 1
+
+
+def mobility(game, move):
+    """Return the number of open cells a knight could move to from `move`. """
+    return sum(game.move_is_legal(cell)
+               for cell in neighbor_cells(game.width, game.height)[move])
+
+
+class MoveOrdering:
+    """Order the moves searched by alpha-beta.
+
+    Parameters
+    ----------
+    pv : bool (optional)
+        Search the principal-variation move from the previous iteration first.
+
+    killers : bool (optional)
+        Search killer moves for the current ply early.
+
+    history : bool (optional)
+        Sort the remaining moves by the history heuristic.
+
+    mobility : bool (optional)
+        Break ties by the static mobility of the destination cell.
+
+    num_killers : int (optional)
+        The number of killer moves remembered per ply.
+    """
+
+    def __init__(self, pv=True, killers=True, history=True, mobility=True,
+                 num_killers=2):
+        self.use_pv = pv
+        self.use_killers = killers
+        self.use_history = history
+        self.use_mobility = mobility
+        self.num_killers = num_killers
+        self._history = defaultdict(int)
+        self._killers = defaultdict(list)
+        self._pv = {}
+        self._next_pv = {}
+
+    def new_search(self):
+        """Prepare for the search of a new root position. Killers are tied to
+        the plies of the previous search, so they are dropped, while history
+        scores are aged so that recent cutoffs dominate.
+        """
+        self._killers.clear()
+        for key in self._history:
+            self._history[key] >>= 1
+        self._pv = {}
+        self._next_pv = {}
+
+    def new_iteration(self):
+        """Start the next iterative deepening pass, making the principal
+        variation recorded during the last pass available to `order`.
+        """
+        if self._next_pv:
+            self._pv = self._next_pv
+        self._next_pv = {}
+
+    def order(self, game, moves, ply, hash_move=None):
+        """Return `moves` sorted from most to least promising.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The position the moves are legal in.
+
+        moves : list<(int, int)>
+            The legal moves of the active player.
+
+        ply : int
+            The distance of the position from the root of the search.
+
+        hash_move : (int, int) (optional)
+            The best move stored for the position in a transposition table.
+        """
+        if len(moves) < 2:
+            return moves
+        pv_move = self._pv.get(game.hash()) if self.use_pv else None
+        killers = self._killers[ply] if self.use_killers else ()
+        history = self._history
+        seat = game.move_count & 1
+
+        def priority(move):
+            if move == pv_move:
+                rank = PV_RANK
+            elif move == hash_move:
+                rank = HASH_RANK
+            elif move in killers:
+                rank = KILLER_RANK
+            else:
+                rank = 0
+            return (rank,
+                    history[(seat, move)] if self.use_history else 0,
+                    mobility(game, move) if self.use_mobility else 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def cutoff(self, game, move, ply, depth):
+        """Record that `move` caused a cutoff in `game` at the given ply with
+        `depth` plies left to search.
+        """
+        if self.use_killers:
+            killers = self._killers[ply]
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[self.num_killers:]
+        if self.use_history:
+            self._history[(game.move_count & 1, move)] += depth * depth
+
+    def best_move(self, game, move):
+        """Record `move` as the principal-variation move of `game`, which is
+        called for every node whose value was exact in the current pass.
+        """
+        if self.use_pv:
+            self._next_pv[game.hash()] = move
@@ -0,0 +1,198 @@
+"""Build and read opening books for Isolation.
+
+An opening book maps every position of the first few plies of a game to the
+move chosen for it by a deep offline search, so that an agent can play those
+plies instantly instead of searching positions it has seen thousands of
+times.
+
+The book is stored as a single open-addressing hash table that is read
+through `mmap` without loading or parsing it: a fixed header followed by a
+power-of-two number of 10-byte slots, each holding a 64-bit position key and
+the index of the book move. Looking up a position reads one or a few slots.
+
+Positions are keyed by `isolation.symmetry.canonical_form`, so mirror images
+and rotations of a position share one entry whose move is stored in the frame
+of the canonical representative, and lookups map it back to the queried
+position.
+
+Build a book with, e.g.:
+
+    python opening_book.py --plies 3 --depth 7 --workers 4 book.bin
+"""
+import argparse
+import mmap
+import struct
+
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+from isolation import BitBoard
+from isolation.symmetry import (canonical_form, inverse_transform,
+                                transform_move)
+from game_agent import AlphaBetaPlayer, custom_score
+from move_ordering import MoveOrdering
+from transposition import TranspositionTable
+
+MAGIC = b"ISOB"
+VERSION = 2
+
+# magic, version, width, height, number of plies, number of slots
+HEADER = struct.Struct("<4sHHHHQ")
+# canonical position key, move index in the canonical frame
+SLOT = struct.Struct("<QH")
+EMPTY = 0xFFFF
+
+
+def book_positions(max_ply, width=7, height=7):
+    """Return one move sequence reaching each position, up to symmetry, in
+    which fewer than `max_ply` moves have been played.
+    """
+    positions = {}
+    frontier = [[]]
+    for ply in range(max_ply):
+        next_frontier = []
+        for moves in frontier:
+            game = BitBoard("Player1", "Player2", width, height)
+            for move in moves:
+                game.apply_move(move)
+            key, _ = canonical_form(game)
+            if key in positions:
+                continue
+            positions[key] = moves
+            if ply + 1 < max_ply:
+                next_frontier.extend(moves + [move] for move
+                                     in sorted(game.get_legal_moves()))
+        frontier = next_frontier
+    return list(positions.values())
+
+
+def search_position(moves, depth, width=7, height=7, score_fn=custom_score):
+    """Search the position reached by `moves` to a fixed depth and return its
+    canonical key and the index of the best move in the canonical frame, or
+    None if the position is lost.
+    """
+    player = AlphaBetaPlayer(score_fn=score_fn, max_depth=depth,
+                             tt=TranspositionTable(), ordering=MoveOrdering())
+    if len(moves) % 2:
+        game = BitBoard("Opponent", player, width, height)
+    else:
+        game = BitBoard(player, "Opponent", width, height)
+    for move in moves:
+        game.apply_move(move)
+    move = player.get_move(game, lambda: float("inf"))
+    if move == (-1, -1):
+        return None
+    key, transform = canonical_form(game)
+    move = transform_move(move, transform, width, height)
+    return key, move[0] + move[1] * height
+
+
+def write_book(path, entries, width, height, max_ply):
+    """Write (key, move index) pairs to an opening book file. """
+    capacity = 1
+    while capacity < 2 * len(entries):
+        capacity *= 2
+    data = bytearray(HEADER.size + capacity * SLOT.size)
+    HEADER.pack_into(data, 0, MAGIC, VERSION, width, height, max_ply,
+                     capacity)
+    data[HEADER.size:] = SLOT.pack(0, EMPTY) * capacity
+    for key, move in entries:
+        slot = key & (capacity - 1)
+        while SLOT.unpack_from(data, HEADER.size + slot * SLOT.size)[1] != EMPTY:
+            slot = (slot + 1) & (capacity - 1)
+        SLOT.pack_into(data, HEADER.size + slot * SLOT.size, key, move)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def build_book(path, max_ply, depth, workers=1, width=7, height=7):
+    """Search every position of the first `max_ply` plies and write the
+    resulting opening book to `path`. Returns the number of entries.
+    """
+    positions = book_positions(max_ply, width, height)
+    args = [positions, [depth] * len(positions), [width] * len(positions),
+            [height] * len(positions)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(search_position, *args,
+                                        chunksize=16))
+    else:
+        results = list(map(search_position, *args))
+    entries = [result for result in results if result is not None]
+    write_book(path, entries, width, height, max_ply)
+    return len(entries)
+
+
+class OpeningBook:
+    """Read-only view of an opening book file.
+
+    Parameters
+    ----------
+    path : str
+        The path of a book written by `build_book`.
+
+    Attributes
+    ----------
+    max_ply : int
+        The book holds moves for positions with fewer than `max_ply` moves.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.width, self.height, self.max_ply, \
+            self._capacity = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not an opening book file.".format(path))
+
+    def lookup(self, game):
+        """Return the book move for the position of `game`, or None if the
+        position is not in the book.
+        """
+        if (game.move_count >= self.max_ply or game.width != self.width or
+                game.height != self.height):
+            return None
+        key, transform = canonical_form(game)
+        slot = key & (self._capacity - 1)
+        while True:
+            slot_key, move = SLOT.unpack_from(
+                self._data, HEADER.size + slot * SLOT.size)
+            if move == EMPTY:
+                return None
+            if slot_key == key:
+                return transform_move(
+                    (move % self.height, move // self.height),
+                    inverse_transform(transform, self.width, self.height),
+                    self.width, self.height)
+            slot = (slot + 1) & (self._capacity - 1)
+
+    def __len__(self):
+        return sum(SLOT.unpack_from(self._data,
+                                    HEADER.size + slot * SLOT.size)[1] != EMPTY
+                   for slot in range(self._capacity))
+
+    def close(self):
+        self._data.close()
+
+
+def main(args):
+    start = timer()
+    count = build_book(args.output, args.plies, args.depth, args.workers,
+                       args.width, args.height)
+    print("Wrote {} positions to {} in {:.1f}s".format(
+        count, args.output, timer() - start))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build an opening book by deep offline search.")
+    parser.add_argument('output', help="Path of the book file to write")
+    parser.add_argument('--plies', type=int, default=3,
+                        help="Cover positions with fewer than this many moves")
+    parser.add_argument('--depth', type=int, default=7,
+                        help="Search depth used for every book position")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of processes searching positions")
+    parser.add_argument('--width', type=int, default=7)
+    parser.add_argument('--height', type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,98 @@
+"""Measure the speedup of root-parallel alpha-beta search.
+
+Every configuration searches the same random opening positions, first to a
+fixed depth without a time limit (reporting the wall-clock time and the
+speedup over sequential `AlphaBetaPlayer` search), then under a per-move time
+limit (reporting the average depth completed). The worker pools are started
+before timing, so process startup is not included.
+"""
+import argparse
+import os
+
+from timeit import default_timer as timer
+
+from isolation import Board
+from sample_players import improved_score
+from game_agent import AlphaBetaPlayer
+from parallel_search import ParallelAlphaBetaPlayer
+from search_report import make_positions
+
+WORKERS = [1, 2, 4, 8, 16]
+
+
+def build_game(player, moves):
+    if len(moves) % 2:
+        game = Board("Opponent", player)
+    else:
+        game = Board(player, "Opponent")
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+def run(player, positions, time_limit):
+    """Search every position and return the total time, nodes and depth. """
+    seconds, nodes, depth = 0., 0, 0
+    for moves in positions:
+        game = build_game(player, moves)
+        start = timer()
+        player.get_move(game, lambda: time_limit - 1000 * (timer() - start))
+        seconds += timer() - start
+        nodes += player.nodes
+        if isinstance(player, ParallelAlphaBetaPlayer):
+            depth += player.depth
+        elif player.iteration_stats:
+            depth += player.iteration_stats[-1]["depth"]
+    return seconds, nodes, depth
+
+
+def main(args):
+    positions = make_positions(args.positions, args.plies, args.seed)
+    print("CPU cores available: {}".format(os.cpu_count()))
+    print("Fixed depth: {}, time limit: {} ms\n".format(args.depth,
+                                                        args.time))
+    print("{:^12}{:^12}{:^12}{:^10}{:^12}".format(
+        "Workers", "Seconds", "Nodes", "Speedup", "Depth"))
+    print("-" * 58)
+
+    configs = [("Sequential", lambda **kw: AlphaBetaPlayer(
+        score_fn=improved_score, **kw))]
+    configs += [(str(workers), lambda workers=workers, **kw:
+                 ParallelAlphaBetaPlayer(workers, score_fn=improved_score,
+                                         **kw))
+                for workers in args.workers]
+    baseline = None
+    for name, make_player in configs:
+        fixed = make_player(max_depth=args.depth)
+        timed = make_player()
+        # start the worker pools before timing
+        run(fixed, positions[:1], float("inf"))
+        run(timed, positions[:1], args.time)
+
+        seconds, nodes, _ = run(fixed, positions, float("inf"))
+        _, _, depth = run(timed, positions, args.time)
+        if baseline is None:
+            baseline = seconds
+        print("{:^12}{:^12.2f}{:^12d}{:^10.2f}{:^12.2f}".format(
+            name, seconds, nodes, baseline / seconds,
+            depth / len(positions)))
+        for player in (fixed, timed):
+            if isinstance(player, ParallelAlphaBetaPlayer):
+                player.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=WORKERS,
+                        help="Numbers of worker processes to compare")
+    parser.add_argument('--positions', type=int, default=5,
+                        help="Number of random opening positions to search")
+    parser.add_argument('--plies', type=int, default=4,
+                        help="Number of random moves played in each position")
+    parser.add_argument('--depth', type=int, default=6,
+                        help="Depth of the fixed-depth searches")
+    parser.add_argument('--time', type=float, default=500.,
+                        help="Time limit (ms) of the timed searches")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed used to generate the positions")
+    main(parser.parse_args())
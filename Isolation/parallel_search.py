@@ -0,0 +1,316 @@
+"""Root-parallel iterative deepening alpha-beta search for Isolation.
+
+`ParallelAlphaBetaPlayer` splits the legal moves at the root between the
+processes of a pool. Every worker runs iterative deepening alpha-beta over
+its share of the root moves until the deadline of the move, and reports the
+best move and value of its share for every depth it completed. The parent
+then picks the best move of the deepest depth that all workers completed, so
+the result is the same as a sequential search to that depth.
+
+Run `python parallel_benchmark.py` to measure the speedup over sequential
+search for different numbers of workers.
+"""
+import copy
+
+from concurrent.futures import ProcessPoolExecutor, wait
+from timeit import default_timer as timer
+
+from game_agent import AlphaBetaPlayer, SearchTimeout, SEAT_KEY, custom_score
+from transposition import TranspositionTable
+
+# the transposition table of a worker process, kept between moves
+_worker_tt = None
+
+
+def detach_opponent(game, player=None):
+    """Return a copy of `game` in which the inactive player is replaced by a
+    placeholder, so that the position can be sent to a worker process without
+    pickling the opponent (which may hold, e.g., an unpicklable clock). If
+    `player` is given, it replaces the active player.
+    """
+    game = game.copy()
+    active, opponent = game.active_player, game.inactive_player
+    for name in ("_player_1", "_player_2", "_active_player",
+                 "_inactive_player"):
+        if getattr(game, name) is opponent:
+            setattr(game, name, "Opponent")
+        elif player is not None and getattr(game, name) is active:
+            setattr(game, name, player)
+    return game
+
+
+def search_root_moves(game, moves, deadline, tt_entries=None):
+    """Run iterative deepening alpha-beta in a worker process over the given
+    root moves of `game`, whose active player is the searching
+    `ParallelAlphaBetaPlayer`.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The root position.
+
+    moves : list<(int, int)>
+        The share of the legal root moves searched by this worker.
+
+    deadline : float
+        The `timeit.default_timer()` time at which the search must stop, set
+        by the parent when it submits the task. The timer is system-wide, so
+        a task that starts late gets only the time left until the deadline.
+
+    tt_entries : int (optional)
+        If given, search with the transposition table of the worker process,
+        which has this many entries and is kept between moves.
+
+    Returns
+    -------
+    (list<((int, int), float)>, dict)
+        The best move and value among `moves` for each completed depth,
+        starting at depth 1, and the `nodes`, `leaf_evals`, `cutoffs`,
+        `tt_probes` and `tt_hits` counted by the worker.
+    """
+    global _worker_tt
+    player = game.active_player
+    player.time_left = lambda: 1000. * (deadline - timer())
+    if tt_entries is not None:
+        if _worker_tt is None or _worker_tt.size != tt_entries:
+            _worker_tt = TranspositionTable(tt_entries)
+        player.tt = _worker_tt
+    player.nodes = 0
+    player.leaf_evals = 0
+    player.cutoffs = 0
+    tt_counts = (0, 0)
+    if player.tt is not None:
+        player.tt.new_search()
+        tt_counts = (player.tt.probes, player.tt.hits)
+    if player.ordering is not None:
+        player.ordering.new_search()
+
+    results = []
+    depth = 1
+    while player.max_depth is None or depth <= player.max_depth:
+        try:
+            best_move, best_value = player.search_moves(game, depth, moves)
+        except SearchTimeout:
+            break
+        results.append((best_move, best_value))
+        # search the best move of this depth first in the next one
+        moves = [best_move] + [move for move in moves if move != best_move]
+        depth += 1
+    counts = {"nodes": player.nodes, "leaf_evals": player.leaf_evals,
+              "cutoffs": player.cutoffs, "tt_probes": 0, "tt_hits": 0}
+    if player.tt is not None:
+        counts["tt_probes"] = player.tt.probes - tt_counts[0]
+        counts["tt_hits"] = player.tt.hits - tt_counts[1]
+    return results, counts
+
+
+class ParallelAlphaBetaPlayer(AlphaBetaPlayer):
+    """Game-playing agent that splits iterative deepening alpha-beta search
+    at the root between the processes of a pool.
+
+    The pool is started on the first call to get_move() and kept for the
+    following moves. It is not copied or pickled with the player, so copies
+    of the player (e.g., the per-game copies made by `tournament.py`) start
+    their own pool.
+
+    The player's transposition table is not sent to the workers. If `tt` is
+    given, every worker process keeps its own table of the same size between
+    moves instead, so the tasks pickle the same amount of data every move.
+
+    If a worker has not completed a depth when the others are collected, the
+    best of its root moves by the score of the child position (as when no
+    worker completed a search) is compared with the values of the others.
+
+    A `stats` collector stays in the parent process, which records the
+    counters of all workers added up, without per-iteration entries. The
+    player does not ponder, so `ponder` must be False.
+
+    Parameters
+    ----------
+    workers : int (optional)
+        The number of worker processes.
+
+    margin : float (optional)
+        Time (in milliseconds) reserved for sending the position to the
+        workers and collecting their results, in addition to `timeout`.
+
+    All other parameters are passed to `AlphaBetaPlayer` and configure the
+    search run by every worker.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of nodes searched by all workers during the last call to
+        get_move().
+
+    depth : int
+        The deepest depth completed by all workers that completed a depth
+        during the last call to get_move(), or 0 if none did.
+    """
+
+    def __init__(self, workers=4, search_depth=3, score_fn=custom_score,
+                 timeout=10., margin=20., **kwargs):
+        super().__init__(search_depth, score_fn, timeout, **kwargs)
+        if self.ponder:
+            raise ValueError("ParallelAlphaBetaPlayer does not ponder.")
+        self.workers = workers
+        self.margin = margin
+        self.depth = 0
+        self._executor = None
+        self._tt_counts = [0, 0]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_executor"] = None
+        state["time_left"] = None
+        return state
+
+    def close(self):
+        """Shut down the worker processes. """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def get_move(self, game, time_left):
+        self.time_left = time_left
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.cutoffs = 0
+        self.depth = 0
+        self._tt_counts = [0, 0]
+        budget = time_left()
+        self.time_stats = {"budget": budget, "stop": "timeout",
+                           "partial": False}
+
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return self._finish(game, (-1, -1))
+        if self.endgame is not None:
+            solution = self.endgame.solve(
+                game, time_left,
+                (budget + self.TIMER_THRESHOLD + self.margin) / 2)
+            if solution is not None:
+                self.time_stats["stop"] = "solved"
+                return self._finish(game, solution[0])
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        time_limit = time_left() - self.TIMER_THRESHOLD - self.margin
+        if time_limit <= 0:
+            return self._finish(game, self.fallback_move(game, legal_moves))
+        deadline = timer() + time_limit / 1000.
+        num_workers = min(self.workers, len(legal_moves))
+        worker = copy.copy(self)
+        worker.tt = None
+        # the collector stays in this process, which records the move
+        worker.stats = None
+        position = detach_opponent(game, worker)
+        tt_entries = self.tt.size if self.tt is not None else None
+        futures = [self._executor.submit(search_root_moves, position,
+                                         legal_moves[i::num_workers],
+                                         deadline, tt_entries)
+                   for i in range(num_workers)]
+        remaining = time_left() - self.TIMER_THRESHOLD
+        done, _ = wait(futures, timeout=None if remaining == float("inf")
+                       else max(remaining, 0) / 1000.)
+
+        results = []
+        late_moves = []
+        for i, future in enumerate(futures):
+            if future in done:
+                depths, counts = future.result()
+                self._add_counts(counts)
+                if depths:
+                    results.append(depths)
+                    continue
+            else:
+                # a task that has not started yet is dropped, and a running
+                # one stops at the deadline
+                future.cancel()
+            late_moves.extend(legal_moves[i::num_workers])
+        if results:
+            self.depth = min(len(depths) for depths in results)
+            if (self.max_depth is not None and not late_moves and
+                    self.depth == self.max_depth):
+                self.time_stats["stop"] = "max_depth"
+        return self._finish(game, self.best_root_move(
+            game, [depths[self.depth - 1] for depths in results],
+            late_moves))
+
+    def best_root_move(self, game, candidates, late_moves):
+        """Return the best root move, given the best move and value of every
+        worker that completed a depth and the root moves of the workers that
+        did not.
+
+        The late moves have no search value, so the best of them by the score
+        of the child position is compared with the candidates instead of
+        being left out.
+        """
+        candidates = list(candidates)
+        if late_moves:
+            move = self.fallback_move(game, late_moves)
+            candidates.append(
+                (move, self.score(game.forecast_move(move), self)))
+        best_move, best_value = None, float("-inf")
+        for move, value in candidates:
+            if best_move is None or value > best_value:
+                best_move, best_value = move, value
+        return best_move
+
+    def _add_counts(self, counts):
+        """Add the counters returned by a worker to those of the move. """
+        self.nodes += counts["nodes"]
+        self.leaf_evals += counts["leaf_evals"]
+        self.cutoffs += counts["cutoffs"]
+        self._tt_counts[0] += counts["tt_probes"]
+        self._tt_counts[1] += counts["tt_hits"]
+
+    def _finish(self, game, move):
+        """Complete `time_stats`, append the record of the move to `stats`
+        if given, and return `move`.
+        """
+        self.time_stats["used"] = (self.time_stats["budget"] -
+                                   self.time_left())
+        if self.stats is not None:
+            self.stats.record(ply=game.move_count, move=move,
+                              nodes=self.nodes, leaf_evals=self.leaf_evals,
+                              cutoffs=self.cutoffs, depth=self.depth,
+                              iterations=[], time=self.time_stats["used"],
+                              stop=self.time_stats["stop"],
+                              tt_probes=self._tt_counts[0],
+                              tt_hits=self._tt_counts[1])
+        return move
+
+    def fallback_move(self, game, legal_moves):
+        """Return the legal move whose child position scores best, for when
+        no worker completed a search in time.
+        """
+        return max(legal_moves, key=lambda move: self.score(
+            game.forecast_move(move), self))
+
+    def search_moves(self, game, depth, moves):
+        """Search the given root moves of `game` to a fixed depth and return
+        the best of them and its value.
+        """
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+        self._seat_key = SEAT_KEY if game.move_count & 1 else 0
+        self._root_depth = depth
+        if self.ordering is not None:
+            self.ordering.new_iteration()
+        self.nodes += 1
+
+        best_move, best_value = moves[0], float("-inf")
+        for move in moves:
+            if self.in_place:
+                game.push_move(move)
+                try:
+                    score = self.ab_move(game, depth - 1, best_value)[1]
+                finally:
+                    game.pop_move()
+            else:
+                score = self.ab_move(game.forecast_move(move), depth - 1,
+                                     best_value)[1]
+            if score > best_value:
+                best_move, best_value = move, score
+        return best_move, best_value
@@ -0,0 +1,116 @@
+"""Shared plumbing of the append-only binary files of `game_record.py` and
+`selfplay.py`.
+
+Both kinds of file start with the same file header (magic, format version,
+board width and height), which is followed by the records of the format. A
+writer creates the file with its header, or checks the header of an existing
+file before it appends to it.
+"""
+import os
+import struct
+
+# magic, version, width, height
+FILE_HEADER = struct.Struct("<4sHBB")
+
+
+class FileFormat:
+    """The magic bytes, version and description of a file format.
+
+    Parameters
+    ----------
+    magic : bytes
+        The four bytes every file of the format starts with.
+
+    version : int
+        The version of the format written by this code.
+
+    description : str
+        The name of the format used in error messages, e.g., "game record
+        file".
+    """
+
+    def __init__(self, magic, version, description):
+        self.magic = magic
+        self.version = version
+        self.description = description
+
+    def pack_header(self, width, height):
+        """Return the file header of a file of this format. """
+        return FILE_HEADER.pack(self.magic, self.version, width, height)
+
+    def read_header(self, data, path=""):
+        """Unpack and check a file header. """
+        if len(data) < FILE_HEADER.size:
+            raise ValueError("{} is not a {}.".format(path, self.description))
+        header = FILE_HEADER.unpack_from(data, 0)
+        if header[0] != self.magic or header[1] != self.version:
+            raise ValueError("{} is not a {}.".format(path, self.description))
+        return header
+
+
+class RecordWriter:
+    """Base class of the writers that append records to a file, creating it
+    if needed.
+
+    Parameters
+    ----------
+    path : str
+        The file to append to. An existing file must have the same format
+        and have been written for the same board size.
+
+    file_format : `FileFormat`
+        The format of the file.
+
+    width, height : int
+        The board size of the games.
+
+    extra : bytes (optional)
+        Format-specific fields written after the file header of a new file.
+        Subclasses may rewrite them in place (see `write_at`).
+    """
+
+    def __init__(self, path, file_format, width, height, extra=b""):
+        self.width = width
+        self.height = height
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            header = file_format.read_header(
+                self._file.read(FILE_HEADER.size), path)
+            if header[2:] != (width, height):
+                self._file.close()
+                raise ValueError("{} holds games of a different board "
+                                 "size.".format(path))
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file.write(file_format.pack_header(width, height) + extra)
+
+    def append(self, data):
+        """Append bytes to the end of the file. """
+        self._file.write(data)
+
+    def write_at(self, offset, data):
+        """Overwrite bytes of the file at `offset`, then go back to the end.
+        """
+        self._file.seek(offset)
+        self._file.write(data)
+        self._file.seek(0, os.SEEK_END)
+
+    def read_at(self, offset, size):
+        """Return `size` bytes of the file starting at `offset`. """
+        self._file.seek(offset)
+        data = self._file.read(size)
+        self._file.seek(0, os.SEEK_END)
+        return data
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,233 @@
+"""Guard `isolation.Board`, `isolation.BitBoard` and `AlphaBetaPlayer` against
+correctness and speed regressions.
+
+Every benchmark runs on the same fixed positions (an opening, a midgame and a
+near-endgame position built with `apply_move`) for both board engines:
+
+    perft           leaf positions at a fixed depth, walked with
+                    `get_legal_moves` and `forecast_move`; the counts are
+                    known, so a wrong count means move generation is broken
+    perft_in_place  the same walk with `push_move`/`pop_move`
+    legal_moves     `get_legal_moves` calls per second
+    forecast_move   `forecast_move` calls per second
+    search          fixed-depth `AlphaBetaPlayer.alphabeta` with
+                    `improved_score`; the root value does not depend on the
+                    move order, so it must not change either
+
+Timings are the best of `--repeat` runs. The results are printed and can be
+written to a JSON file, and a later run compared against it:
+
+    python regression_benchmark.py --output before.json
+    python regression_benchmark.py --compare before.json
+
+The script exits with status 1 if a perft count or search value is wrong.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+
+from collections import namedtuple
+from timeit import default_timer as timer
+
+from board_benchmark import ENGINES, NodeCounter, build_game
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+Position = namedtuple("Position", ["name", "moves", "perft_depth",
+                                   "perft_count", "search_depth",
+                                   "search_value"])
+
+POSITIONS = [
+    Position("opening", [(1, 5), (4, 1)], 6, 9663, 7, 1.),
+    Position("midgame", [(3, 0), (2, 6), (2, 2), (0, 5), (4, 3), (2, 4),
+                         (6, 2), (0, 3), (4, 1), (1, 5), (3, 3), (2, 3),
+                         (5, 4), (0, 2)], 10, 17762, 9, 0.),
+    Position("endgame", [(2, 3), (2, 1), (1, 1), (0, 2), (0, 3), (1, 4),
+                         (1, 5), (3, 5), (3, 6), (1, 6), (4, 4), (0, 4),
+                         (6, 5), (2, 5), (5, 3), (3, 3), (3, 2), (4, 1),
+                         (1, 3), (2, 2), (0, 1), (3, 0), (2, 0), (4, 2),
+                         (1, 2), (3, 4), (2, 4), (2, 6)], 10, 6, 12,
+             float("inf")),
+]
+
+CALLS = 20000  # number of calls timed by the move generation benchmarks
+
+
+def perft(game, depth):
+    """Count the positions exactly `depth` moves below `game`. """
+    if depth == 0:
+        return 1
+    return sum(perft(game.forecast_move(move), depth - 1)
+               for move in game.get_legal_moves())
+
+
+def perft_in_place(game, depth):
+    """Count the positions exactly `depth` moves below `game` by applying
+    and undoing moves on the board.
+    """
+    if depth == 0:
+        return 1
+    count = 0
+    for move in game.get_legal_moves():
+        game.push_move(move)
+        count += perft_in_place(game, depth - 1)
+        game.pop_move()
+    return count
+
+
+def best_time(fn, repeat):
+    """Return the result of `fn()` and its fastest time over `repeat` runs. """
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = timer()
+        result = fn()
+        seconds = min(seconds, timer() - start)
+    return result, seconds
+
+
+def bench_legal_moves(game, calls):
+    for _ in range(calls):
+        game.get_legal_moves()
+    return calls
+
+
+def bench_forecast_move(game, calls):
+    moves = game.get_legal_moves()
+    for i in range(calls):
+        game.forecast_move(moves[i % len(moves)])
+    return calls
+
+
+def bench_search(engine, position, seed):
+    """Search the position to its search depth and return the number of
+    nodes, the best move and the root value.
+    """
+    # the board engines shuffle the legal moves, so seed the shuffles to
+    # search the same tree in every run
+    random.seed(seed)
+    player = AlphaBetaPlayer(score_fn=improved_score)
+    game = build_game(engine, position.moves, player, "Opponent")
+    if game.active_player != player:
+        game = build_game(engine, position.moves, "Opponent", player)
+    player.time_left = NodeCounter()
+    move = player.alphabeta(game, position.search_depth)
+    return player.time_left.calls, move, player.root_value
+
+
+def run(repeat, seed):
+    """Run every benchmark on every engine and position.
+
+    Returns
+    -------
+    list<dict>
+        One result per (engine, position, benchmark) with the `count` of
+        leaves, calls or nodes, the best time in `seconds`, the count
+        `per_sec`, and `ok` (False if a perft count or search value is
+        wrong).
+    """
+    results = []
+    for engine_name, engine in ENGINES:
+        for position in POSITIONS:
+            def game():
+                return build_game(engine, position.moves)
+
+            def add(benchmark, count, seconds, ok=True, **fields):
+                results.append(dict(engine=engine_name,
+                                    position=position.name,
+                                    benchmark=benchmark, count=count,
+                                    seconds=seconds,
+                                    per_sec=count / seconds if seconds
+                                    else 0., ok=ok, **fields))
+
+            for name, walk in [("perft", perft),
+                               ("perft_in_place", perft_in_place)]:
+                board = game()
+                count, seconds = best_time(
+                    lambda: walk(board, position.perft_depth), repeat)
+                add(name, count, seconds, count == position.perft_count,
+                    depth=position.perft_depth)
+
+            for name, bench in [("legal_moves", bench_legal_moves),
+                                ("forecast_move", bench_forecast_move)]:
+                board = game()
+                count, seconds = best_time(lambda: bench(board, CALLS),
+                                           repeat)
+                add(name, count, seconds)
+
+            (nodes, move, value), seconds = best_time(
+                lambda: bench_search(engine, position, seed), repeat)
+            add("search", nodes, seconds, value == position.search_value,
+                depth=position.search_depth, move=move, value=value)
+    return results
+
+
+def git_commit():
+    """Return the hash of the checked out commit, or None outside git. """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result):
+    return result["engine"], result["position"], result["benchmark"]
+
+
+def print_results(results, baseline=None):
+    """Print the results, with the speed relative to a previous run's
+    results if `baseline` is given.
+    """
+    previous = {result_key(result): result for result in baseline or []}
+    print("{:<10}{:<9}{:<16}{:>10}{:>10}{:>13}{:>9}".format(
+        "Engine", "Position", "Benchmark", "Count", "ms", "Per sec",
+        "Speedup" if baseline is not None else ""))
+    print("-" * 77)
+    for result in results:
+        old = previous.get(result_key(result))
+        speedup = ""
+        if old is not None and old["per_sec"]:
+            speedup = "{:.2f}x".format(result["per_sec"] / old["per_sec"])
+        print("{:<10}{:<9}{:<16}{:>10}{:>10.1f}{:>13.0f}{:>9}{}".format(
+            result["engine"], result["position"], result["benchmark"],
+            result["count"], 1000 * result["seconds"], result["per_sec"],
+            speedup, "" if result["ok"] else "  WRONG"))
+
+
+def main(args):
+    results = run(args.repeat, args.seed)
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({"commit": git_commit(),
+                       "python": platform.python_version(),
+                       "repeat": args.repeat, "seed": args.seed,
+                       "results": results}, f, indent=2)
+
+    failures = [result for result in results if not result["ok"]]
+    if failures:
+        print("\n{} results are wrong -- move generation or search is "
+              "broken.".format(len(failures)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Number of timed runs of each benchmark")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed of the move shuffles in search")
+    parser.add_argument('--output', default=None,
+                        help="Write the results to this JSON file")
+    parser.add_argument('--compare', default=None,
+                        help="JSON file of a previous run to compare with")
+    main(parser.parse_args())
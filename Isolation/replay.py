@@ -0,0 +1,124 @@
+"""Replay game record files (see `game_record.py`) into NumPy arrays.
+
+Every position of every recorded game is rebuilt without playing the moves
+one at a time on a `Board`: for one game the ply at which each cell was
+first occupied is scattered into an array, and comparing it with the ply
+numbers gives the blocked cells of all positions of the game at once. The
+positions of many games are returned together in batches, ready to be
+turned into features for heuristic tuning.
+
+The file is opened with `numpy.memmap`, so files larger than memory are
+read a batch at a time.
+
+    python replay.py games.bin
+"""
+import argparse
+
+from collections import namedtuple
+from timeit import default_timer as timer
+
+import numpy as np
+
+from game_record import iter_records, read_header
+
+# A batch of positions from recorded games:
+#   blocked    bool array (positions, cells), the blocked cells of each
+#              position by cell index (row + col * height)
+#   locations  int16 array (positions, 2), the cells of player 1 and player 2,
+#              or -1 before a player's first move
+#   ply        int16 array (positions,), the number of moves played; player 1
+#              is to move when it is even
+#   winner     int8 array (positions,), 0 if player 1 won the game, else 1
+#   game       int64 array (positions,), the index of the game in the file
+Positions = namedtuple("Positions", ["blocked", "locations", "ply",
+                                     "winner", "game"])
+
+
+def game_positions(moves, cells):
+    """Return the blocked cells and player locations of every position of a
+    game, from the position before the first move to the final one.
+
+    Parameters
+    ----------
+    moves : uint8 array
+        The cell of every move of the game.
+
+    cells : int
+        The number of cells of the board.
+
+    Returns
+    -------
+    (bool array (moves + 1, cells), int16 array (moves + 1, 2))
+    """
+    num_moves = len(moves)
+    plies = np.arange(num_moves + 1)
+    first = np.full(cells, num_moves + 1, dtype=np.int64)
+    first[moves] = plies[1:]
+    blocked = plies[:, None] >= first[None, :]
+
+    locations = np.full((num_moves + 1, 2), -1, dtype=np.int16)
+    for player in (0, 1):
+        # number of moves the player has made after each ply
+        made = (plies + 1 - player) // 2
+        moved = made > 0
+        locations[moved, player] = moves[player::2][made[moved] - 1]
+    return blocked, locations
+
+
+def read_positions(path, batch_games=1024):
+    """Yield the positions of all games of a game record file in batches of
+    up to `batch_games` games, as `Positions`.
+    """
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    _, _, width, height = read_header(data, path)
+    cells = width * height
+
+    batch = []
+    for idx, (offset, num_moves, _, _, winner, _) in enumerate(
+            iter_records(data)):
+        batch.append((data[offset:offset + num_moves], winner, idx))
+        if len(batch) == batch_games:
+            yield _stack(batch, cells)
+            batch = []
+    if batch:
+        yield _stack(batch, cells)
+
+
+def _stack(batch, cells):
+    """Concatenate the positions of a batch of (moves, winner, index). """
+    blocked, locations, ply, winner, game = [], [], [], [], []
+    for moves, game_winner, idx in batch:
+        game_blocked, game_locations = game_positions(moves, cells)
+        blocked.append(game_blocked)
+        locations.append(game_locations)
+        ply.append(np.arange(len(moves) + 1, dtype=np.int16))
+        winner.append(np.full(len(moves) + 1, game_winner, dtype=np.int8))
+        game.append(np.full(len(moves) + 1, idx, dtype=np.int64))
+    return Positions(np.concatenate(blocked), np.concatenate(locations),
+                     np.concatenate(ply), np.concatenate(winner),
+                     np.concatenate(game))
+
+
+def main(args):
+    start = timer()
+    games, positions, wins = 0, 0, 0
+    for batch in read_positions(args.path, args.batch):
+        games = batch.game[-1] + 1
+        positions += len(batch.ply)
+        # positions won by the player to move
+        wins += np.count_nonzero(batch.winner == batch.ply % 2)
+    elapsed = timer() - start
+    print("Replayed {} positions of {} games in {:.2f}s ({:.0f} "
+          "positions/sec)".format(positions, games, elapsed,
+                                  positions / elapsed if elapsed else 0.))
+    if positions:
+        print("Player to move wins {:.1f}% of positions".format(
+            100. * wins / positions))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path', help="Game record file to replay")
+    parser.add_argument('--batch', type=int, default=1024,
+                        help="Number of games per batch")
+    main(parser.parse_args())
@@ -0,0 +1,82 @@
+"""This file contains a bounded cache of heuristic values for search agents.
+
+Iterative deepening scores many positions more than once: the leaves of one
+pass are scored again when they are reached through a transposition, and the
+next move searches much of the same tree. Every call of the mobility
+heuristics generates the legal moves of both players (and `is_loser` /
+`is_winner` generate them again), so `CachedScore` remembers the value of
+the positions it scored, keyed by the incrementally maintained Zobrist hash
+returned by `isolation.Board.hash()`.
+
+The hash already tells which player is to move; the cache key also records
+whether the scored player is the one to move, since the same position has a
+different value for each of them.
+"""
+from collections import OrderedDict
+
+from game_agent import SEAT_KEY
+
+DEFAULT_ENTRIES = 1 << 16
+
+
+class CachedScore:
+    """Wrap a heuristic with a cache of its values, evicting the least
+    recently used position once `max_entries` are stored. Instances can be
+    passed as `score_fn` to any agent.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The heuristic to cache, called as score_fn(game, player).
+
+    max_entries : int (optional)
+        The largest number of positions kept in the cache.
+
+    Attributes
+    ----------
+    hits : int
+        The number of calls answered from the cache.
+
+    misses : int
+        The number of calls that called `score_fn`.
+    """
+
+    def __init__(self, score_fn, max_entries=DEFAULT_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("A score cache needs at least one entry.")
+        self.score_fn = score_fn
+        self.max_entries = max_entries
+        self.clear()
+
+    def clear(self):
+        """Remove every entry and reset the statistics. """
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        """Return the fraction of calls answered from the cache. """
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.
+
+    def __call__(self, game, player):
+        key = game.hash()
+        if player == game.active_player:
+            key ^= SEAT_KEY
+        cache = self._cache
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = cache[key] = self.score_fn(game, player)
+        if len(cache) > self.max_entries:
+            cache.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __repr__(self):
+        return "CachedScore({!r})".format(self.score_fn)
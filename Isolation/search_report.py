@@ -0,0 +1,103 @@
+"""Report how move ordering, the transposition table and the search windows
+(principal variation search and aspiration windows) affect iterative
+deepening alpha-beta search.
+
+Every configuration searches the same random opening positions to a fixed
+depth with `AlphaBetaPlayer`. For each iterative deepening pass the script
+prints the total number of nodes searched and the effective branching factor
+(b* such that a uniform tree of the same depth has as many nodes).
+"""
+import argparse
+import random
+
+from isolation import BitBoard
+from sample_players import improved_score
+from game_agent import AlphaBetaPlayer, effective_branching_factor
+from move_ordering import MoveOrdering
+from transposition import TranspositionTable
+
+CONFIGS = [
+    ("None", lambda: {}),
+    ("Mobility", lambda: {"ordering": MoveOrdering(
+        pv=False, killers=False, history=False)}),
+    ("PV", lambda: {"ordering": MoveOrdering(
+        killers=False, history=False, mobility=False)}),
+    ("Killer+Hist", lambda: {"ordering": MoveOrdering(
+        pv=False, mobility=False)}),
+    ("All", lambda: {"ordering": MoveOrdering()}),
+    ("All+TT", lambda: {"ordering": MoveOrdering(),
+                        "tt": TranspositionTable()}),
+    ("PVS+TT", lambda: {"ordering": MoveOrdering(),
+                        "tt": TranspositionTable(), "pvs": True}),
+    ("PVS+Asp+TT", lambda: {"ordering": MoveOrdering(),
+                            "tt": TranspositionTable(), "pvs": True,
+                            "aspiration": 1.}),
+]
+
+
+def make_positions(num_positions, num_plies, seed):
+    """Return a list of random move sequences of `num_plies` moves each. """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = BitBoard("Player1", "Player2")
+        moves = []
+        for _ in range(num_plies):
+            legal_moves = game.get_legal_moves()
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            game.apply_move(move)
+            moves.append(move)
+        if len(moves) == num_plies and game.get_legal_moves():
+            positions.append(moves)
+    return positions
+
+
+def search_nodes(config, positions, depth):
+    """Return the total nodes searched at each depth over all positions. """
+    totals = [0] * depth
+    for moves in positions:
+        player = AlphaBetaPlayer(score_fn=improved_score, max_depth=depth,
+                                 **config())
+        if len(moves) % 2:
+            game = BitBoard("Opponent", player)
+        else:
+            game = BitBoard(player, "Opponent")
+        for move in moves:
+            game.apply_move(move)
+        player.get_move(game, lambda: float("inf"))
+        for stats in player.iteration_stats:
+            totals[stats["depth"] - 1] += stats["nodes"]
+    return totals
+
+
+def main(args):
+    positions = make_positions(args.positions, args.plies, args.seed)
+
+    print("{:^8}".format("Depth") +
+          ''.join("{:^20}".format(name) for name, _ in CONFIGS))
+    print("{:^8}".format("") +
+          ''.join("{:>10}{:>10}".format("Nodes", "EBF") for _ in CONFIGS))
+    results = [search_nodes(config, positions, args.depth)
+               for _, config in CONFIGS]
+    for d in range(args.depth):
+        line = "{:^8}".format(d + 1)
+        for totals in results:
+            nodes = totals[d] / len(positions)
+            line += "{:>10.0f}{:>10.2f}".format(
+                nodes, effective_branching_factor(nodes, d + 1))
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--positions', type=int, default=10,
+                        help="Number of random opening positions to search")
+    parser.add_argument('--plies', type=int, default=4,
+                        help="Number of random moves played in each position")
+    parser.add_argument('--depth', type=int, default=7,
+                        help="Deepest iterative deepening pass")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed used to generate the positions")
+    main(parser.parse_args())
@@ -0,0 +1,81 @@
+"""This file contains an optional collector of per-move search statistics.
+
+Pass a `SearchStats` as the `stats` argument of `MinimaxPlayer` or
+`AlphaBetaPlayer` and the player appends one record per call to get_move()
+to its `moves` list:
+
+    ply           number of moves played before the searched position
+    move          the move returned
+    nodes         nodes searched
+    leaf_evals    positions scored by the heuristic
+    cutoffs       alpha-beta cutoffs
+    depth         depth of the deepest completed iteration (0 if none)
+    iterations    depth, nodes and time of every completed iteration
+    time          time used, in the units of `time_left` (milliseconds)
+    stop          why iterative deepening stopped (see
+                  `AlphaBetaPlayer.time_stats`), or "solved" if the endgame
+                  solver chose the move
+    tt_probes     transposition table lookups
+    tt_hits       transposition table lookups that found the position
+
+The players count nodes, leaf evaluations and cutoffs whether or not a
+collector is attached; the record is only built once per move, so leaving
+`stats` as None costs nothing during the search.
+
+`write_jsonl` dumps records as JSON lines and `summarize` aggregates them,
+as done by `tournament.py --stats`.
+"""
+import json
+
+
+class SearchStats:
+    """A list of per-move search records (see the module docstring).
+
+    Attributes
+    ----------
+    moves : list<dict>
+        One record per move, in the order the moves were searched.
+    """
+
+    def __init__(self):
+        self.moves = []
+
+    def record(self, **fields):
+        """Append the record of one move. """
+        self.moves.append(fields)
+
+    def clear(self):
+        """Remove every record. """
+        self.moves = []
+
+
+def write_jsonl(f, records, **fields):
+    """Write `records` to the open file `f` as one JSON object per line,
+    adding `fields` (e.g. the agent name) to every record.
+    """
+    for record in records:
+        f.write(json.dumps(dict(fields, **record)) + "\n")
+
+
+def summarize(records):
+    """Aggregate per-move records.
+
+    Returns
+    -------
+    dict
+        The number of `moves`, the mean `nodes`, `leaf_evals`, `cutoffs`,
+        `depth` and `time` per move, the deepest `max_depth`, and the
+        transposition table `tt_hit_rate` (None if the table was never
+        probed).
+    """
+    moves = len(records)
+    summary = {"moves": moves}
+    for key in ("nodes", "leaf_evals", "cutoffs", "depth", "time"):
+        summary[key] = (sum(record[key] for record in records) / moves
+                        if moves else 0.)
+    summary["max_depth"] = max((record["depth"] for record in records),
+                               default=0)
+    probes = sum(record["tt_probes"] for record in records)
+    hits = sum(record["tt_hits"] for record in records)
+    summary["tt_hit_rate"] = hits / probes if probes else None
+    return summary
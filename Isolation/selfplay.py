@@ -0,0 +1,321 @@
+"""Generate (position, outcome) datasets from headless self-play games.
+
+`Board.play` is built for fair timed matches: it copies the board for every
+move, builds a `time_left` closure for the player and measures the wall
+clock. None of that is needed to generate training data, so the games here
+are played directly on one board: each agent is handed the board itself
+(the agents only read it, or undo their own `push_move`s) and a
+`isolation.NodeClock`, so the games are reproducible and their speed only
+depends on the search.
+
+Games are spread over a pool of worker processes. Each worker plays whole
+games from a random opening and sends back the moves. The main process
+appends every position of every game to a columnar position file. A position
+file starts with a header (magic, format version, board width and height; see
+`record_file.py`) and the number of games in the file, which the writer
+updates after every chunk. After the header come chunks of up to `chunk_rows`
+positions. Each chunk holds the number of positions, then one little-endian
+array per column:
+
+    blocked    uint64  bitmask of the blocked cells (row + col * height)
+    player_1   int8    cell of player 1, or -1 before its first move
+    player_2   int8    cell of player 2, or -1 before its first move
+    ply        uint8   moves played; player 1 is to move when it is even
+    move       uint8   cell of the move played from the position, or 255
+                       in the final position
+    winner     uint8   0 if player 1 won the game, else 1
+    game       uint32  index of the game in the file
+
+`read_chunks` returns the columns as `array.array`s, which NumPy can wrap
+without copying (`numpy.frombuffer(chunk["blocked"], "<u8")`).
+
+    python selfplay.py --games 10000 --agents AB_Improved AB_Custom
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+from isolation import Board, NodeClock
+from record_file import FILE_HEADER, FileFormat, RecordWriter
+from sample_players import (RandomPlayer, GreedyPlayer, open_move_score,
+                            improved_score, center_score)
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, MCTSPlayer,
+                        custom_score, custom_score_2, custom_score_3)
+
+MAGIC = b"ISPC"
+VERSION = 2
+
+FORMAT = FileFormat(MAGIC, VERSION, "position file")
+read_header = FORMAT.read_header
+
+# number of games in the file, stored after the file header
+GAME_COUNT = struct.Struct("<I")
+# number of positions in the chunk
+CHUNK_HEADER = struct.Struct("<I")
+
+# column name and array typecode (sizes fixed by `_typecode`)
+COLUMNS = [("blocked", "Q"), ("player_1", "b"), ("player_2", "b"),
+           ("ply", "B"), ("move", "B"), ("winner", "B"), ("game", "I")]
+
+NO_MOVE = 255
+NODE_LIMIT = 300  # number of search nodes per move
+
+AGENTS = {
+    "Random": lambda: RandomPlayer(),
+    "Greedy_Open": lambda: GreedyPlayer(score_fn=open_move_score),
+    "Greedy_Improved": lambda: GreedyPlayer(score_fn=improved_score),
+    "MM_Open": lambda: MinimaxPlayer(score_fn=open_move_score),
+    "MM_Center": lambda: MinimaxPlayer(score_fn=center_score),
+    "MM_Improved": lambda: MinimaxPlayer(score_fn=improved_score),
+    "AB_Open": lambda: AlphaBetaPlayer(score_fn=open_move_score),
+    "AB_Center": lambda: AlphaBetaPlayer(score_fn=center_score),
+    "AB_Improved": lambda: AlphaBetaPlayer(score_fn=improved_score),
+    "AB_Custom": lambda: AlphaBetaPlayer(score_fn=custom_score),
+    "AB_Custom_2": lambda: AlphaBetaPlayer(score_fn=custom_score_2),
+    "AB_Custom_3": lambda: AlphaBetaPlayer(score_fn=custom_score_3),
+    "MCTS": lambda: MCTSPlayer(),
+}
+
+
+def _typecode(code):
+    """Return the array typecode of the same kind as `code` whose items are
+    the size the file format requires on this platform.
+    """
+    size = struct.calcsize(code)
+    for candidate in {"Q": "QL", "I": "IL"}.get(code, code):
+        if array(candidate).itemsize == size:
+            return candidate
+    raise RuntimeError("No array type for {}".format(code))
+
+
+def random_opening(rng, num_plies, width=7, height=7):
+    """Return a list of `num_plies` random legal moves from the empty board. """
+    game = Board("Player1", "Player2", width, height)
+    opening = []
+    for _ in range(num_plies):
+        move = rng.choice(sorted(game.get_legal_moves()))
+        game.apply_move(move)
+        opening.append(move)
+    return opening
+
+
+def play_headless(agents, opening, seed, node_limit, width=7, height=7):
+    """Play one game between new instances of the named `AGENTS` from the
+    given opening, giving every move a budget of `node_limit` nodes.
+
+    Returns
+    -------
+    (int, list<(int, int)>, bool)
+        The index of the winner (0 for player 1), every move of the game
+        including the opening, and whether the loser forfeited by returning
+        an illegal move while it still had legal moves.
+    """
+    random.seed(seed)
+    players = [AGENTS[name]() for name in agents]
+    game = Board(players[0], players[1], width, height)
+    for move in opening:
+        game.apply_move(move)
+    moves = list(opening)
+    while True:
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return int(game.active_player is players[0]), moves, False
+        move = game.active_player.get_move(game, NodeClock(node_limit))
+        if move not in legal_moves:
+            return int(game.active_player is players[0]), moves, True
+        game.apply_move(move)
+        moves.append(move)
+
+
+class PositionWriter(RecordWriter):
+    """Append the positions of games to a position file, creating it if
+    needed.
+
+    Parameters
+    ----------
+    path : str
+        The file to append to. An existing file must have been written for
+        the same board size.
+
+    width, height : int (optional)
+        The board size of the games. Boards of more than 64 cells cannot be
+        written.
+
+    chunk_rows : int (optional)
+        The number of positions buffered before a chunk is written.
+    """
+
+    def __init__(self, path, width=7, height=7, chunk_rows=1 << 16):
+        if width * height > 64:
+            raise ValueError("Boards of more than 64 cells cannot be "
+                             "written.")
+        super().__init__(path, FORMAT, width, height, GAME_COUNT.pack(0))
+        self.chunk_rows = chunk_rows
+        self.games, = GAME_COUNT.unpack(
+            self.read_at(FILE_HEADER.size, GAME_COUNT.size))
+        self.positions = 0
+        self._new_chunk()
+
+    def _new_chunk(self):
+        self._columns = {name: array(_typecode(code))
+                         for name, code in COLUMNS}
+
+    def write_game(self, moves, winner):
+        """Append every position of a game, from the empty board to the
+        final position.
+        """
+        columns = self._columns
+        cells = [r + c * self.height for r, c in moves]
+        blocked = 0
+        locations = [-1, -1]
+        for ply in range(len(cells) + 1):
+            columns["blocked"].append(blocked)
+            columns["player_1"].append(locations[0])
+            columns["player_2"].append(locations[1])
+            columns["ply"].append(ply)
+            columns["move"].append(cells[ply] if ply < len(cells)
+                                   else NO_MOVE)
+            if ply < len(cells):
+                blocked |= 1 << cells[ply]
+                locations[ply % 2] = cells[ply]
+        count = len(cells) + 1
+        columns["winner"].extend([winner] * count)
+        columns["game"].extend([self.games] * count)
+        self.games += 1
+        self.positions += count
+        if len(columns["ply"]) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered positions as a chunk. """
+        rows = len(self._columns["ply"])
+        if not rows:
+            return
+        self.append(CHUNK_HEADER.pack(rows))
+        for name, _ in COLUMNS:
+            column = self._columns[name]
+            if sys.byteorder == "big":
+                column.byteswap()
+            self.append(column.tobytes())
+        # chunks only hold whole games, so every buffered game is written
+        self.write_at(FILE_HEADER.size, GAME_COUNT.pack(self.games))
+        super().flush()
+        self._new_chunk()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+def read_chunks(path):
+    """Yield every complete chunk of a position file as a dict mapping the
+    column names to `array.array`s.
+    """
+    with open(path, "rb") as f:
+        read_header(f.read(FILE_HEADER.size), path)
+        f.read(GAME_COUNT.size)
+        while True:
+            data = f.read(CHUNK_HEADER.size)
+            if len(data) < CHUNK_HEADER.size:
+                return
+            rows, = CHUNK_HEADER.unpack(data)
+            chunk = {}
+            for name, code in COLUMNS:
+                column = array(_typecode(code))
+                try:
+                    column.fromfile(f, rows)
+                except EOFError:
+                    # a chunk that is still being written
+                    return
+                if sys.byteorder == "big":
+                    column.byteswap()
+                chunk[name] = column
+            yield chunk
+
+
+def generate(path, agents, num_games, workers, node_limit, plies, seed,
+             chunk_rows=1 << 16):
+    """Play `num_games` headless games between the named agents and append
+    their positions to the position file `path`.
+
+    With one agent every game is self-play. With two the agents swap seats
+    every game.
+
+    Returns
+    -------
+    (int, int, int)
+        The number of positions written, the wins of the first agent and
+        the number of forfeits.
+    """
+    rng = random.Random(seed)
+    pairs = [(agents[i % len(agents)], agents[(i + 1) % len(agents)])
+             for i in range(num_games)]
+    openings = [random_opening(rng, plies) for _ in range(num_games)]
+    seeds = [rng.getrandbits(32) for _ in range(num_games)]
+    args = [pairs, openings, seeds, [node_limit] * num_games]
+
+    wins = forfeits = 0
+    with PositionWriter(path, chunk_rows=chunk_rows) as writer:
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            results = executor.map(play_headless, *args, chunksize=16)
+        else:
+            executor = None
+            results = map(play_headless, *args)
+        try:
+            for pair, (winner, moves, forfeit) in zip(pairs, results):
+                writer.write_game(moves, winner)
+                wins += pair[winner] == agents[0]
+                forfeits += forfeit
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    return writer.positions, wins, forfeits
+
+
+def main(args):
+    for name in args.agents:
+        if name not in AGENTS:
+            raise ValueError("Unknown agent: {}".format(name))
+    print("Playing {} games of {} with {} nodes per move on {} "
+          "worker(s)".format(args.games, " vs ".join(args.agents),
+                             args.nodes, args.workers))
+    start = timer()
+    positions, wins, forfeits = generate(
+        args.output, args.agents, args.games, args.workers, args.nodes,
+        args.plies, args.seed)
+    elapsed = timer() - start
+    print("Wrote {} positions to {} in {:.1f}s ({:.1f} games/sec)".format(
+        positions, args.output, elapsed, args.games / elapsed))
+    if len(set(args.agents)) > 1:
+        print("{} won {:.1f}% of the games".format(
+            args.agents[0], 100. * wins / args.games))
+    if forfeits:
+        print("{} games ended in a forfeit".format(forfeits))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=1000,
+                        help="Number of games to play")
+    parser.add_argument('--agents', nargs='+', default=["AB_Improved"],
+                        help="One agent for self-play or two that swap "
+                             "seats every game; one of: " +
+                             ", ".join(AGENTS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Number of processes playing games")
+    parser.add_argument('--nodes', type=int, default=NODE_LIMIT,
+                        help="Search nodes per move")
+    parser.add_argument('--plies', type=int, default=2,
+                        help="Number of random opening moves per game")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed for the openings and games")
+    parser.add_argument('--output', default="selfplay.pos",
+                        help="Position file the games are appended to")
+    main(parser.parse_args())
@@ -11,13 +11,20 @@ players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
 """
+import argparse
+import copy
 import itertools
+import multiprocessing
+import os
 import random
 import warnings
 
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
 from isolation import Board
+from game_record import GameRecordWriter
+from search_stats import SearchStats, summarize, write_jsonl
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
@@ -37,38 +44,117 @@ game_agent.py.
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+def play_game(player_1, player_2, opening, seed):
+    """Play a single game from the given opening moves.
+
+    The global random number generator is seeded with `seed` before the game
+    starts, so a game replays identically in any process (up to differences
+    in how deep the agents search before their time runs out).
+
+    Returns
+    -------
+    (int, str, list<(int, int)>, (list<dict>, list<dict>))
+        The index of the winner (0 for player_1, 1 for player_2), the
+        reason the game ended, every move of the game, including the
+        opening, and the per-move search records of each player (empty for
+        players without a `search_stats.SearchStats`).
+    """
+    random.seed(seed)
+    collectors = [getattr(player, "stats", None)
+                  for player in (player_1, player_2)]
+    for stats in collectors:
+        if stats is not None:
+            stats.clear()
+    game = Board(player_1, player_2)
+    for move in opening:
+        game.apply_move(move)
+    winner, history, termination = game.play(time_limit=TIME_LIMIT)
+    moves = list(opening) + [tuple(move) for move in history]
+    searches = tuple([] if stats is None else stats.moves
+                     for stats in collectors)
+    return int(winner == player_2), termination, moves, searches
+
+
+def play_round(cpu_agent, test_agents, win_counts, num_matches, seed=None,
+               executor=None, record=None, stats=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+
+    The openings and the random seed of every game are drawn from `seed`.
+    Each game starts from a copy of the agents, so games are independent of
+    each other and produce the same tallies whether they are played one
+    after another or spread across the processes of `executor`.
+
+    If `record` is a `game_record.GameRecordWriter`, every game is appended
+    to it. If `stats` is a list, the search records of every move of agents
+    with a `search_stats.SearchStats` are appended to it, with the agent
+    name and game seed.
     """
-    timeout_count = 0
-    forfeit_count = 0
+    rng = random.Random(seed)
+    games = []
     for _ in range(num_matches):
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
-
         # initialize all games with a random move and response
+        board = Board(cpu_agent.player, test_agents[0].player)
+        opening = []
         for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
-                game.apply_move(move)
+            move = rng.choice(sorted(board.get_legal_moves()))
+            board.apply_move(move)
+            opening.append(move)
+
+        for agent in test_agents:
+            games.append(((cpu_agent, agent), opening, rng.getrandbits(32)))
+            games.append(((agent, cpu_agent), opening, rng.getrandbits(32)))
+
+    # play all games; the executor pickles the players for every game, so the
+    # serial games are given copies of the players as well
+    if executor is None:
+        results = [play_game(*copy.deepcopy((agents[0].player,
+                                             agents[1].player)),
+                             opening, game_seed)
+                   for agents, opening, game_seed in games]
+    else:
+        results = executor.map(play_game, *zip(*[
+            (agents[0].player, agents[1].player, opening, game_seed)
+            for agents, opening, game_seed in games]))
+
+    # tally the results
+    timeout_count = 0
+    forfeit_count = 0
+    for (agents, _, game_seed), (winner, termination, moves,
+                                 searches) in zip(games, results):
+        win_counts[agents[winner].player] += 1
+        if record is not None:
+            record.write(moves, winner, termination, game_seed,
+                         (agents[0].name, agents[1].name))
+        if stats is not None:
+            for agent, records in zip(agents, searches):
+                stats.extend(dict(record, agent=agent.name, seed=game_seed)
+                             for record in records)
+
+        if termination == "timeout":
+            timeout_count += 1
+        elif termination == "forfeit":
+            forfeit_count += 1
 
-        # play all games and tally the results
-        for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
-            win_counts[winner] += 1
+    return timeout_count, forfeit_count
 
-            if termination == "timeout":
-                timeout_count += 1
-            elif termination == "forfeit":
-                forfeit_count += 1
 
-    return timeout_count, forfeit_count
+def pin_worker(counter):
+    """Pin a tournament worker process to its own CPU core (where supported)
+    so that concurrent games do not compete for cores and skew each other's
+    clocks.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    cores = sorted(os.sched_getaffinity(0))
+    with counter.get_lock():
+        worker_idx = counter.value
+        counter.value += 1
+    os.sched_setaffinity(0, {cores[worker_idx % len(cores)]})
 
 
 def update(total_wins, wins):
@@ -77,8 +163,56 @@ def update(total_wins, wins):
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
-    """Play matches between the test agent and each cpu_agent individually. """
+def print_search_stats(records, agents):
+    """Print the per-move search statistics of each agent, in order. """
+    print("\n{:^74}".format("Search statistics per move"))
+    print("{:<13}{:>7}{:>9}{:>9}{:>9}{:>7}{:>5}{:>7}{:>8}".format(
+        "Agent", "Moves", "Nodes", "Leaves", "Cutoffs", "Depth", "Max", "ms",
+        "TT hit"))
+    for name in agents:
+        summary = summarize([record for record in records
+                             if record["agent"] == name])
+        if not summary["moves"]:
+            continue
+        hit_rate = summary["tt_hit_rate"]
+        print("{:<13}{:>7}{:>9.0f}{:>9.0f}{:>9.0f}{:>7.2f}{:>5}{:>7.1f}"
+              "{:>8}".format(name, summary["moves"], summary["nodes"],
+                             summary["leaf_evals"], summary["cutoffs"],
+                             summary["depth"], summary["max_depth"],
+                             summary["time"],
+                             "-" if hit_rate is None
+                             else "{:.1%}".format(hit_rate)))
+
+
+def play_matches(cpu_agents, test_agents, num_matches, workers=1, seed=None,
+                 record=None, stats=None):
+    """Play matches between the test agent and each cpu_agent individually.
+
+    If `workers` is greater than one the games of each round are played in
+    parallel by a pool of that many processes, each pinned to one core. If
+    `record` is a path, every game is appended to that game record file (see
+    `game_record.py`). If `stats` is a path, the search records of agents
+    with a `search_stats.SearchStats` are written to it as JSON lines and
+    summarized after the win rates.
+    """
+    if seed is None:
+        seed = random.randrange(2**32)
+    print("Random seed: {}".format(seed))
+    rng = random.Random(seed)
+
+    executor = None
+    if workers > 1:
+        if workers > multiprocessing.cpu_count():
+            warnings.warn("Running more workers than CPU cores will skew the "
+                          "time limit of concurrent games.")
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=pin_worker,
+            initargs=(multiprocessing.Value('i', 0),))
+
+    writer = None if record is None else GameRecordWriter(record)
+    stats_file = None if stats is None else open(stats, "w")
+    search_records = []
+
     total_wins = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
     total_forfeits = 0.
@@ -93,9 +227,18 @@ def play_matches(cpu_agents, test_agents, num_matches):
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
+        round_records = None if stats_file is None else []
+        counts = play_round(agent, test_agents, wins, num_matches,
+                            seed=rng.getrandbits(32), executor=executor,
+                            record=writer, stats=round_records)
         total_timeouts += counts[0]
         total_forfeits += counts[1]
+        if writer is not None:
+            writer.flush()
+        if stats_file is not None:
+            write_jsonl(stats_file, round_records)
+            stats_file.flush()
+            search_records.extend(round_records)
         total_wins = update(total_wins, wins)
         _total = 2 * num_matches
         round_totals = sum([[wins[agent.player], _total - wins[agent.player]]
@@ -106,6 +249,13 @@ def play_matches(cpu_agents, test_agents, num_matches):
             ) for i in range(0, len(round_totals), 2)
         ]))
 
+    if executor is not None:
+        executor.shutdown()
+    if writer is not None:
+        writer.close()
+    if stats_file is not None:
+        stats_file.close()
+
     print("-" * 74)
     print('{:^9}{:^13}'.format("", "Win Rate:") +
         ''.join([
@@ -123,8 +273,15 @@ def play_matches(cpu_agents, test_agents, num_matches):
         print(("\nYour ID search forfeited {} games while there were still " +
                "legal moves available to play.\n").format(total_forfeits))
 
+    if stats_file is not None:
+        names = []
+        for agent in test_agents + cpu_agents:
+            if agent.name not in names:
+                names.append(agent.name)
+        print_search_stats(search_records, names)
 
-def main():
+
+def main(args):
 
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
@@ -146,12 +303,34 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
     ]
 
+    if args.stats is not None:
+        # every player gets its own collector, which is copied into each of
+        # its games
+        for agent in test_agents + cpu_agents:
+            if hasattr(agent.player, "stats"):
+                agent.player.stats = SearchStats()
+
     print(DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    play_matches(cpu_agents, test_agents, args.matches, workers=args.workers,
+                 seed=args.seed, record=args.record, stats=args.stats)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument('--matches', type=int, default=NUM_MATCHES,
+                        help="Number of matches against each opponent")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of processes used to play games in "
+                             "parallel (default: play serially)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Random seed for the openings and games, to "
+                             "reproduce a previous run")
+    parser.add_argument('--record', default=None,
+                        help="Append every game to this game record file")
+    parser.add_argument('--stats', default=None,
+                        help="Write the search statistics of every move to "
+                             "this JSON lines file and summarize them")
+    main(parser.parse_args())
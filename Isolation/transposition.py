@@ -0,0 +1,105 @@
+"""This file contains a bounded transposition table that search agents can use
+to remember the result of searching a position, keyed by the incrementally
+maintained Zobrist hash returned by `isolation.Board.hash()`.
+"""
+from collections import namedtuple
+
+# Bound types of a stored search value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Approximate memory used by one stored entry, for sizing tables in megabytes
+ENTRY_BYTES = 200
+
+DEFAULT_ENTRIES = 1 << 16
+
+Entry = namedtuple("Entry", ["key", "depth", "flag", "value", "move",
+                             "generation"])
+
+
+class TranspositionTable:
+    """A fixed-size hash table of search results.
+
+    Each key maps to a single slot (`key % size`), so the table never grows
+    past its size cap. When two positions compete for a slot the new entry
+    replaces the old one if the slot is empty, the old entry was stored
+    during an earlier search (see `new_search`), or the new entry was searched
+    at least as deep as the old one.
+
+    Parameters
+    ----------
+    max_entries : int (optional)
+        The number of slots in the table.
+
+    max_mb : float (optional)
+        An approximate memory cap in megabytes, used to size the table when
+        `max_entries` is not given.
+    """
+
+    def __init__(self, max_entries=None, max_mb=None):
+        if max_entries is None:
+            if max_mb is None:
+                max_entries = DEFAULT_ENTRIES
+            else:
+                max_entries = int(max_mb * 2**20) // ENTRY_BYTES
+        if max_entries < 1:
+            raise ValueError("A transposition table needs at least one entry.")
+        self.size = max_entries
+        self.clear()
+
+    def clear(self):
+        """Remove every entry and reset the statistics. """
+        self._slots = [None] * self.size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Mark every entry currently in the table as coming from an earlier
+        search, so that it is the first to be replaced.
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """Return the entry stored for `key`, or None. """
+        self.probes += 1
+        entry = self._slots[key % self.size]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, flag, value, move):
+        """Record the result of searching the position `key` to `depth` plies.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the searched position.
+
+        depth : int
+            The depth of the search below the position.
+
+        flag : int
+            EXACT if `value` is the minimax value of the position, LOWER if it
+            is a lower bound (the search failed high) or UPPER if it is an
+            upper bound (the search failed low).
+
+        value : float
+            The value returned by the search.
+
+        move : (int, int)
+            The best move found in the position.
+        """
+        slot = key % self.size
+        old = self._slots[slot]
+        if (old is None or old.generation != self.generation or
+                depth >= old.depth):
+            self._slots[slot] = Entry(key, depth, flag, value, move,
+                                      self.generation)
+            self.stores += 1
+
+    def __len__(self):
+        return sum(entry is not None for entry in self._slots)
@@ -0,0 +1,216 @@
+"""Fit the weights of `features.LinearScore` to self-play games.
+
+The tool plays games between two copies of `AlphaBetaPlayer` that use the
+current heuristic, spread across a pool of processes and limited to a fixed
+number of search nodes per move so that the data does not depend on the
+machine. The games are appended to a game record file (see
+`game_record.py`), which is then replayed with `replay.py` to compute the
+`features.FEATURES` of every position for the player to move, labeled with
+whether that player went on to win.
+
+The weights are fitted either by least squares on a +1/-1 outcome, or by
+logistic regression of the outcome probability ("Texel tuning"), and written
+to a JSON file that `LinearScore.load` turns into a `score_fn`:
+
+    python tune.py --games 400 --workers 4 --output weights.json
+    AlphaBetaPlayer(score_fn=LinearScore.load("weights.json"))
+"""
+import argparse
+import os
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from isolation import Board
+from isolation.isolation import knight_neighbors
+from features import FEATURES, LinearScore
+from game_agent import AlphaBetaPlayer
+from game_record import GameRecordWriter
+from replay import read_positions
+from selfplay import random_opening
+
+NODE_LIMIT = 300  # number of search nodes per move in self-play games
+
+
+def play_selfplay_game(score_fn, opening, seed, node_limit):
+    """Play one node-limited game between two agents using `score_fn`, from
+    the given opening moves. Returns the winner index, the termination and
+    every move of the game.
+    """
+    random.seed(seed)
+    players = (AlphaBetaPlayer(score_fn=score_fn),
+               AlphaBetaPlayer(score_fn=score_fn))
+    game = Board(*players)
+    for move in opening:
+        game.apply_move(move)
+    winner, history, termination = game.play(node_limit=node_limit)
+    moves = list(opening) + [tuple(move) for move in history]
+    return int(winner is players[1]), termination, moves
+
+
+def play_games(path, score_fn, num_games, workers, node_limit, plies, seed):
+    """Append `num_games` self-play games to the game record file `path`. """
+    rng = random.Random(seed)
+    games = [(random_opening(rng, plies), rng.getrandbits(32))
+             for _ in range(num_games)]
+    args = [[score_fn] * num_games, [opening for opening, _ in games],
+            [game_seed for _, game_seed in games], [node_limit] * num_games]
+    with GameRecordWriter(path) as writer:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(play_selfplay_game, *args,
+                                       chunksize=8)
+                for (_, game_seed), (winner, termination, moves) in zip(
+                        games, results):
+                    writer.write(moves, winner, termination, game_seed,
+                                 ("selfplay", "selfplay"))
+        else:
+            for (_, game_seed), result in zip(games, map(play_selfplay_game,
+                                                         *args)):
+                winner, termination, moves = result
+                writer.write(moves, winner, termination, game_seed,
+                             ("selfplay", "selfplay"))
+
+
+def feature_matrix(positions, width=7, height=7):
+    """Return the `FEATURES` of a batch of `replay.Positions` for the player
+    to move, and whether that player won, skipping positions in which a
+    player has not moved yet or the player to move has no legal moves.
+
+    Returns
+    -------
+    (float array (positions, features), bool array (positions,))
+    """
+    cells = width * height
+    adjacent = np.zeros((cells, cells), dtype=bool)
+    for cell, neighbors in enumerate(knight_neighbors(width, height)):
+        adjacent[cell, list(neighbors)] = True
+
+    mover = positions.ply % 2
+    rows = np.arange(len(mover))
+    own = positions.locations[rows, mover].astype(np.int64)
+    opp = positions.locations[rows, 1 - mover].astype(np.int64)
+    keep = (own >= 0) & (opp >= 0)
+    own, opp, mover = own[keep], opp[keep], mover[keep]
+    open_cells = ~positions.blocked[keep]
+    won = positions.winner[keep] == mover
+
+    own_cells = adjacent[own] & open_cells
+    own_moves = own_cells.sum(axis=1)
+    opp_moves = (adjacent[opp] & open_cells).sum(axis=1)
+    second = (own_cells.astype(np.int32) @ adjacent.astype(np.int32)) > 0
+    second_moves = (second & open_cells).sum(axis=1)
+    y, x = own % height, own // height
+    center_distance = (height / 2. - y)**2 + (width / 2. - x)**2
+    blank_spaces = open_cells.sum(axis=1)
+
+    features = np.stack([own_moves, opp_moves, center_distance,
+                         second_moves, blank_spaces], axis=1).astype(float)
+    playing = own_moves > 0
+    return features[playing], won[playing]
+
+
+def ridge_penalty(l2, num_positions, num_features):
+    """Return the L2 penalty matrix of the weights of `num_features`
+    features followed by an intercept, which is left out of the penalty so
+    that the fitted weights do not change when a feature is shifted by a
+    constant.
+    """
+    penalty = l2 * num_positions * np.eye(num_features + 1)
+    penalty[-1, -1] = 0.
+    return penalty
+
+
+def fit_least_squares(features, won, l2=0.):
+    """Fit weights so that the weighted features approximate +1 for won and
+    -1 for lost positions, with an optional L2 penalty. The intercept is
+    fitted but not returned, since it does not change the ranking of
+    positions.
+    """
+    design = np.hstack([features, np.ones((len(features), 1))])
+    target = np.where(won, 1., -1.)
+    if l2:
+        # ridge regression as least squares on rows appended to the design
+        penalty = ridge_penalty(l2, len(design), features.shape[1])
+        design = np.vstack([design, np.sqrt(penalty)])
+        target = np.concatenate([target, np.zeros(len(penalty))])
+    weights = np.linalg.lstsq(design, target, rcond=None)[0]
+    return weights[:-1]
+
+
+def fit_logistic(features, won, iterations=25, l2=1e-3):
+    """Fit weights so that the logistic function of the weighted features
+    predicts the probability of winning (Texel tuning), by iteratively
+    reweighted least squares with a small L2 penalty.
+    """
+    design = np.hstack([features, np.ones((len(features), 1))])
+    target = won.astype(float)
+    weights = np.zeros(design.shape[1])
+    penalty = ridge_penalty(l2, len(design), features.shape[1])
+    for _ in range(iterations):
+        p = 1. / (1. + np.exp(-design @ weights))
+        gradient = design.T @ (p - target) + penalty @ weights
+        hessian = (design * (p * (1. - p))[:, None]).T @ design + penalty
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return weights[:-1]
+
+
+def main(args):
+    if args.weights is None:
+        score_fn = LinearScore([1., -1., 0., 0., 0.])  # improved_score
+    else:
+        score_fn = LinearScore.load(args.weights)
+
+    if args.games:
+        print("Playing {} self-play games with {} on {} worker(s)".format(
+            args.games, score_fn, args.workers))
+        play_games(args.record, score_fn, args.games, args.workers,
+                   args.nodes, args.plies, args.seed)
+
+    features, won = [], []
+    for batch in read_positions(args.record):
+        batch_features, batch_won = feature_matrix(batch)
+        features.append(batch_features)
+        won.append(batch_won)
+    features, won = np.concatenate(features), np.concatenate(won)
+    print("Fitting {} positions from {}".format(len(won), args.record))
+
+    if args.method == "lstsq":
+        weights = fit_least_squares(features, won)
+    else:
+        weights = fit_logistic(features, won)
+    tuned = LinearScore(weights.tolist())
+    for name, weight in zip(FEATURES, tuned.weights):
+        print("{:>18}: {: .4f}".format(name, weight))
+    tuned.save(args.output)
+    print("Wrote {}; use it with AlphaBetaPlayer(score_fn=LinearScore.load("
+          "{!r}))".format(args.output, args.output))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=200,
+                        help="Number of self-play games to add to the record")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Number of processes playing games")
+    parser.add_argument('--nodes', type=int, default=NODE_LIMIT,
+                        help="Search nodes per move in self-play games")
+    parser.add_argument('--plies', type=int, default=4,
+                        help="Number of random opening moves per game")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed for the openings and games")
+    parser.add_argument('--record', default="selfplay.bin",
+                        help="Game record file the games are appended to")
+    parser.add_argument('--weights', default=None,
+                        help="JSON weights of the self-play heuristic "
+                             "(default: improved_score)")
+    parser.add_argument('--method', choices=["texel", "lstsq"],
+                        default="texel", help="Fitting method")
+    parser.add_argument('--output', default="weights.json",
+                        help="JSON file the tuned weights are written to")
+    main(parser.parse_args())